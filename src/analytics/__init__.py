@@ -0,0 +1,4 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Offline analytics of exported spans: latency, token, cost and critical path rollups."""
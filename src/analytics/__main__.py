@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Compute performance reports over exported spans, without any backend.
+
+Traces are read from OTLP/JSON or OTLP protobuf files (collector file exporter)
+or from a local trace store (OTEL_TRACE_STORE), streamed in columnar chunks, so
+files larger than memory can be analyzed. Reports:
+
+- latency: count, mean, max and percentiles of span durations by group
+- tokens: LLM calls, errors, input, output and prompt cache tokens and cost by group
+- critical-path: time of each chain step on the critical path of its traces
+
+Example:
+    python -m analytics /tmp/traces.jsonl --by model,hour --percentiles 50,95,99
+"""
+
+import argparse
+import json
+
+from .columns import DEFAULT_CHUNK_SIZE
+from .report import REPORTS, analyze, format_report
+from .rollups import GROUP_KEYS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="OTLP/JSON or protobuf files, or trace stores")
+    parser.add_argument("--report", default=",".join(REPORTS), help="comma separated reports")
+    parser.add_argument("--by", default="model,hour", help=f"comma separated group keys: {', '.join(GROUP_KEYS)}")
+    parser.add_argument("--percentiles", default="50,95,99", help="comma separated latency percentiles")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="spans per columnar chunk")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = [report for report in args.report.split(",") if report]
+    by = [key for key in args.by.split(",") if key]
+    for value, choices in [(report, REPORTS) for report in reports] + [(key, GROUP_KEYS) for key in by]:
+        if value not in choices:
+            parser.error(f"unknown value {value!r}, expected one of: {', '.join(choices)}")
+
+    summary = analyze(
+        args.traces,
+        reports,
+        by,
+        [float(percentile) for percentile in args.percentiles.split(",") if percentile],
+        args.chunk_size,
+    )
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
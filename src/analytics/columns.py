@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Columnar chunks of exported spans.
+
+Spans are read with ``telemetry.store.read_spans`` (OTLP/JSON, OTLP protobuf or
+local trace store files) and converted, a chunk at a time, into NumPy arrays:
+one array per field, so rollups run as array operations instead of a Python
+loop per span, and only one chunk is in memory whatever the size of the files.
+
+Strings (span names, models, providers) are stored as integer codes of
+``Categories`` shared by all the chunks of a scan. Trace IDs are stored as
+their lowest 64 bits, span IDs as integers (0 for no parent).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from telemetry.store import SpanRecord, read_spans
+
+DEFAULT_CHUNK_SIZE = 16384
+
+MODEL_ATTRIBUTES = ("gen_ai.response.model", "gen_ai.request.model")
+INPUT_TOKENS_ATTRIBUTES = ("gen_ai.usage.input_tokens", "gen_ai.usage.prompt_tokens")
+OUTPUT_TOKENS_ATTRIBUTES = ("gen_ai.usage.output_tokens", "gen_ai.usage.completion_tokens")
+CACHE_READ_TOKENS_ATTRIBUTE = "gen_ai.usage.cache_read_input_tokens"
+CACHE_WRITE_TOKENS_ATTRIBUTE = "gen_ai.usage.cache_creation_input_tokens"
+PROVIDER_ATTRIBUTE = "gen_ai.system"
+
+_TRACE_ID_MASK = (1 << 64) - 1
+
+
+class Categories:
+    """Integer codes of the distinct values of a string column."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[Any]) -> int:
+        """Get the code of a value, -1 for None."""
+        if value is None:
+            return -1
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+@dataclass
+class SpanColumns:
+    """A chunk of spans, one NumPy array per field."""
+
+    trace_id: np.ndarray  # uint64, lowest 64 bits
+    span_id: np.ndarray  # uint64
+    parent_id: np.ndarray  # uint64, 0 for root spans
+    name: np.ndarray  # int32 codes of names
+    model: np.ndarray  # int32 codes of models, -1 for none
+    provider: np.ndarray  # int32 codes of providers, -1 for none
+    start_ns: np.ndarray  # int64
+    end_ns: np.ndarray  # int64
+    input_tokens: np.ndarray  # int64, 0 when not recorded
+    output_tokens: np.ndarray  # int64, 0 when not recorded
+    cache_read_tokens: np.ndarray  # int64, input tokens read from the prompt cache
+    cache_write_tokens: np.ndarray  # int64, input tokens written to the prompt cache
+    error: np.ndarray  # bool
+
+    @property
+    def duration_ns(self) -> np.ndarray:
+        """Get the span durations in nanoseconds."""
+        return self.end_ns - self.start_ns
+
+    def __len__(self) -> int:
+        return len(self.span_id)
+
+    def take(self, selection: np.ndarray) -> "SpanColumns":
+        """Get the spans of a boolean mask or of indexes."""
+        return SpanColumns(**{name: values[selection] for name, values in vars(self).items()})
+
+    @classmethod
+    def concatenate(cls, chunks: List["SpanColumns"]) -> "SpanColumns":
+        """Concatenate chunks encoded with the same categories."""
+        return cls(**{name: np.concatenate([vars(chunk)[name] for chunk in chunks]) for name in vars(chunks[0])})
+
+
+@dataclass
+class ColumnCategories:
+    """Categories of the string columns of a scan."""
+
+    names: Categories = field(default_factory=Categories)
+    models: Categories = field(default_factory=Categories)
+    providers: Categories = field(default_factory=Categories)
+
+
+def _first(attributes: Dict[str, Any], keys: Iterable[str]) -> Optional[Any]:
+    for key in keys:
+        if attributes.get(key) is not None:
+            return attributes[key]
+    return None
+
+
+def to_columns(spans: List[SpanRecord], categories: ColumnCategories) -> SpanColumns:
+    """Convert spans into columns."""
+    trace_ids, span_ids, parent_ids, names, models, providers = [], [], [], [], [], []
+    starts, ends, inputs, outputs, cache_reads, cache_writes, errors = [], [], [], [], [], [], []
+    for span in spans:
+        attributes = span.attributes
+        trace_ids.append(int(span.trace_id, 16) & _TRACE_ID_MASK)
+        span_ids.append(int(span.span_id, 16))
+        parent_ids.append(int(span.parent_span_id, 16) if span.parent_span_id else 0)
+        names.append(categories.names.code(span.name))
+        models.append(categories.models.code(_first(attributes, MODEL_ATTRIBUTES)))
+        providers.append(categories.providers.code(attributes.get(PROVIDER_ATTRIBUTE)))
+        starts.append(span.start_ns)
+        ends.append(span.end_ns)
+        inputs.append(int(_first(attributes, INPUT_TOKENS_ATTRIBUTES) or 0))
+        outputs.append(int(_first(attributes, OUTPUT_TOKENS_ATTRIBUTES) or 0))
+        cache_reads.append(int(attributes.get(CACHE_READ_TOKENS_ATTRIBUTE) or 0))
+        cache_writes.append(int(attributes.get(CACHE_WRITE_TOKENS_ATTRIBUTE) or 0))
+        errors.append(span.status == "ERROR")
+    return SpanColumns(
+        trace_id=np.array(trace_ids, dtype=np.uint64),
+        span_id=np.array(span_ids, dtype=np.uint64),
+        parent_id=np.array(parent_ids, dtype=np.uint64),
+        name=np.array(names, dtype=np.int32),
+        model=np.array(models, dtype=np.int32),
+        provider=np.array(providers, dtype=np.int32),
+        start_ns=np.array(starts, dtype=np.int64),
+        end_ns=np.array(ends, dtype=np.int64),
+        input_tokens=np.array(inputs, dtype=np.int64),
+        output_tokens=np.array(outputs, dtype=np.int64),
+        cache_read_tokens=np.array(cache_reads, dtype=np.int64),
+        cache_write_tokens=np.array(cache_writes, dtype=np.int64),
+        error=np.array(errors, dtype=bool),
+    )
+
+
+def scan(
+    paths: Iterable[str],
+    categories: ColumnCategories,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[SpanColumns]:
+    """Stream the spans of trace files as columnar chunks.
+
+    Args:
+        paths: OTLP/JSON or protobuf files, or local trace stores
+        categories: Categories of the string columns, filled while scanning
+        chunk_size: Spans per chunk
+
+    Yields:
+        Chunks of at most ``chunk_size`` spans, in file order
+    """
+    spans: List[SpanRecord] = []
+    for path in paths:
+        for span in read_spans(path):
+            spans.append(span)
+            if len(spans) == chunk_size:
+                yield to_columns(spans, categories)
+                spans = []
+    if spans:
+        yield to_columns(spans, categories)
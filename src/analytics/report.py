@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Reports of the rollups of a scan."""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from .columns import DEFAULT_CHUNK_SIZE, ColumnCategories, scan
+from .rollups import CriticalPathRollup, LatencyRollup, TokenRollup
+
+REPORTS = ("latency", "tokens", "critical-path")
+
+
+def analyze(
+    paths: Iterable[str],
+    reports: Sequence[str] = REPORTS,
+    by: Sequence[str] = ("model", "hour"),
+    percentiles: Sequence[float] = (50, 95, 99),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Compute reports over trace files, in one streaming pass.
+
+    Args:
+        paths: OTLP/JSON or protobuf files, or local trace stores
+        reports: Reports to compute, among REPORTS
+        by: Group keys of the latency and token reports
+        percentiles: Latency percentiles (0 to 100)
+        chunk_size: Spans per columnar chunk
+
+    Returns:
+        The span count and the rows of each report
+    """
+    categories = ColumnCategories()
+    rollups: Dict[str, Any] = {}
+    if "latency" in reports:
+        rollups["latency"] = LatencyRollup(categories, by)
+    if "tokens" in reports:
+        rollups["tokens"] = TokenRollup(categories, by)
+    if "critical-path" in reports:
+        rollups["critical-path"] = CriticalPathRollup(categories)
+
+    spans = 0
+    for columns in scan(paths, categories, chunk_size):
+        spans += len(columns)
+        for rollup in rollups.values():
+            rollup.add(columns)
+
+    summary: Dict[str, Any] = {"spans": spans}
+    for name, rollup in rollups.items():
+        summary[name] = rollup.rows(percentiles) if name == "latency" else rollup.rows()
+    if "critical-path" in rollups:
+        summary["traces"] = rollups["critical-path"].traces
+    return summary
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "n/a"
+    if isinstance(value, float):
+        return f"{value:,.3f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """Render report rows as a text table."""
+    if not rows:
+        return "(no spans)"
+    columns = list(rows[0])
+    cells = [[_cell(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[index]) for line in cells)) for index, column in enumerate(columns)]
+    lines = [" ".join(f"{column:>{width}}" for column, width in zip(columns, widths))]
+    lines += [" ".join(f"{cell:>{width}}" for cell, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Render the reports of a scan as text."""
+    lines = [f"{summary['spans']:,} spans"]
+    for name in REPORTS:
+        if name in summary:
+            lines += ["", f"[{name}]", format_table(summary[name])]
+    return "\n".join(lines)
@@ -0,0 +1,417 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Streaming rollups of columnar span chunks.
+
+Each rollup is fed the chunks of a scan (``add``) and keeps a bounded state:
+
+- ``LatencyRollup``: duration percentiles by group (model, hour, ...), from
+  log-linear histograms with the bucketing of ``telemetry.histogram`` (1%
+  relative error), computed for a whole chunk at a time
+- ``TokenRollup``: calls, errors, input and output tokens and cost by group
+- ``CriticalPathRollup``: time each chain step (span name) spends on the
+  critical path of its trace, the chain of spans the trace duration waits on
+
+Group keys are ``model``, ``provider``, ``name`` (span name) and ``hour``
+(start time, UTC). Spans without a value for a key (e.g. no model) are left
+out of the groups using it.
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from models.factory import estimate_cost, get_available_providers
+from models.tokens import model_family
+
+from .columns import ColumnCategories, SpanColumns
+
+HOUR_NS = 3600 * 10**9
+
+GROUP_KEYS: Dict[str, Callable[[SpanColumns], np.ndarray]] = {
+    "model": lambda columns: columns.model,
+    "provider": lambda columns: columns.provider,
+    "name": lambda columns: columns.name,
+    "hour": lambda columns: columns.start_ns // HOUR_NS,
+}
+
+_CATEGORICAL_KEYS = ("model", "provider", "name")
+
+
+def group_keys(columns: SpanColumns, by: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the spans having a value for every group key, and their keys.
+
+    Returns:
+        The mask of the spans kept, and their keys (one row per span, one column per key)
+    """
+    keys = [GROUP_KEYS[key](columns).astype(np.int64) for key in by]
+    mask = np.ones(len(columns), dtype=bool)
+    for key, values in zip(by, keys):
+        if key in _CATEGORICAL_KEYS:
+            mask &= values >= 0
+    if not keys:
+        return mask, np.zeros((int(mask.sum()), 0), dtype=np.int64)
+    return mask, np.column_stack(keys)[mask]
+
+
+def group_labels(by: Sequence[str], key: Tuple[int, ...], categories: ColumnCategories) -> Dict[str, Any]:
+    """Decode a group key."""
+    labels: Dict[str, Any] = {}
+    for name, code in zip(by, key):
+        if name == "hour":
+            labels[name] = datetime.fromtimestamp(code * 3600, tz=timezone.utc).strftime("%Y-%m-%dT%H:00Z")
+        else:
+            labels[name] = getattr(categories, f"{name}s")[code]
+    return labels
+
+
+def unique_rows(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the distinct key rows, and the row of each key.
+
+    Faster than ``np.unique(keys, axis=0)``: the rows are packed into one
+    integer from the codes of each column first.
+    """
+    if not keys.shape[1]:
+        return np.zeros((min(len(keys), 1), 0), dtype=np.int64), np.zeros(len(keys), dtype=np.int64)
+    columns = [np.unique(column, return_inverse=True) for column in keys.T]
+    shape = [len(values) for values, _ in columns]
+    groups, inverse = np.unique(np.ravel_multi_index([codes for _, codes in columns], shape), return_inverse=True)
+    rows = np.column_stack([values[codes] for (values, _), codes in zip(columns, np.unravel_index(groups, shape))])
+    return rows, inverse
+
+
+def _accumulate(groups: Dict[Tuple[int, ...], np.ndarray], keys: np.ndarray, values: np.ndarray) -> None:
+    """Add the sums of value rows by key into groups."""
+    if not len(keys):
+        return
+    unique, inverse = unique_rows(keys)
+    sums = np.stack([np.bincount(inverse, weights=column, minlength=len(unique)) for column in values.T], axis=1)
+    for key, row in zip(map(tuple, unique.tolist()), sums):
+        if key in groups:
+            groups[key] += row
+        else:
+            groups[key] = row
+
+
+class LatencyRollup:
+    """Duration percentiles of spans by group."""
+
+    def __init__(
+        self,
+        categories: ColumnCategories,
+        by: Sequence[str] = ("model", "hour"),
+        significant_digits: int = 2,
+    ):
+        """Initialize the rollup.
+
+        Args:
+            categories: Categories of the scan
+            by: Group keys
+            significant_digits: Decimal digits of precision of the durations
+        """
+        self.categories = categories
+        self.by = tuple(by)
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._half_count = self._sub_bucket_count // 2
+        # Count of each histogram bucket, and count, sum, min and max of the durations, by group.
+        self._buckets: Dict[Tuple[int, ...], Dict[int, int]] = {}
+        self._stats: Dict[Tuple[int, ...], List[int]] = {}
+
+    def _index(self, values: np.ndarray) -> np.ndarray:
+        shift = np.maximum(np.frexp(values.astype(np.float64))[1] - self._sub_bucket_bits, 0)
+        return np.where(
+            values < self._sub_bucket_count,
+            values,
+            self._sub_bucket_count + (shift - 1) * self._half_count + (values >> shift) - self._half_count,
+        )
+
+    def _high(self, indexes: np.ndarray) -> np.ndarray:
+        shift, offset = np.divmod(np.maximum(indexes - self._sub_bucket_count, 0), self._half_count)
+        shift += 1
+        sub_bucket = offset + self._half_count
+        return np.where(indexes < self._sub_bucket_count, indexes, ((sub_bucket + 1) << shift) - 1)
+
+    def add(self, columns: SpanColumns) -> None:
+        """Record the durations of a chunk, in microseconds."""
+        mask, keys = group_keys(columns, self.by)
+        durations = np.maximum(columns.duration_ns[mask] // 1000, 0)
+        if not len(durations):
+            return
+        unique, inverse = unique_rows(keys)
+        counts = np.bincount(inverse, minlength=len(unique))
+        sums = np.bincount(inverse, weights=durations, minlength=len(unique))
+        minimums = np.full(len(unique), np.iinfo(np.int64).max)
+        maximums = np.zeros(len(unique), dtype=np.int64)
+        np.minimum.at(minimums, inverse, durations)
+        np.maximum.at(maximums, inverse, durations)
+        for group, key in enumerate(map(tuple, unique.tolist())):
+            stats = self._stats.setdefault(key, [0, 0, int(minimums[group]), 0])
+            stats[0] += int(counts[group])
+            stats[1] += int(sums[group])
+            stats[2] = min(stats[2], int(minimums[group]))
+            stats[3] = max(stats[3], int(maximums[group]))
+
+        # Bucket indexes of 64-bit values stay under 2**16 (with up to 5 significant digits, 2**24).
+        pairs, pair_counts = np.unique((inverse << 32) | self._index(durations), return_counts=True)
+        keys_of_groups = unique.tolist()
+        for pair, count in zip(pairs.tolist(), pair_counts.tolist()):
+            group, index = pair >> 32, pair & 0xFFFFFFFF
+            buckets = self._buckets.setdefault(tuple(keys_of_groups[group]), {})
+            buckets[index] = buckets.get(index, 0) + count
+
+    def rows(self, percentiles: Sequence[float] = (50, 95, 99)) -> List[Dict[str, Any]]:
+        """Get the count, mean, maximum and percentiles of each group, in milliseconds."""
+        rows = []
+        for key in sorted(self._stats):
+            count, total, _, maximum = self._stats[key]
+            indexes = np.array(sorted(self._buckets[key]))
+            cumulative = np.cumsum([self._buckets[key][index] for index in indexes])
+            ranks = np.maximum(1, np.ceil(np.array(percentiles, dtype=float) / 100 * count))
+            values = np.minimum(self._high(indexes[np.searchsorted(cumulative, ranks)]), maximum)
+            row = group_labels(self.by, key, self.categories)
+            row.update({"count": count, "mean_ms": total / count / 1000, "max_ms": maximum / 1000})
+            row.update({f"p{percentile:g}_ms": value / 1000 for percentile, value in zip(percentiles, values.tolist())})
+            rows.append(row)
+        return rows
+
+
+# Token counts (input, output, cache read, cache write) giving the price of one token of each kind.
+_PRICED_TOKENS = ((1, 0, 0, 0), (0, 1, 0, 0), (1, 0, 1, 0), (1, 0, 0, 1))
+
+
+class TokenRollup:
+    """Calls, errors, tokens and cost of LLM spans (spans with a ``gen_ai.system``) by group.
+
+    Input tokens include the prompt cache read and write tokens, billed at
+    their own price when the provider has one.
+    """
+
+    def __init__(self, categories: ColumnCategories, by: Sequence[str] = ("model",)):
+        """Initialize the rollup.
+
+        Args:
+            categories: Categories of the scan
+            by: Group keys
+        """
+        self.categories = categories
+        self.by = tuple(by)
+        self._groups: Dict[Tuple[int, ...], np.ndarray] = {}
+        # USD price per token (input, output, cache read, cache write) by (provider, model) codes, NaN when unknown.
+        self._prices: Dict[Tuple[int, int], Tuple[float, ...]] = {}
+
+    def _price(self, provider: Optional[str], model: Optional[str]) -> Tuple[float, ...]:
+        unknown = (math.nan,) * len(_PRICED_TOKENS)
+        if model is None:
+            return unknown
+        available = get_available_providers()
+        for candidate in (provider.lower() if provider else None, model_family(model), model):
+            if candidate in available:
+                # Cache tokens are part of the input tokens: price one of each.
+                prices = [estimate_cost(candidate, model, *tokens) for tokens in _PRICED_TOKENS]
+                if None not in prices:
+                    return tuple(prices)
+        return unknown
+
+    def _costs(self, columns: SpanColumns) -> np.ndarray:
+        pairs, inverse = unique_rows(np.column_stack([columns.provider, columns.model]))
+        prices = np.empty((len(pairs), len(_PRICED_TOKENS)))
+        for row, (provider, model) in enumerate(map(tuple, pairs.tolist())):
+            if (provider, model) not in self._prices:
+                self._prices[provider, model] = self._price(
+                    self.categories.providers[provider], self.categories.models[model]
+                )
+            prices[row] = self._prices[provider, model]
+        prices = prices[inverse]
+        uncached = columns.input_tokens - columns.cache_read_tokens - columns.cache_write_tokens
+        return (
+            uncached * prices[:, 0]
+            + columns.output_tokens * prices[:, 1]
+            + columns.cache_read_tokens * prices[:, 2]
+            + columns.cache_write_tokens * prices[:, 3]
+        )
+
+    def add(self, columns: SpanColumns) -> None:
+        """Total the LLM spans of a chunk."""
+        columns = columns.take(columns.provider >= 0)
+        if not len(columns):
+            return
+        mask, keys = group_keys(columns, self.by)
+        columns = columns.take(mask)
+        values = np.column_stack(
+            [
+                np.ones(len(columns)),
+                columns.error,
+                columns.input_tokens,
+                columns.output_tokens,
+                columns.cache_read_tokens,
+                columns.cache_write_tokens,
+                self._costs(columns),
+            ]
+        )
+        _accumulate(self._groups, keys, values)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Get the totals of each group; the cost is None when a price is unknown."""
+        rows = []
+        for key in sorted(self._groups):
+            calls, errors, input_tokens, output_tokens, cache_read, cache_write, cost = self._groups[key].tolist()
+            row = group_labels(self.by, key, self.categories)
+            row.update(
+                {
+                    "calls": int(calls),
+                    "errors": int(errors),
+                    "input_tokens": int(input_tokens),
+                    "output_tokens": int(output_tokens),
+                    "cache_read_tokens": int(cache_read),
+                    "cache_write_tokens": int(cache_write),
+                    "cost_usd": None if math.isnan(cost) else cost,
+                }
+            )
+            rows.append(row)
+        return rows
+
+
+class CriticalPathRollup:
+    """Time of each chain step on the critical path of its traces.
+
+    Spans are kept until the root span of their trace is read (exporters send
+    children before their parent), then the trace is walked from its root:
+    the child ending last is on the path, then the child ending last before
+    that child started, and so on; the parent is on the path between them.
+    Traces still incomplete at the end of the scan (e.g. continuing a remote
+    parent) are walked from their spans without a parent in the trace.
+
+    Spans read after their trace was walked (e.g. exported later by another
+    process, or from another file) count in the spans and time of their step,
+    but not in its critical path time, and do not count as another trace.
+    """
+
+    def __init__(self, categories: ColumnCategories, max_pending: int = 1_000_000, max_walked: int = 1_000_000):
+        """Initialize the rollup.
+
+        Args:
+            categories: Categories of the scan
+            max_pending: Spans of incomplete traces kept before walking them anyway
+            max_walked: Walked trace IDs remembered to recognize their late spans (up to twice as many are kept)
+        """
+        self.categories = categories
+        self.max_pending = max_pending
+        self.max_walked = max_walked
+        self.traces = 0
+        self.trace_ns = 0
+        # Spans, duration sum and critical path time sum by span name code.
+        self._steps = np.zeros((0, 3))
+        self._pending: Optional[SpanColumns] = None
+        # IDs of the walked traces, the older ones in the previous generation.
+        self._walked: Set[int] = set()
+        self._walked_previous: Set[int] = set()
+
+    def add(self, columns: SpanColumns) -> None:
+        """Walk the traces completed by a chunk."""
+        if self._pending is not None:
+            columns = SpanColumns.concatenate([self._pending, columns])
+        complete = np.isin(columns.trace_id, columns.trace_id[columns.parent_id == 0])
+        self._walk(columns.take(complete))
+        self._pending = None
+        if complete.all():
+            return
+        pending = columns.take(~complete)
+        late = np.array(
+            [trace_id in self._walked or trace_id in self._walked_previous for trace_id in pending.trace_id.tolist()],
+            dtype=bool,
+        )
+        if late.any():
+            self._count(pending.take(late), np.zeros(int(late.sum()), dtype=np.int64))
+            pending = pending.take(~late)
+        if len(pending):
+            self._pending = pending
+            if len(pending) > self.max_pending:
+                self.finish()
+
+    def finish(self) -> None:
+        """Walk the incomplete traces."""
+        if self._pending is not None:
+            self._walk(self._pending)
+            self._pending = None
+
+    def _walk(self, columns: SpanColumns) -> None:
+        if not len(columns):
+            return
+        # By trace, latest end first: children lists are in walking order.
+        order = np.lexsort((-columns.end_ns, columns.trace_id))
+        columns = columns.take(order)
+        critical = np.zeros(len(columns), dtype=np.int64)
+        bounds = np.flatnonzero(np.diff(columns.trace_id)) + 1
+        span_ids, parent_ids = columns.span_id.tolist(), columns.parent_id.tolist()
+        starts, ends = columns.start_ns.tolist(), columns.end_ns.tolist()
+        for first, last in zip(np.concatenate([[0], bounds]).tolist(), np.append(bounds, len(columns)).tolist()):
+            index = {span_ids[position]: position for position in range(first, last)}
+            children: Dict[int, List[int]] = {}
+            roots = []
+            for position in range(first, last):
+                parent = index.get(parent_ids[position])
+                if parent is None or parent == position:
+                    roots.append(position)
+                else:
+                    children.setdefault(parent, []).append(position)
+            for root in roots:
+                self._path(root, ends[root], children, starts, ends, critical)
+                self.trace_ns += ends[root] - starts[root]
+            self.traces += 1
+
+        if len(self._walked) >= self.max_walked:
+            self._walked_previous, self._walked = self._walked, set()
+        self._walked.update(columns.trace_id[np.concatenate([[0], bounds])].tolist())
+        self._count(columns, critical)
+
+    def _count(self, columns: SpanColumns, critical: np.ndarray) -> None:
+        steps = int(columns.name.max()) + 1
+        if steps > len(self._steps):
+            self._steps = np.vstack([self._steps, np.zeros((steps - len(self._steps), 3))])
+        self._steps[:steps, 0] += np.bincount(columns.name, minlength=steps)
+        self._steps[:steps, 1] += np.bincount(columns.name, weights=columns.duration_ns, minlength=steps)
+        self._steps[:steps, 2] += np.bincount(columns.name, weights=critical, minlength=steps)
+
+    @staticmethod
+    def _path(
+        span: int,
+        limit: int,
+        children: Dict[int, List[int]],
+        starts: List[int],
+        ends: List[int],
+        critical: np.ndarray,
+    ) -> None:
+        stack = [(span, limit)]
+        while stack:
+            span, limit = stack.pop()
+            cursor = min(ends[span], limit)
+            for child in children.get(span, ()):
+                child_end = min(ends[child], cursor)
+                if starts[child] >= cursor or child_end <= starts[span]:
+                    continue
+                critical[span] += cursor - child_end
+                stack.append((child, child_end))
+                cursor = max(starts[child], starts[span])
+            critical[span] += max(0, cursor - starts[span])
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Get the span count, total and critical path time of each step, longest on the path first."""
+        self.finish()
+        rows = []
+        for code in np.argsort(-self._steps[:, 2], kind="stable").tolist():
+            spans, duration, critical = self._steps[code].tolist()
+            if not spans:
+                continue
+            rows.append(
+                {
+                    "name": self.categories.names[code],
+                    "spans": int(spans),
+                    "total_ms": duration / 1e6,
+                    "critical_ms": critical / 1e6,
+                    "critical_share": critical / self.trace_ns if self.trace_ns else 0.0,
+                }
+            )
+        return rows
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark offline trace analytics.
+
+Synthetic traces with the shape of the core.chain workflow (three models, over
+several hours) are written to a local trace store. The p50/p95/p99 latency by
+model and hour is computed with a Python loop recording each span in a
+telemetry.histogram per group, then with analytics.rollups on columnar chunks.
+The whole file is then read into a list of spans, then streamed through the
+latency, token and critical path rollups, to compare their peak memory.
+
+Usage:
+    python -m benchmarks.analytics --traces 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from dataclasses import asdict
+
+from analytics.columns import DEFAULT_CHUNK_SIZE, ColumnCategories, scan, to_columns
+from analytics.report import analyze
+from analytics.rollups import HOUR_NS, LatencyRollup
+from telemetry.histogram import Histogram
+from telemetry.store import SpanRecord, read_spans
+
+from .utils import HEADER, measure
+
+# (provider, model) of the workflows.
+MODELS = (("openai", "gpt-4o-mini"), ("anthropic", "claude-3-haiku-20240307"), ("openai", "gpt-4o"))
+
+# Steps of a workflow: (name, parent step index, LLM call).
+STEPS = (
+    ("RunnableSequence.workflow", None, False),
+    ("RunnableAssign<joke>.task", 0, False),
+    ("ChatPromptTemplate.task", 1, False),
+    ("ChatOpenAI.chat", 1, True),
+    ("StrOutputParser.task", 1, False),
+    ("RunnableAssign<text>.task", 0, False),
+    ("ChatPromptTemplate.task", 5, False),
+    ("ChatOpenAI.chat", 5, True),
+    ("StrOutputParser.task", 5, False),
+)
+
+
+def make_traces(traces: int, hours: int = 6, seed: int = 0) -> list:
+    """Create the spans of workflow traces, children before their parent."""
+    rng = random.Random(seed)
+    spans = []
+    for trace in range(traces):
+        trace_id = f"{rng.getrandbits(128):032x}"
+        span_ids = [f"{rng.getrandbits(64):016x}" for _ in STEPS]
+        start = 1_700_000_000 * 10**9 + rng.randrange(hours * HOUR_NS)
+        provider, model = MODELS[trace % len(MODELS)]
+        bounds = [(start, start)] * len(STEPS)
+        cursor = start
+        for assign, children in ((1, (2, 3, 4)), (5, (6, 7, 8))):
+            assign_start = cursor
+            for index in children:
+                duration = int(rng.lognormvariate(19.5, 0.5)) if STEPS[index][2] else rng.randrange(100_000, 400_000)
+                bounds[index] = (cursor, cursor + duration)
+                cursor += duration + 10_000
+            bounds[assign] = (assign_start, cursor)
+            cursor += 10_000
+        bounds[0] = (start, cursor)
+        for index in (2, 3, 4, 1, 6, 7, 8, 5, 0):
+            name, parent, llm = STEPS[index]
+            attributes = {}
+            if llm:
+                attributes = {
+                    "gen_ai.system": provider,
+                    "gen_ai.request.model": model,
+                    "gen_ai.usage.input_tokens": rng.randrange(20, 400),
+                    "gen_ai.usage.output_tokens": rng.randrange(10, 200),
+                }
+            spans.append(
+                SpanRecord(
+                    trace_id=trace_id,
+                    span_id=span_ids[index],
+                    name=name,
+                    start_ns=bounds[index][0],
+                    end_ns=bounds[index][1],
+                    parent_span_id=span_ids[parent] if parent is not None else None,
+                    attributes=attributes,
+                )
+            )
+    return spans
+
+
+def python_latency(spans: list) -> dict:
+    """Compute latency percentiles by model and hour with a loop over spans."""
+    histograms = {}
+    for span in spans:
+        model = span.attributes.get("gen_ai.request.model")
+        if model is None:
+            continue
+        histograms.setdefault((model, span.start_ns // HOUR_NS), Histogram()).record(span.duration_ns // 1000)
+    return {key: [histogram.percentile(p) for p in (50, 95, 99)] for key, histogram in histograms.items()}
+
+
+def columnar_latency(chunks: list, categories: ColumnCategories) -> list:
+    """Compute latency percentiles by model and hour with the columnar rollup."""
+    rollup = LatencyRollup(categories, ("model", "hour"))
+    for columns in chunks:
+        rollup.add(columns)
+    return rollup.rows()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traces", type=int, default=20000, help="Synthetic workflow traces")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Spans per columnar chunk")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs of each benchmark")
+    args = parser.parse_args()
+
+    spans = make_traces(args.traces)
+    categories = ColumnCategories()
+    chunks = [
+        to_columns(spans[start : start + args.chunk_size], categories)
+        for start in range(0, len(spans), args.chunk_size)
+    ]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as store:
+        for span in spans:
+            store.write(json.dumps(asdict(span)) + "\n")
+    try:
+        print(f"{len(spans):,} spans, {os.path.getsize(store.name) / 2**20:.1f} MiB trace store")
+        print(HEADER)
+        for name, fn in (
+            ("latency: python loop", lambda: python_latency(spans)),
+            ("latency: columnar", lambda: columnar_latency(chunks, categories)),
+            ("load: spans list", lambda: list(read_spans(store.name))),
+            ("scan: columnar chunks", lambda: sum(len(columns) for columns in scan([store.name], ColumnCategories()))),
+            ("scan: all rollups", lambda: analyze([store.name], chunk_size=args.chunk_size)),
+        ):
+            print(measure(name, fn, iterations=args.iterations, warmup=1).row())
+    finally:
+        os.unlink(store.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark prompt construction and workflow reuse in core.chain.
+
+Usage:
+    python -m benchmarks.chain --iterations 2000
+"""
+
+import argparse
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from core import chain
+from models.llm import create_test_messages
+
+from .utils import HEADER, measure
+
+
+def _rebuild_and_invoke(llm):
+    # Mirrors the previous behaviour: templates and chains built on every call.
+    joke_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", "You are a funny sarcastic nerd."),
+            ("human", "{prompt}"),
+        ]
+    )
+    translate_prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", "You are an Elf."),
+            ("human", "Translate the joke below into Sindarin language:\n{joke}"),
+        ]
+    )
+    return chain.compose_workflow(llm, joke_prompt, translate_prompt).invoke({"subject": "OpenTelemetry"})
+
+
+def _cached_invoke(llm):
+    return chain.build_workflow(llm).invoke({"subject": "OpenTelemetry"})
+
+
+def _legacy_test_messages():
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [
+        SystemMessage(content="You are a helpful assistant!"),
+        HumanMessage(content="What is the capital of France?"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1000, help="Timed invocations per benchmark")
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=["Why do spans never get lost? They always follow the trace."])
+
+    print(HEADER)
+    for measurement in (
+        measure("workflow: rebuild per call", lambda: _rebuild_and_invoke(llm), args.iterations),
+        measure("workflow: built once", lambda: _cached_invoke(llm), args.iterations),
+        measure("test messages: rebuild", _legacy_test_messages, args.iterations * 10),
+        measure("test messages: shared", create_test_messages, args.iterations * 10),
+    ):
+        print(measurement.row())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark OTLP span export throughput over HTTP and gRPC.
+
+Requires a local collector, e.g. ``docker compose up otel-collector``.
+
+Usage:
+    python -m benchmarks.exporters --spans 20000 --batch-size 512
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from opentelemetry.exporter.otlp.proto.grpc import trace_exporter as trace_exporter_grpc
+from opentelemetry.exporter.otlp.proto.http import trace_exporter as trace_exporter_http
+from opentelemetry.sdk import trace as sdk_trace
+from opentelemetry.sdk.trace import export as trace_export
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from telemetry.transport import GrpcTransportConfig, create_grpc_exporter
+
+
+def make_spans(count: int, payload_size: int) -> List[sdk_trace.ReadableSpan]:
+    """Create finished spans shaped like LangChain LLM spans."""
+    memory = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(trace_export.SimpleSpanProcessor(memory))
+    tracer = provider.get_tracer(__name__)
+    prompt = ("lorem ipsum dolor sit amet " * (payload_size // 27 + 1))[:payload_size]
+    for index in range(count):
+        with tracer.start_as_current_span("ChatAnthropic.chat") as span:
+            span.set_attribute("gen_ai.system", "Anthropic")
+            span.set_attribute("gen_ai.request.model", "claude-3-haiku-20240307")
+            span.set_attribute("gen_ai.prompt.0.content", prompt)
+            span.set_attribute("gen_ai.completion.0.content", f"answer {index}")
+            span.set_attribute("gen_ai.usage.input_tokens", payload_size // 4)
+    return list(memory.get_finished_spans())
+
+
+def run(name: str, exporter_factory: Callable[[], trace_export.SpanExporter], spans, batch_size: int, reuse: bool):
+    """Export all spans in batches and print throughput and batch latency."""
+    exporter = exporter_factory()
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for offset in range(0, len(spans), batch_size):
+        if not reuse and offset:
+            previous, exporter = exporter, exporter_factory()
+            previous.shutdown()
+        batch_start = time.perf_counter()
+        if exporter.export(spans[offset : offset + batch_size]) != trace_export.SpanExportResult.SUCCESS:
+            failures += 1
+        latencies.append((time.perf_counter() - batch_start) * 1000)
+    elapsed = time.perf_counter() - start
+    exporter.shutdown()
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    print(f"{name:<36} {len(spans) / elapsed:>12.0f} {statistics.median(latencies):>10.2f} {p99:>10.2f} {failures:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grpc-endpoint", default="http://localhost:4317")
+    parser.add_argument("--http-endpoint", default="http://localhost:4318")
+    parser.add_argument("--spans", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--payload-size", type=int, default=2048, help="Prompt attribute size in bytes")
+    args = parser.parse_args()
+
+    spans = make_spans(args.spans, args.payload_size)
+    traces_endpoint = f"{args.http_endpoint}/v1/traces"
+
+    def http(compression):
+        return lambda: trace_exporter_http.OTLPSpanExporter(endpoint=traces_endpoint, compression=compression)
+
+    def grpc(compression):
+        config = GrpcTransportConfig(endpoint=args.grpc_endpoint, insecure=True, compression=compression)
+        return lambda: create_grpc_exporter(trace_exporter_grpc.OTLPSpanExporter, config)
+
+    def grpc_private_channel():
+        return trace_exporter_grpc.OTLPSpanExporter(endpoint=args.grpc_endpoint, insecure=True)
+
+    print(f"{'exporter':<36} {'spans/s':>12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'failed':>8}")
+    run("http/protobuf", http(trace_exporter_http.Compression.NoCompression), spans, args.batch_size, True)
+    run("http/protobuf gzip", http(trace_exporter_http.Compression.Gzip), spans, args.batch_size, True)
+    run("grpc", grpc("none"), spans, args.batch_size, True)
+    run("grpc gzip", grpc("gzip"), spans, args.batch_size, True)
+    run("grpc exporter per batch, own channel", grpc_private_channel, spans, args.batch_size, False)
+    run("grpc exporter per batch, shared", grpc("none"), spans, args.batch_size, False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark the overhead of the profiling span processor on core.chain.
+
+The workflow runs instrumented with a discarding exporter, without profiling,
+then with a sample of the traces profiled, all of them, and all of them with
+memory tracing.
+
+Usage:
+    python -m benchmarks.profiling --iterations 500
+"""
+
+import argparse
+from typing import Optional, Sequence
+
+from langchain_core.language_models import FakeListChatModel
+from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from core import chain
+from telemetry.profiling import ProfilingSpanProcessor
+
+from .utils import HEADER, measure
+
+
+class _DiscardingExporter(SpanExporter):
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        return SpanExportResult.SUCCESS
+
+
+def _run(name: str, llm, iterations: int, ratio: Optional[float] = None, memory: bool = False):
+    processor = BatchSpanProcessor(_DiscardingExporter())
+    if ratio is not None:
+        processor = ProfilingSpanProcessor(processor, ratio, memory=memory)
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(processor)
+    instrumentor = LangchainInstrumentor()
+    instrumentor.instrument(tracer_provider=tracer_provider)
+    try:
+        workflow = chain.build_workflow(llm)
+        return measure(name, lambda: workflow.invoke({"subject": "OpenTelemetry"}), iterations)
+    finally:
+        instrumentor.uninstrument()
+        tracer_provider.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500, help="Timed invocations per benchmark")
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=["Why do spans never get lost? They always follow the trace."])
+
+    print(HEADER)
+    for measurement in (
+        _run("profiling: off", llm, args.iterations),
+        _run("profiling: 1% of traces", llm, args.iterations, 0.01),
+        _run("profiling: all traces", llm, args.iterations, 1.0),
+        _run("profiling: all, with memory", llm, args.iterations, 1.0, memory=True),
+    ):
+        print(measurement.row())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark provider-side prompt caching on a repeated system prompt.
+
+The Anthropic and OpenAI models are run against the local stub API, which
+prefills uncached input tokens at a fixed latency per token and emulates the
+prompt cache of each provider, without then with ``prompt_cache``. Each
+request streams an answer to a new question sharing a long system prompt;
+the question comes before the instructions, as in a template mixing variable
+and static content. The time to first token (TTFT), the cache read and write
+tokens and the cost of the requests are reported.
+
+Usage:
+    python -m benchmarks.prompt_cache --requests 20 --prefix-words 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from models.anthropic import create_anthropic_llm
+from models.factory import estimate_cost
+from models.openai import create_openai_llm
+from models.prompt_cache import cache_usage
+from models.stub import StubServer
+
+MODELS = (("anthropic", "claude-3-haiku-20240307"), ("openai", "gpt-4o-mini"))
+
+ANSWER = "Rule 1 says to answer in a friendly tone."
+
+
+def system_prompt(words: int) -> str:
+    """Create a static system prompt of about ``words`` tokens."""
+    rules = [f"Rule {index}: answer in a friendly tone." for index in range(words // 7 + 1)]
+    return " ".join(" ".join(rules).split()[:words])
+
+
+def create_llm(stub: StubServer, provider: str, model: str, prompt_cache: bool):
+    """Create a chat model of a provider calling the stub API."""
+    if provider == "anthropic":
+        return create_anthropic_llm(model, prompt_cache=prompt_cache, base_url=stub.url, api_key="stub")
+    return create_openai_llm(
+        model, api_key="stub", prompt_cache=prompt_cache, base_url=f"{stub.url}/v1", stream_usage=True
+    )
+
+
+def run(llm, provider: str, model: str, prompt: str, requests: int) -> dict:
+    """Stream answers to new questions, timing their first token and totaling their usage."""
+    ttfts, cost = [], 0.0
+    read = write = 0
+    for index in range(requests):
+        messages = [HumanMessage(content=f"Question {index}: what is rule {index}?"), SystemMessage(content=prompt)]
+        start = time.perf_counter()
+        ttft, message = None, None
+        for chunk in llm.stream(messages):
+            if ttft is None and chunk.content:
+                ttft = (time.perf_counter() - start) * 1000
+            message = chunk if message is None else message + chunk
+        ttfts.append(ttft)
+        usage = message.usage_metadata
+        chunk_read, chunk_write = cache_usage(usage)
+        read, write = read + chunk_read, write + chunk_write
+        cost += estimate_cost(provider, model, usage["input_tokens"], usage["output_tokens"], chunk_read, chunk_write)
+    return {"ttfts": ttfts, "cache_read": read, "cache_write": write, "cost": cost}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per model and mode")
+    parser.add_argument("--prefix-words", type=int, default=2000, help="Tokens of the system prompt")
+    parser.add_argument("--prefill-latency", type=float, default=0.00005, help="Seconds per uncached input token")
+    args = parser.parse_args()
+
+    prompt = system_prompt(args.prefix_words)
+    print(
+        f"{'model':<40} {'calls':>6} {'first (ms)':>11} {'p50 (ms)':>9} "
+        f"{'cache read':>11} {'cache write':>12} {'cost (USD)':>11}"
+    )
+    # The same answer to every question, so that the costs only differ by their input.
+    with StubServer(responder=lambda messages: ANSWER, prefill_latency=args.prefill_latency) as stub:
+        for provider, model in MODELS:
+            for prompt_cache in (False, True):
+                llm = create_llm(stub, provider, model, prompt_cache)
+                result = run(llm, provider, model, prompt, args.requests)
+                ttfts = result["ttfts"]
+                name = f"{model} ({'cached' if prompt_cache else 'uncached'})"
+                print(
+                    f"{name:<40} {len(ttfts):>6} {ttfts[0]:>11.1f} {statistics.median(ttfts):>9.1f} "
+                    f"{result['cache_read']:>11,} {result['cache_write']:>12,} {result['cost']:>11.5f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
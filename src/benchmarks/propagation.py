@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark the overhead of trace context propagation.
+
+Usage:
+    python -m benchmarks.propagation --iterations 20000
+"""
+
+import argparse
+
+from opentelemetry import baggage, trace
+from opentelemetry import context as otel_context
+from opentelemetry.sdk import trace as sdk_trace
+
+from telemetry import propagation
+
+from .utils import HEADER, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10_000, help="Timed invocations per benchmark")
+    args = parser.parse_args()
+
+    tracer = sdk_trace.TracerProvider().get_tracer(__name__)
+    payload = {"subject": "OpenTelemetry", "prompt": "Tell me a joke about OpenTelemetry."}
+
+    with tracer.start_as_current_span("producer"):
+        token = otel_context.attach(baggage.set_baggage("tenant", "lab"))
+        headers = propagation.inject_headers()
+        message = propagation.inject_into_payload(payload)
+        otel_context.detach(token)
+
+    def plain_span():
+        with tracer.start_as_current_span("consumer", kind=trace.SpanKind.CONSUMER):
+            pass
+
+    def consume_message():
+        with propagation.consume(message, "consumer", tracer=tracer):
+            pass
+
+    print(HEADER)
+    with tracer.start_as_current_span("producer"):
+        for measurement in (
+            measure("inject headers", propagation.inject_headers, args.iterations),
+            measure("extract headers", lambda: propagation.extract_context(headers), args.iterations),
+            measure("inject payload", lambda: propagation.inject_into_payload(payload), args.iterations),
+            measure("extract payload", lambda: propagation.extract_from_payload(message), args.iterations),
+            measure("span, no propagation", plain_span, args.iterations),
+            measure("span from message", consume_message, args.iterations),
+        ):
+            print(measurement.row())
+
+
+if __name__ == "__main__":
+    main()
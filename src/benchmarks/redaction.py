@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark span PII redaction throughput.
+
+Batches of LLM spans (a shared system prompt, a unique user message and a
+unique completion, with some PII) are redacted with one regular expression per
+pattern, then with telemetry.redaction (pre-checks and a combined expression),
+without and with memoization.
+
+Usage:
+    python -m benchmarks.redaction --iterations 20
+"""
+
+import argparse
+import random
+import re
+
+from opentelemetry.sdk.trace import ReadableSpan
+
+from telemetry.redaction import PATTERNS, PHONE_DIGITS, RedactingSpanExporter, Redactor
+
+from .utils import measure
+
+SYSTEM_PROMPT = (
+    "You are a support assistant for ACME. Escalate to support@acme.example or +1 415 555 0100 when needed. " * 20
+)
+
+WORDS = "the span trace export latency model token prompt completion budget collector batch queue".split()
+
+
+def _text(rng: random.Random, words: int, pii: str) -> str:
+    return (
+        " ".join(rng.choice(WORDS) for _ in range(words)) + f" {pii} " + " ".join(rng.choice(WORDS) for _ in range(8))
+    )
+
+
+def make_spans(count: int, seed: int = 0):
+    """Create LLM spans with realistic prompt attributes."""
+    rng = random.Random(seed)
+    pii = ["jane.doe@example.com", "sk-ant-api03-" + "x" * 40, "+33 6 12 34 56 78", "no secret here"]
+    return [
+        ReadableSpan(
+            name="ChatAnthropic.chat",
+            attributes={
+                "gen_ai.prompt.0.role": "system",
+                "gen_ai.prompt.0.content": SYSTEM_PROMPT,
+                "gen_ai.prompt.1.role": "user",
+                "gen_ai.prompt.1.content": _text(rng, 60, rng.choice(pii)),
+                "gen_ai.completion.0.content": _text(rng, 150, rng.choice(pii)),
+                "gen_ai.request.model": "claude-3-haiku-20240307",
+            },
+        )
+        for _ in range(count)
+    ]
+
+
+def naive_redact(spans, patterns):
+    """Redact every string value with one pass per pattern."""
+
+    def replace(kind):
+        def _replace(match):
+            if kind == "phone":
+                digits = sum(character.isdigit() for character in match.group())
+                if not PHONE_DIGITS[0] <= digits <= PHONE_DIGITS[1]:
+                    return match.group()
+            return f"[REDACTED:{kind}]"
+
+        return _replace
+
+    redacted = []
+    for span in spans:
+        attributes = {}
+        for key, value in span.attributes.items():
+            if isinstance(value, str):
+                for kind, pattern in patterns:
+                    value = pattern.sub(replace(kind), value)
+            attributes[key] = value
+        redacted.append(attributes)
+    return redacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="Timed batches per benchmark")
+    parser.add_argument("--batch-size", type=int, default=512, help="Spans per batch")
+    args = parser.parse_args()
+
+    spans = make_spans(args.batch_size)
+    megabytes = sum(len(value) for span in spans for value in span.attributes.values() if isinstance(value, str)) / 1e6
+    patterns = [(kind, re.compile(pattern.regex)) for kind, pattern in PATTERNS.items()]
+    uncached = RedactingSpanExporter(None, Redactor(cache_size=0))
+    cached = RedactingSpanExporter(None, Redactor())
+
+    print(f"{'benchmark':<32} {'batches':>8} {'ms/batch':>10} {'MB/s':>10}")
+    for measurement in (
+        measure("naive: regex per pattern", lambda: naive_redact(spans, patterns), args.iterations, warmup=1),
+        measure(
+            "pre-checks, combined regex",
+            lambda: [uncached.redact_span(span) for span in spans],
+            args.iterations,
+            warmup=1,
+        ),
+        measure(
+            "pre-checks, combined, memoized", lambda: [cached.redact_span(span) for span in spans], args.iterations
+        ),
+    ):
+        print(
+            f"{measurement.name:<32} {measurement.iterations:>8} {measurement.wall_us / 1000:>10.2f} "
+            f"{megabytes / (measurement.wall_us / 1e6):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark exported span volume of the core.chain workflow.
+
+The joke/translation workflow runs against the mock LLM, traced by the
+LangChain instrumentation, and its spans are encoded as OTLP protobuf batches
+(raw and gzip, as the HTTP exporter sends them): every span, then with the
+low-value steps collapsed into their parent, then with repeated long values
+deduplicated within each batch too.
+
+Usage:
+    python -m benchmarks.reduction --requests 200
+"""
+
+import argparse
+import gzip
+
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from core.chain import build_workflow
+from models.factory import create_llm
+from telemetry.reduction import CollapsingSpanProcessor, DeduplicatingSpanExporter
+
+SUBJECTS = ("OpenTelemetry", "observability", "tracing", "Python")
+
+
+def run(requests: int) -> tuple:
+    """Run the workflow and get all its spans, and the spans left after collapsing."""
+    exporter = InMemorySpanExporter()
+    collapsed_exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer_provider.add_span_processor(CollapsingSpanProcessor(SimpleSpanProcessor(collapsed_exporter)))
+    LangchainInstrumentor().instrument(tracer_provider=tracer_provider)
+    try:
+        workflow = build_workflow(create_llm("mock"))
+        for index in range(requests):
+            workflow.invoke({"subject": SUBJECTS[index % len(SUBJECTS)]})
+    finally:
+        LangchainInstrumentor().uninstrument()
+    return list(exporter.get_finished_spans()), list(collapsed_exporter.get_finished_spans())
+
+
+def encoded_sizes(spans: list, batch_size: int) -> tuple:
+    """Get the raw and gzip bytes of the spans, in OTLP export batches."""
+    raw = compressed = 0
+    for start in range(0, len(spans), batch_size):
+        payload = encode_spans(spans[start : start + batch_size]).SerializeToString()
+        raw += len(payload)
+        compressed += len(gzip.compress(payload))
+    return raw, compressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="Workflow invocations")
+    parser.add_argument("--batch-size", type=int, default=512, help="Spans per export batch")
+    parser.add_argument("--dedup-min-length", type=int, default=32, help="Shortest value deduplicated")
+    args = parser.parse_args()
+
+    spans, collapsed = run(args.requests)
+    deduplicator = DeduplicatingSpanExporter(None, args.dedup_min_length)
+    deduplicated = [
+        span
+        for start in range(0, len(collapsed), args.batch_size)
+        for span in deduplicator.deduplicate(collapsed[start : start + args.batch_size])
+    ]
+
+    print(f"{'pipeline':<32} {'spans':>8} {'bytes/req':>12} {'gzip/req':>12}")
+    for name, variant in (("all spans", spans), ("collapsed", collapsed), ("collapsed, deduplicated", deduplicated)):
+        raw, compressed = encoded_sizes(variant, args.batch_size)
+        print(f"{name:<32} {len(variant):>8} {raw / args.requests:>12.0f} {compressed / args.requests:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark embedding requests and vector search.
+
+Embedding: a corpus with repeated texts is embedded by the mock embeddings,
+which sleep per request like an API, one request per text, then through
+models.embeddings in batches, then again from the content-hash cache.
+
+Search: the top k documents of a query are found with a Python loop over the
+vectors, then with models.vectorstore (one matrix product and argpartition).
+
+Usage:
+    python -m benchmarks.retrieval --documents 20000
+"""
+
+import argparse
+import heapq
+import math
+import random
+
+import numpy as np
+
+from models.embeddings import CachedEmbeddings
+from models.mock import HashEmbeddings
+from models.vectorstore import VectorIndex
+
+from .utils import HEADER, measure
+
+WORDS = "the span trace export latency model token prompt completion budget collector batch queue".split()
+
+
+def make_corpus(count: int, distinct: int, seed: int = 0) -> list:
+    """Create texts, drawn from a smaller set of distinct texts."""
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choice(WORDS) for _ in range(12)) + f" #{index}" for index in range(distinct)]
+    return [rng.choice(texts) for _ in range(count)]
+
+
+def naive_search(vectors: list, query: list, k: int) -> list:
+    """Get the indexes of the k most similar vectors with a Python loop."""
+    query_norm = math.sqrt(sum(value * value for value in query))
+
+    def cosine(vector):
+        norm = math.sqrt(sum(value * value for value in vector))
+        return sum(a * b for a, b in zip(vector, query)) / (norm * query_norm or 1)
+
+    return heapq.nlargest(k, range(len(vectors)), key=lambda index: cosine(vectors[index]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=200, help="Texts embedded per call")
+    parser.add_argument("--distinct", type=int, default=50, help="Distinct texts among them")
+    parser.add_argument("--latency", type=float, default=0.002, help="Mock embeddings seconds per request")
+    parser.add_argument("--documents", type=int, default=20_000, help="Vectors in the index")
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    model = HashEmbeddings(latency=args.latency)
+    texts = make_corpus(args.texts, args.distinct)
+
+    def batched_uncached():
+        CachedEmbeddings(model, "mock", batch_size=64).embed_array(texts)
+
+    cached = CachedEmbeddings(model, "mock", batch_size=64)
+    cached.embed_array(texts)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.documents, model.size), dtype=np.float32)
+    index = VectorIndex()
+    index.add([str(row) for row in range(args.documents)], vectors)
+    rows = vectors.tolist()
+    query = rng.standard_normal(model.size, dtype=np.float32)
+    query_list = query.tolist()
+
+    print(HEADER)
+    for measurement in (
+        measure("embed: request per text", lambda: [model.embed_query(text) for text in texts], 3, warmup=0),
+        measure("embed: batched, deduplicated", batched_uncached, 10, warmup=1),
+        measure("embed: cached", lambda: cached.embed_array(texts), 100),
+        measure("search: python loop", lambda: naive_search(rows, query_list, args.k), 3, warmup=0),
+        measure("search: numpy top-k", lambda: index.search(query, args.k), 100),
+    ):
+        print(measurement.row())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark time-to-first-request of one-shot runs and of the preloaded worker.
+
+One-shot: ``app.py`` is run in a new process per request, as the container
+does by default; the time is from the process start to its exit, after its
+only request. Preloaded: a worker process is started once, then its startup
+time (until /healthz answers 200), its first request and the following ones
+are timed from a client reusing its connection.
+
+Spans and logs are exported to the OpenTelemetry provider given (the local
+collector by default: ``docker compose up otel-collector``).
+
+Usage:
+    python -m benchmarks.startup --runs 5 --requests 50
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent
+
+
+def _environ(args: argparse.Namespace) -> dict:
+    env = dict(os.environ, LLM_PROVIDER=args.provider, OTEL_PROVIDER=args.otel_provider, PYTHONPATH=str(SRC))
+    env.setdefault("OTEL_EXPORTER_OTLP_PROTOCOL", "http")
+    return env
+
+
+def one_shot(args: argparse.Namespace) -> list:
+    """Time one-shot runs of app.py, in milliseconds."""
+    durations = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(SRC / "app.py")],
+            env=_environ(args),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(connection: http.client.HTTPConnection, method: str, path: str, body: bytes = None):
+    connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def preloaded(args: argparse.Namespace) -> tuple:
+    """Time a worker startup, first request and next requests, in milliseconds."""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "worker", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=SRC,
+        env=_environ(args),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                status, health = _request(connection, "GET", "/healthz")
+                if status == 200:
+                    break
+            except OSError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"worker exited with status {process.returncode}")
+            time.sleep(0.01)
+        startup = (time.perf_counter() - start) * 1000
+
+        durations = []
+        for _ in range(args.requests):
+            request_start = time.perf_counter()
+            status, _ = _request(connection, "POST", "/invoke", b"{}")
+            if status != 200:
+                raise RuntimeError(f"worker answered {status}")
+            durations.append((time.perf_counter() - request_start) * 1000)
+        connection.close()
+        return startup, health["startup_ms"], durations
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="One-shot runs")
+    parser.add_argument("--requests", type=int, default=50, help="Requests to the preloaded worker")
+    parser.add_argument("--provider", default="mock", help="LLM provider")
+    parser.add_argument("--otel-provider", default="otelcollector", help="OpenTelemetry provider")
+    args = parser.parse_args()
+
+    runs = one_shot(args)
+    startup, phases, requests = preloaded(args)
+    print(f"{'mode':<32} {'calls':>8} {'first (ms)':>12} {'p50 (ms)':>12} {'max (ms)':>12}")
+    print(
+        f"{'one-shot: app.py per request':<32} {len(runs):>8} {runs[0]:>12.1f} {statistics.median(runs):>12.1f} {max(runs):>12.1f}"
+    )
+    print(f"{'preloaded: worker startup':<32} {1:>8} {startup:>12.1f} {startup:>12.1f} {startup:>12.1f}")
+    print(
+        f"{'preloaded: request':<32} {len(requests):>8} {requests[0]:>12.1f} "
+        f"{statistics.median(requests):>12.1f} {max(requests):>12.1f}"
+    )
+    print("worker startup phases: " + ", ".join(f"{phase} {duration:.0f} ms" for phase, duration in phases.items()))
+
+
+if __name__ == "__main__":
+    main()
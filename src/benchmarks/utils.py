@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Measurement helpers shared by the benchmarks."""
+
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Measurement:
+    """Per-invocation cost of a benchmarked callable."""
+
+    name: str
+    iterations: int
+    cpu_us: float
+    wall_us: float
+    peak_bytes: float
+
+    def row(self) -> str:
+        """Format the measurement as a table row."""
+        return (
+            f"{self.name:<32} {self.iterations:>8} {self.cpu_us:>12.1f} {self.wall_us:>12.1f} {self.peak_bytes:>12.0f}"
+        )
+
+
+HEADER = f"{'benchmark':<32} {'calls':>8} {'cpu (us)':>12} {'wall (us)':>12} {'peak (B)':>12}"
+
+
+def measure(name: str, fn: Callable[[], object], iterations: int = 1000, warmup: int = 10) -> Measurement:
+    """Measure CPU time, wall time and peak allocations of a callable.
+
+    Timings are taken without tracemalloc, which slows allocations down; the
+    peak allocation is then measured on a separate, shorter run.
+
+    Args:
+        name: Benchmark name
+        fn: Callable to benchmark
+        iterations: Number of timed invocations
+        warmup: Number of untimed invocations run first
+
+    Returns:
+        The per-invocation measurement
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    cpu_start = time.process_time_ns()
+    wall_start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    wall = time.perf_counter_ns() - wall_start
+    cpu = time.process_time_ns() - cpu_start
+
+    samples = max(1, min(iterations, 100))
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        name=name,
+        iterations=iterations,
+        cpu_us=cpu / iterations / 1000,
+        wall_us=wall / iterations / 1000,
+        peak_bytes=peak_total / samples,
+    )
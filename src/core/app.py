@@ -3,11 +3,17 @@
 
 """Main application logic."""
 
+import logging
+
 from models.factory import create_llm
 from models.llm import create_test_messages
+from models.preflight import PreflightLLM
+from telemetry.logs import cleanup_logging, setup_logging_with_provider
 from telemetry.resource import create_resource
 from telemetry.tracing import cleanup_tracing, setup_tracing_with_provider
 
+logger = logging.getLogger(__name__)
+
 
 def run_application(
     llm_provider: str = "anthropic",
@@ -22,8 +28,9 @@ def run_application(
         otel_provider: OpenTelemetry provider to use (langsmith or agenta)
         otel_protocol: Protocol to use for tracing (http or grpc)
     """
-    print(f"OTEL: {otel_provider} {otel_protocol}")
     custom_resource = create_resource("ai-llm-lab")
+    setup_logging_with_provider(otel_provider, otel_protocol, custom_resource)
+    logger.info("OTEL: %s %s", otel_provider, otel_protocol)
     setup_tracing_with_provider(otel_provider, otel_protocol, custom_resource)
 
     # Initialize Paid client (commented out)
@@ -31,12 +38,12 @@ def run_application(
     # client.initialize_tracing()
 
     # Set up LLM using factory
-    llm = create_llm(provider=llm_provider, model=None)
-    print(f"Using {llm_provider} LLM with {otel_provider} telemetry")
+    llm = PreflightLLM(create_llm(provider=llm_provider, model=None))
+    logger.info("Using %s LLM with %s telemetry", llm_provider, otel_provider)
 
     messages = create_test_messages()
     result = llm.invoke(messages).content
-    print("LLM output:\n", result)
+    logger.info("LLM output:\n%s", result, extra={"gen_ai.provider": llm_provider})
 
     # chain.langchain_app(llm)
 
@@ -53,3 +60,4 @@ def run_application(
     # )
 
     cleanup_tracing()
+    cleanup_logging()
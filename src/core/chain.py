@@ -1,42 +1,292 @@
 # SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
 # SPDX-License-Identifier: Apache-2.0
 
-# import agenta as ag
-from langchain.chains import LLMChain, SequentialChain, TransformChain
-from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage
-
-
-def langchain_app(llm):
-    # Define a transformation chain to create the prompt
-    transform = TransformChain(
-        input_variables=["subject"],
-        output_variables=["prompt"],
-        transform=lambda inputs: {"prompt": f"Tell me a joke about {inputs['subject']}."},
-    )
+"""LangChain workflows used to exercise the LLM instrumentation.
+
+Prompt templates are compiled once at import time and workflows are built once
+per LLM instance, so repeated invocations only pay for rendering and the model
+call itself.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.util
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
+from opentelemetry import trace
+
+from telemetry.propagation import consume, extract_from_payload, inject_into_payload
+
+if TYPE_CHECKING:
+    from models.vectorstore import Hit, Retriever
+
+logger = logging.getLogger(__name__)
+
+JOKE_SUBJECT_TEMPLATE = "Tell me a joke about {subject}."
 
-    # Define the first LLM chain to generate a joke
-    first_prompt_messages = [
-        SystemMessage(content="You are a funny sarcastic nerd."),
-        HumanMessage(content="{prompt}"),
+JOKE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "You are a funny sarcastic nerd."),
+        ("human", "{prompt}"),
     ]
-    first_prompt_template = ChatPromptTemplate.from_messages(first_prompt_messages)
-    first_chain = LLMChain(llm=llm, prompt=first_prompt_template, output_key="joke")
+)
 
-    # Define the second LLM chain to translate the joke
-    second_prompt_messages = [
-        SystemMessage(content="You are an Elf."),
-        HumanMessagePromptTemplate.from_template("Translate the joke below into Sindarin language:\n{joke}"),
+TRANSLATE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "You are an Elf."),
+        ("human", "Translate the joke below into Sindarin language:\n{joke}"),
     ]
-    second_prompt_template = ChatPromptTemplate.from_messages(second_prompt_messages)
-    second_chain = LLMChain(llm=llm, prompt=second_prompt_template)
+)
+
+# The instructions come first and the retrieved context last, so that the
+# system prompt is a stable prefix (see models.prompt_cache).
+RAG_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", "Answer the question using only the context given with it."),
+        ("human", "Context:\n{context}\n\nQuestion: {question}"),
+    ]
+)
+
+# Knowledge base of the RAG example.
+RAG_DOCUMENTS = (
+    "OpenTelemetry is a collection of APIs, SDKs and tools to instrument, generate and export telemetry data.",
+    "A span represents a unit of work or operation, with a start time, a duration and attributes.",
+    "The batch span processor queues ended spans and exports them in batches from a background thread.",
+    "OTLP is the OpenTelemetry protocol, carried over gRPC or HTTP with protobuf or JSON payloads.",
+    "The OpenTelemetry Collector receives, processes and exports telemetry to one or more backends.",
+    "Sampling reduces the volume of traces by keeping only a fraction of them, at the head or the tail.",
+    "Embeddings map texts to vectors whose cosine similarity reflects how close their meanings are.",
+    "Retrieval augmented generation adds the documents most similar to a question to the prompt of an LLM.",
+)
+
+# Workflows of the most recently used LLMs, keyed by id(llm). The LLM is kept
+# alongside its workflow so the id cannot be recycled by another object while
+# the entry is alive; the least recently used entries are evicted beyond
+# MAX_WORKFLOWS, so LLMs created per request do not accumulate.
+MAX_WORKFLOWS = 32
+_workflows: "OrderedDict[int, Tuple[BaseChatModel, Runnable]]" = OrderedDict()
+_workflows_lock = threading.Lock()
+
+
+def _subject_to_prompt(inputs: Dict[str, Any]) -> str:
+    return JOKE_SUBJECT_TEMPLATE.format(subject=inputs["subject"])
+
+
+def compose_workflow(
+    llm: BaseChatModel,
+    joke_prompt: ChatPromptTemplate = JOKE_PROMPT,
+    translate_prompt: ChatPromptTemplate = TRANSLATE_PROMPT,
+) -> Runnable:
+    """Compose the joke/translation workflow for an LLM.
+
+    The workflow takes ``{"subject": ...}`` and returns the inputs enriched with
+    the ``prompt``, ``joke`` and ``text`` keys, like the former ``SequentialChain``.
+
+    Args:
+        llm: Chat model used by both LLM steps
+        joke_prompt: Prompt template generating the joke
+        translate_prompt: Prompt template translating the joke
+
+    Returns:
+        The composed runnable
+    """
+    transform = RunnableLambda(_subject_to_prompt).with_config(run_name="TransformChain")
+    return (
+        RunnablePassthrough.assign(prompt=transform)
+        | RunnablePassthrough.assign(joke=joke_prompt | llm | StrOutputParser())
+        | RunnablePassthrough.assign(text=translate_prompt | llm | StrOutputParser())
+    )
+
+
+def build_workflow(llm: BaseChatModel) -> Runnable:
+    """Get the workflow for an LLM, composing it on first use.
+
+    Args:
+        llm: Chat model used by the workflow
+
+    Returns:
+        The cached runnable for this LLM instance
+    """
+    key = id(llm)
+    with _workflows_lock:
+        entry = _workflows.get(key)
+        if entry is None:
+            entry = _workflows[key] = (llm, compose_workflow(llm))
+            if len(_workflows) > MAX_WORKFLOWS:
+                _workflows.popitem(last=False)
+        else:
+            _workflows.move_to_end(key)
+    return entry[1]
+
+
+def langchain_app(llm: BaseChatModel, subject: str = "OpenTelemetry") -> Dict[str, Any]:
+    """Run the joke/translation workflow.
+
+    Args:
+        llm: Chat model used by the workflow
+        subject: Subject of the joke
+
+    Returns:
+        The workflow outputs
+    """
+    result = build_workflow(llm).invoke({"subject": subject})
+    logger.info("Workflow result: %s", result, extra={"workflow.subject": subject})
+    return result
+
 
-    # Chain everything together in a sequential workflow
-    workflow = SequentialChain(
-        chains=[transform, first_chain, second_chain],
-        input_variables=["subject"],
+def _format_hits(hits: Sequence["Hit"]) -> str:
+    return "\n".join(f"- {hit.text}" for hit in hits)
+
+
+def compose_rag_workflow(
+    llm: BaseChatModel, retriever: "Retriever", prompt: ChatPromptTemplate = RAG_PROMPT
+) -> Runnable:
+    """Compose a retrieval augmented generation workflow.
+
+    The workflow takes ``{"question": ...}`` and returns the inputs enriched
+    with the retrieved ``context`` and the ``answer``.
+
+    Args:
+        llm: Chat model answering the question
+        retriever: Retriever searching the context
+        prompt: Prompt template of the question and its context
+
+    Returns:
+        The composed runnable
+    """
+    retrieve = RunnableLambda(lambda inputs: _format_hits(retriever.retrieve(inputs["question"])))
+    return RunnablePassthrough.assign(context=retrieve.with_config(run_name="Retriever")) | RunnablePassthrough.assign(
+        answer=prompt | llm | StrOutputParser()
     )
 
-    # Execute the workflow and print the result
-    result = workflow({"subject": "OpenTelemetry"})
-    print(result)
+
+def build_retriever(
+    embeddings_provider: str = "mock", documents: Sequence[str] = RAG_DOCUMENTS, k: int = 3, **kwargs: Any
+) -> "Retriever":
+    """Create a retriever and index documents, in batches.
+
+    Args:
+        embeddings_provider: Embeddings provider (openai or mock)
+        documents: Documents to index
+        k: Documents retrieved per question
+        **kwargs: Additional arguments passed to ``create_embeddings``
+
+    Returns:
+        The retriever, with the documents indexed
+    """
+    from models.embeddings import create_embeddings
+    from models.vectorstore import Retriever
+
+    retriever = Retriever(create_embeddings(embeddings_provider, **kwargs), k=k)
+    retriever.add_documents(documents)
+    return retriever
+
+
+def rag_app(
+    llm: BaseChatModel, question: str = "How are spans exported?", retriever: Optional["Retriever"] = None
+) -> Dict[str, Any]:
+    """Run the retrieval augmented generation workflow.
+
+    Args:
+        llm: Chat model answering the question
+        question: Question answered from the documents
+        retriever: Retriever of the context (defaults to the mock embeddings over ``RAG_DOCUMENTS``)
+
+    Returns:
+        The workflow outputs
+    """
+    tracer = trace.get_tracer(__name__)
+    with tracer.start_as_current_span("rag.workflow"):
+        retriever = retriever or build_retriever()
+        result = compose_rag_workflow(llm, retriever).invoke({"question": question})
+    logger.info("RAG result: %s", result, extra={"workflow.question": question})
+    return result
+
+
+# Per-process state of the distributed workers, set by _init_worker.
+_worker_stages: Dict[str, Runnable] = {}
+
+
+def _init_worker(llm_provider: str, otel_provider: Optional[str], otel_protocol: Optional[str]) -> None:
+    from models.factory import create_llm
+
+    if otel_provider:
+        from telemetry.logs import cleanup_logging, setup_logging_with_provider
+        from telemetry.resource import create_resource
+        from telemetry.tracing import setup_tracing_with_provider
+
+        resource = create_resource("ai-llm-lab-worker")
+        setup_logging_with_provider(otel_provider, otel_protocol, resource)
+        setup_tracing_with_provider(otel_provider, otel_protocol, resource)
+        # Pool workers exit without running atexit handlers: flush spans and logs from finalizers.
+        multiprocessing.util.Finalize(None, trace.get_tracer_provider().shutdown, exitpriority=10)
+        multiprocessing.util.Finalize(None, cleanup_logging, exitpriority=9)
+
+    llm = create_llm(llm_provider)
+    _worker_stages["joke"] = JOKE_PROMPT | llm | StrOutputParser()
+    _worker_stages["translate"] = TRANSLATE_PROMPT | llm | StrOutputParser()
+
+
+def _joke_stage(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with consume(payload, "stage.joke") as (_, body):
+        body["joke"] = _worker_stages["joke"].invoke(body)
+        return inject_into_payload(body)
+
+
+def _translate_stage(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with consume(payload, "stage.translate") as (_, body):
+        body["text"] = _worker_stages["translate"].invoke(body)
+        return inject_into_payload(body)
+
+
+def distributed_app(
+    llm_provider: str,
+    otel_provider: Optional[str] = None,
+    otel_protocol: Optional[str] = None,
+    subjects: Sequence[str] = ("OpenTelemetry",),
+    workers: int = 2,
+) -> List[Dict[str, Any]]:
+    """Run the joke/translation workflow across worker processes.
+
+    Each stage runs in its own process pool, standing in for a separate
+    service. The trace context travels in the message payloads, so the whole
+    workflow is one trace with a span per stage, including queue time.
+
+    Args:
+        llm_provider: LLM provider used by the workers
+        otel_provider: OpenTelemetry provider used by the workers
+        otel_protocol: Protocol used by the workers (http or grpc)
+        subjects: Subjects of the jokes
+        workers: Processes per stage
+
+    Returns:
+        The workflow outputs, one per subject
+    """
+    tracer = trace.get_tracer(__name__)
+    pool_options = {
+        "max_workers": workers,
+        "mp_context": multiprocessing.get_context("spawn"),
+        "initializer": _init_worker,
+        "initargs": (llm_provider, otel_provider, otel_protocol),
+    }
+    with ProcessPoolExecutor(**pool_options) as joke_pool, ProcessPoolExecutor(**pool_options) as translate_pool:
+        with tracer.start_as_current_span("distributed.workflow") as span:
+            span.set_attribute("workflow.subjects", len(subjects))
+            jokes = []
+            for subject in subjects:
+                with tracer.start_as_current_span("stage.transform"):
+                    payload = inject_into_payload(
+                        {"subject": subject, "prompt": _subject_to_prompt({"subject": subject})}
+                    )
+                jokes.append(joke_pool.submit(_joke_stage, payload))
+            translations = [translate_pool.submit(_translate_stage, joke.result()) for joke in jokes]
+            results = [extract_from_payload(translation.result())[1] for translation in translations]
+    logger.info("Distributed workflow results: %s", results, extra={"workflow.subjects": len(subjects)})
+    return results
@@ -51,3 +51,18 @@ class OpenTelemetryProviderError(LLMObservabilityLabError):
         self.provider = provider
         self.message = message
         super().__init__(f"{provider}: {message}")
+
+
+class LLMBatchError(LLMObservabilityLabError):
+    def __init__(self, batch_id, message):
+        self.batch_id = batch_id
+        self.message = message
+        super().__init__(f"batch {batch_id}: {message}")
+
+
+class LLMContextWindowError(LLMObservabilityLabError):
+    def __init__(self, model, tokens, budget):
+        self.model = model
+        self.tokens = tokens
+        self.budget = budget
+        super().__init__(f"{model}: {tokens} tokens do not fit the {budget} tokens budget")
@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Load test the instrumented LLM stack with open-loop traffic.
+
+Requests arrive following a Poisson, bursty or diurnal pattern, against an LLM
+provider (the local mock by default) traced through the LangChain
+instrumentation and a batch span processor. Spans go to a simulated backend
+(--export-latency) or to an OpenTelemetry provider (--otel-provider), through
+the same exporter processing as the application (PII redaction, unless
+OTEL_REDACTION=false).
+
+The report gives the latency percentiles measured from the intended start
+times, the span drops and the export queue utilization over time, checked
+against SLO thresholds. With --rates, the test runs at each rate in turn to
+find the highest rate meeting the SLO. Exits with status 1 if the SLO fails.
+
+Example:
+    python -m loadtest --pattern bursty --rates 10,50,100,200 --duration 20 --export-latency 0.2
+"""
+
+import argparse
+import sys
+from os import environ
+
+from opentelemetry.instrumentation.langchain import LangchainInstrumentor
+from opentelemetry.sdk import trace as sdk_trace
+
+from core.chain import build_workflow
+from models.factory import create_llm
+from models.llm import create_test_messages
+from telemetry.providers.factory import create_otel_provider
+from telemetry.resource import create_resource
+from telemetry.tracing import create_redactor, create_span_exporter, wrap_span_exporter
+
+from .arrivals import PATTERNS, arrivals
+from .pipeline import DelayedSpanExporter, SpanPipeline
+from .report import SLO, evaluate, format_result, format_sweep
+from .runner import LoadRunner
+
+
+def _pipeline(args: argparse.Namespace) -> SpanPipeline:
+    if args.otel_provider:
+        provider = create_otel_provider(args.otel_provider)
+        protocol = provider.get_export_protocol(args.otel_protocol) or "http"
+        exporter = create_span_exporter(
+            protocol, provider.get_endpoint(), provider.get_headers(), provider.is_insecure()
+        )
+        batch_options = provider.get_batch_options()
+    else:
+        exporter = DelayedSpanExporter(args.export_latency)
+        batch_options = {}
+    if args.max_queue_size:
+        batch_options["max_queue_size"] = args.max_queue_size
+        batch_options.setdefault("max_export_batch_size", min(512, args.max_queue_size))
+    if args.max_export_batch_size:
+        batch_options["max_export_batch_size"] = args.max_export_batch_size
+    if args.schedule_delay_ms:
+        batch_options["schedule_delay_millis"] = args.schedule_delay_ms
+    return SpanPipeline(wrap_span_exporter(exporter, create_redactor()), **batch_options)
+
+
+def _workload(args: argparse.Namespace):
+    kwargs = {"latency": args.mock_latency, "jitter": args.mock_jitter} if args.provider == "mock" else {}
+    llm = create_llm(provider=args.provider, model=args.model, **kwargs)
+    if args.workload == "chain":
+        workflow = build_workflow(llm)
+        return lambda: workflow.invoke({"subject": "OpenTelemetry"})
+    messages = create_test_messages()
+    return lambda: llm.invoke(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pattern", choices=sorted(PATTERNS), default="poisson")
+    parser.add_argument("--rate", type=float, default=10.0, help="mean requests per second")
+    parser.add_argument("--rates", default=None, help="comma separated rates to sweep, instead of --rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per rate")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-workers", type=int, default=256, help="maximum requests in flight")
+    parser.add_argument("--workload", choices=("invoke", "chain"), default="invoke")
+    parser.add_argument("--provider", default=environ.get("LLM_PROVIDER", "mock"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--mock-latency", type=float, default=0.5, help="mock provider latency in seconds")
+    parser.add_argument("--mock-jitter", type=float, default=0.2, help="mock provider extra random latency")
+    parser.add_argument("--otel-provider", default=None, help="export to this provider instead of a simulated backend")
+    parser.add_argument("--otel-protocol", default=environ.get("OTEL_EXPORTER_OTLP_PROTOCOL"))
+    parser.add_argument("--export-latency", type=float, default=0.05, help="simulated backend seconds per export")
+    parser.add_argument("--max-queue-size", type=int, default=None)
+    parser.add_argument("--max-export-batch-size", type=int, default=None)
+    parser.add_argument("--schedule-delay-ms", type=int, default=None)
+    parser.add_argument("--no-telemetry", action="store_true", help="baseline run without instrumentation")
+    parser.add_argument("--slo-p50-ms", type=float, default=None)
+    parser.add_argument("--slo-p99-ms", type=float, default=SLO.p99_ms)
+    parser.add_argument("--slo-error-rate", type=float, default=SLO.error_rate)
+    parser.add_argument("--slo-drop-rate", type=float, default=SLO.drop_rate)
+    parser.add_argument("--slo-max-saturation", type=float, default=SLO.max_saturation)
+    args = parser.parse_args()
+
+    slo = SLO(args.slo_p50_ms, args.slo_p99_ms, args.slo_error_rate, args.slo_drop_rate, args.slo_max_saturation)
+    rates = [float(rate) for rate in args.rates.split(",")] if args.rates else [args.rate]
+
+    pipeline = None
+    tracer_provider = None
+    if not args.no_telemetry:
+        pipeline = _pipeline(args)
+        tracer_provider = sdk_trace.TracerProvider(resource=create_resource("ai-llm-lab-loadtest"))
+        tracer_provider.add_span_processor(pipeline.processor)
+        LangchainInstrumentor().instrument(tracer_provider=tracer_provider)
+
+    runner = LoadRunner(_workload(args), pipeline, max_workers=args.max_workers)
+    results = []
+    try:
+        for rate in rates:
+            schedule = arrivals(args.pattern, rate, args.duration, args.seed)
+            result = runner.run(schedule, args.pattern, rate, args.duration)
+            checks = evaluate(result, slo)
+            print(format_result(result, checks), end="\n\n", flush=True)
+            results.append((result, checks))
+    finally:
+        if tracer_provider is not None:
+            LangchainInstrumentor().uninstrument()
+            tracer_provider.shutdown()
+
+    if len(results) > 1:
+        print(format_sweep(results))
+    sys.exit(0 if all(check.passed for _, checks in results for check in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
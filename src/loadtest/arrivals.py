@@ -0,0 +1,95 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Request arrival patterns.
+
+Each pattern returns the intended start times (seconds from the start of the
+test) of the requests, independently of how fast they are served. All patterns
+have the same mean rate.
+"""
+
+import math
+import random
+from typing import Callable, Dict, List, Optional
+
+
+def _thinned(intensity: Callable[[float], float], peak: float, duration: float, rng: random.Random) -> List[float]:
+    # Non-homogeneous Poisson process, by thinning a process at the peak rate.
+    times = []
+    elapsed = 0.0
+    while True:
+        elapsed += rng.expovariate(peak)
+        if elapsed >= duration:
+            return times
+        if rng.random() * peak <= intensity(elapsed):
+            times.append(elapsed)
+
+
+def poisson(rate: float, duration: float, rng: random.Random) -> List[float]:
+    """Independent arrivals at a constant mean rate."""
+    return _thinned(lambda _: rate, rate, duration, rng)
+
+
+def bursty(
+    rate: float,
+    duration: float,
+    rng: random.Random,
+    burst_factor: float = 5.0,
+    burst_ratio: float = 0.1,
+    period: float = 10.0,
+) -> List[float]:
+    """Poisson arrivals with periodic bursts.
+
+    Args:
+        burst_factor: Rate during a burst, as a multiple of the mean rate
+        burst_ratio: Fraction of each period spent in a burst
+        period: Seconds between the starts of two bursts
+    """
+    if burst_factor * burst_ratio >= 1:
+        raise ValueError("burst_factor * burst_ratio must be below 1 to keep the mean rate")
+    high = rate * burst_factor
+    low = rate * (1 - burst_ratio * burst_factor) / (1 - burst_ratio)
+    return _thinned(lambda t: high if t % period < burst_ratio * period else low, high, duration, rng)
+
+
+def diurnal(
+    rate: float,
+    duration: float,
+    rng: random.Random,
+    amplitude: float = 0.8,
+    period: Optional[float] = None,
+) -> List[float]:
+    """Poisson arrivals following a daily cycle, compressed into the test.
+
+    Args:
+        amplitude: Relative variation of the rate around the mean (0 to 1)
+        period: Seconds of a simulated day (defaults to the test duration)
+    """
+    period = period or duration
+    return _thinned(
+        lambda t: rate * (1 - amplitude * math.cos(2 * math.pi * t / period)), rate * (1 + amplitude), duration, rng
+    )
+
+
+PATTERNS: Dict[str, Callable[..., List[float]]] = {
+    "poisson": poisson,
+    "bursty": bursty,
+    "diurnal": diurnal,
+}
+
+
+def arrivals(pattern: str, rate: float, duration: float, seed: Optional[int] = None) -> List[float]:
+    """Get the intended start times of a test.
+
+    Args:
+        pattern: One of PATTERNS
+        rate: Mean requests per second
+        duration: Test duration in seconds
+        seed: Random seed, for reproducible schedules
+
+    Raises:
+        ValueError: If the pattern is unknown
+    """
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unsupported arrival pattern: {pattern}. Available patterns: {', '.join(PATTERNS)}")
+    return PATTERNS[pattern](rate, duration, random.Random(seed))
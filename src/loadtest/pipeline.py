@@ -0,0 +1,147 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Span pipeline instrumented to observe the export queue under load.
+
+Spans ending (``CountingSpanProcessor``) and spans handed to the exporter
+(``CountingSpanExporter``) are counted on both sides of the batch processor:
+the difference, less the spans being exported, is the queue depth, and once
+the queue is flushed, the spans the batch processor dropped.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from os import environ
+from typing import Optional, Sequence
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from telemetry.histogram import Histogram
+
+DEFAULT_MAX_QUEUE_SIZE = 2048
+
+
+class CountingSpanProcessor(SpanProcessor):
+    """Span processor counting the ended spans before delegating them."""
+
+    def __init__(self, delegate: SpanProcessor):
+        self.delegate = delegate
+        self.ended = 0
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        with self._lock:
+            self.ended += 1
+        self.delegate.on_end(span)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+class CountingSpanExporter(SpanExporter):
+    """Span exporter counting the spans and timing the exports of another exporter."""
+
+    def __init__(self, delegate: SpanExporter):
+        self.delegate = delegate
+        self.exported = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.export_latency = Histogram()
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            self.in_flight += len(spans)
+        start = time.perf_counter()
+        try:
+            result = self.delegate.export(spans)
+        except Exception:
+            result = SpanExportResult.FAILURE
+        with self._lock:
+            self.in_flight -= len(spans)
+            self.export_latency.record((time.perf_counter() - start) * 1e6)
+            if result is SpanExportResult.SUCCESS:
+                self.exported += len(spans)
+            else:
+                self.failed += len(spans)
+        return result
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+class DelayedSpanExporter(SpanExporter):
+    """Span exporter discarding the spans after a simulated network delay."""
+
+    def __init__(self, delay: float = 0.0):
+        """Initialize the exporter.
+
+        Args:
+            delay: Seconds spent per export call
+        """
+        self.delay = delay
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if self.delay:
+            time.sleep(self.delay)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+@dataclass
+class SpanCounts:
+    """Span counters of the pipeline, at a point in time."""
+
+    ended: int
+    exported: int
+    failed: int
+    in_flight: int = 0
+
+    def __sub__(self, other: "SpanCounts") -> "SpanCounts":
+        return SpanCounts(
+            self.ended - other.ended, self.exported - other.exported, self.failed - other.failed, self.in_flight
+        )
+
+    @property
+    def pending(self) -> int:
+        """Spans ended but neither exported nor being exported: queued, or dropped."""
+        return self.ended - self.exported - self.failed - self.in_flight
+
+
+class SpanPipeline:
+    """Batch span processor between the two counters."""
+
+    def __init__(self, exporter: SpanExporter, **batch_options):
+        """Initialize the pipeline.
+
+        Args:
+            exporter: Span exporter
+            **batch_options: BatchSpanProcessor options
+        """
+        self.max_queue_size = batch_options.get(
+            "max_queue_size", int(environ.get("OTEL_BSP_MAX_QUEUE_SIZE", DEFAULT_MAX_QUEUE_SIZE))
+        )
+        self.exporter = CountingSpanExporter(exporter)
+        self.processor = CountingSpanProcessor(BatchSpanProcessor(self.exporter, **batch_options))
+
+    def counts(self) -> SpanCounts:
+        """Get the current span counters."""
+        return SpanCounts(self.processor.ended, self.exporter.exported, self.exporter.failed, self.exporter.in_flight)
+
+    def utilization(self) -> float:
+        """Get the fraction of the export queue in use."""
+        return min(1.0, self.counts().pending / self.max_queue_size)
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Service level objectives and load test reports."""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .runner import LoadResult
+
+
+@dataclass
+class SLO:
+    """Thresholds of a load test, None to skip a check."""
+
+    p50_ms: Optional[float] = None
+    p99_ms: Optional[float] = 2000.0
+    error_rate: Optional[float] = 0.01
+    drop_rate: Optional[float] = 0.0
+    max_saturation: Optional[float] = 0.8
+
+
+@dataclass
+class Check:
+    """Outcome of one SLO threshold."""
+
+    name: str
+    value: float
+    threshold: float
+
+    @property
+    def passed(self) -> bool:
+        """Check whether the value is within the threshold."""
+        return self.value <= self.threshold
+
+
+def _ms(value: Optional[int]) -> float:
+    return value / 1000 if value is not None else 0.0
+
+
+def evaluate(result: LoadResult, slo: SLO) -> List[Check]:
+    """Check a load test result against an SLO.
+
+    Span drops and queue saturation are only checked with telemetry enabled.
+    """
+    values = [
+        ("p50_ms", _ms(result.latency.percentile(50))),
+        ("p99_ms", _ms(result.latency.percentile(99))),
+        ("error_rate", result.error_rate),
+    ]
+    if result.telemetry:
+        values += [("drop_rate", result.drop_rate), ("max_saturation", result.max_saturation)]
+    return [Check(name, value, getattr(slo, name)) for name, value in values if getattr(slo, name) is not None]
+
+
+def format_result(result: LoadResult, checks: Sequence[Check]) -> str:
+    """Render a load test result and its SLO checks as text."""
+    lines = [
+        f"{result.pattern} arrivals at {result.rate:g} req/s for {result.duration:.1f} s: "
+        f"{result.requests} requests, {result.errors} errors, {result.achieved_rate:.1f} req/s achieved",
+        "",
+        f"{'latency (ms)':<22} {'p50':>10} {'p90':>10} {'p99':>10} {'p99.9':>10} {'max':>10}",
+    ]
+    for label, histogram in (("from intended start", result.latency), ("service time", result.service_time)):
+        values = [histogram.percentile(p) for p in (50, 90, 99, 99.9, 100)]
+        lines.append(f"{label:<22} " + " ".join(f"{_ms(value):>10.1f}" for value in values))
+    if result.spans is not None:
+        lines += [
+            "",
+            f"spans: {result.spans.ended} ended, {result.spans.exported} exported, "
+            f"{result.spans.failed} failed, {result.dropped_spans} dropped",
+            f"export queue: max utilization {result.max_saturation:.0%} ({_sparkline(result.saturation)})",
+        ]
+    lines.append("")
+    for check in checks:
+        lines.append(f"{'PASS' if check.passed else 'FAIL'} {check.name}: {check.value:.4g} <= {check.threshold:g}")
+    return "\n".join(lines)
+
+
+def format_sweep(results: Sequence[Tuple[LoadResult, Sequence[Check]]]) -> str:
+    """Render the results of a rate sweep as a table."""
+    lines = [
+        f"{'rate':>8} {'achieved':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'dropped':>8} {'queue':>6}  slo",
+    ]
+    for result, checks in results:
+        failed = [check.name for check in checks if not check.passed]
+        lines.append(
+            f"{result.rate:>8g} {result.achieved_rate:>9.1f} {_ms(result.latency.percentile(50)):>9.1f} "
+            f"{_ms(result.latency.percentile(99)):>9.1f} {result.error_rate:>7.1%} {result.dropped_spans:>8} "
+            f"{result.max_saturation:>6.0%}  {'FAIL ' + ', '.join(failed) if failed else 'PASS'}"
+        )
+    passing = [result.rate for result, checks in results if all(check.passed for check in checks)]
+    lines.append("")
+    lines.append(f"highest passing rate: {max(passing):g} req/s" if passing else "no rate meets the SLO")
+    return "\n".join(lines)
+
+
+_LEVELS = " ▁▂▃▄▅▆▇█"
+
+
+def _sparkline(samples: Sequence[Tuple[float, float]], width: int = 40) -> str:
+    if not samples:
+        return "no samples"
+    step = max(1, -(-len(samples) // width))
+    chunks = [samples[index : index + step] for index in range(0, len(samples), step)]
+    return "".join(_LEVELS[round(max(value for _, value in chunk) * (len(_LEVELS) - 1))] for chunk in chunks)
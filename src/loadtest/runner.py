@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Open-loop load runner.
+
+Requests are started at their scheduled times whether or not earlier requests
+have completed. Latencies are measured from the scheduled start, so time spent
+waiting for a free worker counts (no coordinated omission); the service time,
+from the actual start, is reported separately.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from telemetry.histogram import Histogram
+
+from .pipeline import SpanCounts, SpanPipeline
+
+
+@dataclass
+class LoadResult:
+    """Measurements of a load test run."""
+
+    pattern: str
+    rate: float
+    duration: float
+    requests: int = 0
+    errors: int = 0
+    latency: Histogram = field(default_factory=Histogram)
+    service_time: Histogram = field(default_factory=Histogram)
+    # (seconds since the start, export queue utilization)
+    saturation: List[Tuple[float, float]] = field(default_factory=list)
+    spans: Optional[SpanCounts] = None
+    telemetry: bool = True
+
+    @property
+    def achieved_rate(self) -> float:
+        """Get the completed requests per second."""
+        return self.requests / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Get the fraction of failed requests."""
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def dropped_spans(self) -> int:
+        """Get the spans that never reached the exporter (after a flush)."""
+        return self.spans.pending if self.spans else 0
+
+    @property
+    def drop_rate(self) -> float:
+        """Get the fraction of ended spans dropped or failed to export."""
+        if not self.spans or not self.spans.ended:
+            return 0.0
+        return (self.spans.pending + self.spans.failed) / self.spans.ended
+
+    @property
+    def max_saturation(self) -> float:
+        """Get the highest export queue utilization observed."""
+        return max((utilization for _, utilization in self.saturation), default=0.0)
+
+
+class LoadRunner:
+    """Run a workload on a schedule of intended start times."""
+
+    def __init__(
+        self,
+        workload: Callable[[], object],
+        pipeline: Optional[SpanPipeline] = None,
+        max_workers: int = 256,
+        sample_interval: float = 0.1,
+    ):
+        """Initialize the runner.
+
+        Args:
+            workload: One request
+            pipeline: Span pipeline to observe, if any
+            max_workers: Maximum requests in flight; later requests wait, and
+                their wait counts in their latency
+            sample_interval: Seconds between two samples of the export queue
+        """
+        self.workload = workload
+        self.pipeline = pipeline
+        self.max_workers = max_workers
+        self.sample_interval = sample_interval
+
+    def run(self, schedule: Sequence[float], pattern: str, rate: float, duration: float) -> LoadResult:
+        """Run the workload at the scheduled times, then flush the spans.
+
+        Args:
+            schedule: Intended start times, in seconds from the start
+            pattern: Arrival pattern name, for the report
+            rate: Mean requests per second, for the report
+            duration: Test duration in seconds
+        """
+        result = LoadResult(pattern=pattern, rate=rate, duration=duration, telemetry=self.pipeline is not None)
+        lock = threading.Lock()
+        before = self.pipeline.counts() if self.pipeline else None
+
+        def call(intended: float) -> None:
+            started = time.perf_counter()
+            failed = False
+            try:
+                self.workload()
+            except Exception:
+                failed = True
+            ended = time.perf_counter()
+            with lock:
+                result.requests += 1
+                result.errors += failed
+                result.latency.record((ended - intended) * 1e6)
+                result.service_time.record((ended - started) * 1e6)
+
+        done = threading.Event()
+        origin = time.perf_counter()
+        sampler = threading.Thread(target=self._sample, args=(origin, result, done), daemon=True)
+        sampler.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="load") as pool:
+                for offset in schedule:
+                    delay = origin + offset - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(call, origin + offset)
+            if self.pipeline:
+                self.pipeline.processor.force_flush()
+        finally:
+            done.set()
+            sampler.join()
+        result.duration = max(duration, time.perf_counter() - origin)
+        if self.pipeline:
+            result.spans = self.pipeline.counts() - before
+        return result
+
+    def _sample(self, origin: float, result: LoadResult, done: threading.Event) -> None:
+        if self.pipeline is None:
+            return
+        while not done.wait(self.sample_interval):
+            result.saturation.append((time.perf_counter() - origin, self.pipeline.utilization()))
@@ -3,12 +3,46 @@
 
 """Anthropic Claude model implementation."""
 
+from typing import Any, Optional, Tuple
+
 from langchain_anthropic import ChatAnthropic
 
+from .base import LLMProviderSpec
+from .prompt_cache import CacheUsageMixin, mark_breakpoint, prompt_cache_enabled, stable_prefix_first
+
+
+class CachingChatAnthropic(CacheUsageMixin, ChatAnthropic):
+    """Claude model caching its system prompt with a ``cache_control`` breakpoint."""
+
+    # Serialized and named (in spans too) as the model it extends.
+    @classmethod
+    def lc_id(cls) -> list[str]:
+        return ChatAnthropic.lc_id()
+
+    def get_name(self, suffix: Optional[str] = None, *, name: Optional[str] = None) -> str:
+        return super().get_name(suffix, name=name or self.name or "ChatAnthropic")
 
-def create_anthropic_llm(model: str = "claude-3-opus-20240229") -> ChatAnthropic:
-    """Create and configure Anthropic Claude LLM instance."""
-    return ChatAnthropic(model=model)
+    def _get_request_payload(self, input_: Any, **kwargs: Any) -> dict:
+        messages = stable_prefix_first(self._convert_input(input_).to_messages())
+        payload = super()._get_request_payload(messages, **kwargs)
+        if payload.get("system"):
+            payload["system"] = mark_breakpoint(payload["system"])
+        return payload
+
+
+def create_anthropic_llm(
+    model: str = "claude-3-opus-20240229", prompt_cache: Optional[bool] = None, **kwargs
+) -> ChatAnthropic:
+    """Create and configure Anthropic Claude LLM instance.
+
+    Args:
+        model: Model name
+        prompt_cache: Cache the system prompt (defaults to ``LLM_PROMPT_CACHE``)
+        **kwargs: Additional arguments passed to ChatAnthropic
+    """
+    if prompt_cache_enabled(prompt_cache):
+        return CachingChatAnthropic(model=model, **kwargs)
+    return ChatAnthropic(model=model, **kwargs)
 
 
 def get_default_model() -> str:
@@ -23,3 +57,45 @@ def get_available_models() -> list[str]:
         "claude-3-sonnet-20240229",
         "claude-3-haiku-20240307",
     ]
+
+
+def get_context_window(model: str) -> int:
+    """Get the context window of an Anthropic model, in tokens."""
+    return 200_000
+
+
+# USD per million (input, output) tokens.
+PRICING = {
+    "claude-3-opus-20240229": (15.0, 75.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+}
+
+
+def get_pricing(model: str) -> Optional[Tuple[float, float]]:
+    """Get the USD price per million input and output tokens of a model."""
+    return PRICING.get(model)
+
+
+# Prices of cache reads and writes, relative to the input price.
+CACHE_READ_RATIO = 0.1
+CACHE_WRITE_RATIO = 1.25
+
+
+def get_cache_pricing(model: str) -> Optional[Tuple[float, float]]:
+    """Get the USD price per million cache read and cache write tokens of a model."""
+    prices = PRICING.get(model)
+    if prices is None:
+        return None
+    return prices[0] * CACHE_READ_RATIO, prices[0] * CACHE_WRITE_RATIO
+
+
+provider = LLMProviderSpec(
+    name="anthropic",
+    create=create_anthropic_llm,
+    default_model=get_default_model,
+    available_models=get_available_models,
+    context_window=get_context_window,
+    pricing=get_pricing,
+    cache_pricing=get_cache_pricing,
+)
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Description of an LLM provider for the model registry."""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class LLMProviderSpec:
+    """Entry points of an LLM provider module."""
+
+    name: str
+    create: Callable[..., Any]
+    default_model: Callable[[], str]
+    available_models: Callable[[], list[str]]
+    context_window: Optional[Callable[[str], int]] = None
+    pricing: Optional[Callable[[str], Optional[Tuple[float, float]]]] = None
+    cache_pricing: Optional[Callable[[str], Optional[Tuple[float, float]]]] = None
+
+
+@dataclass(frozen=True)
+class EmbeddingsProviderSpec:
+    """Entry points of an embeddings provider module."""
+
+    name: str
+    create: Callable[..., Any]
+    default_model: Callable[[], str]
+    available_models: Callable[[], list[str]]
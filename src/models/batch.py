@@ -0,0 +1,388 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Bulk evaluation through the Anthropic Message Batches and OpenAI Batch APIs.
+
+Requests are grouped into provider batches, submitted up front, then polled
+with exponential backoff. Results stream back in input order and each result
+span links to the trace that was active when its request was queued.
+
+Usage:
+    python -m models.batch --provider anthropic prompts.jsonl > results.jsonl
+
+Each input line is either ``{"prompt": "..."}`` or
+``{"messages": [{"role": "user", "content": "..."}]}``.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from os import environ
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, messages_from_dict
+from opentelemetry import trace
+
+from exceptions import LLMBatchError
+
+tracer = trace.get_tracer(__name__)
+
+_ROLES = {"human": "user", "ai": "assistant"}
+_TYPES = {value: key for key, value in _ROLES.items()}
+
+
+@dataclass
+class BatchRequest:
+    """A prompt queued for batch processing."""
+
+    messages: Sequence[BaseMessage]
+    context: Optional[trace.SpanContext] = None
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one batched request, at the position it was submitted."""
+
+    index: int
+    custom_id: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+        return self.error is None
+
+
+def _custom_id(index: int) -> str:
+    return f"req-{index}"
+
+
+def _index(custom_id: str) -> int:
+    return int(custom_id.rsplit("-", 1)[1])
+
+
+def _split_messages(messages: Sequence[BaseMessage]) -> Tuple[str, List[Dict[str, Any]]]:
+    system = []
+    conversation = []
+    for message in messages:
+        if message.type == "system":
+            system.append(message.text)
+        else:
+            conversation.append({"role": _ROLES.get(message.type, "user"), "content": message.content})
+    return "\n".join(system), conversation
+
+
+class BatchClient(ABC):
+    """Base class wrapping a provider batch API."""
+
+    provider: str
+
+    def __init__(self, model: str, max_tokens: int = 1024):
+        """Initialize the batch client.
+
+        Args:
+            model: Model used for every request of the batch
+            max_tokens: Maximum number of output tokens per request
+        """
+        self.model = model
+        self.max_tokens = max_tokens
+
+    @abstractmethod
+    def submit(self, requests: List[Tuple[str, Sequence[BaseMessage]]]) -> str:
+        """Submit requests as one batch.
+
+        Args:
+            requests: Custom IDs and messages of the requests
+
+        Returns:
+            The provider batch ID
+        """
+        pass
+
+    @abstractmethod
+    def poll(self, batch_id: str) -> bool:
+        """Check whether a batch has ended.
+
+        Raises:
+            LLMBatchError: If the batch failed without producing results
+        """
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        """Stream the results of an ended batch, in provider order."""
+        pass
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API client."""
+
+    provider = "anthropic"
+
+    def __init__(self, model: str, max_tokens: int = 1024, client: Any = None):
+        super().__init__(model, max_tokens)
+        if client is None:
+            import anthropic
+
+            client = anthropic.Anthropic()
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Sequence[BaseMessage]]]) -> str:
+        payload = []
+        for custom_id, messages in requests:
+            system, conversation = _split_messages(messages)
+            params = {"model": self.model, "max_tokens": self.max_tokens, "messages": conversation}
+            if system:
+                params["system"] = system
+            payload.append({"custom_id": custom_id, "params": params})
+        return self.client.messages.batches.create(requests=payload).id
+
+    def poll(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        for entry in self.client.messages.batches.results(batch_id):
+            result = BatchResult(index=_index(entry.custom_id), custom_id=entry.custom_id)
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                result.content = "".join(block.text for block in message.content if block.type == "text")
+                result.input_tokens = message.usage.input_tokens
+                result.output_tokens = message.usage.output_tokens
+            elif entry.result.type == "errored":
+                result.error = str(entry.result.error)
+            else:
+                result.error = entry.result.type
+            yield result
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API client for chat completions."""
+
+    provider = "openai"
+    endpoint = "/v1/chat/completions"
+
+    def __init__(self, model: str, max_tokens: int = 1024, client: Any = None):
+        super().__init__(model, max_tokens)
+        if client is None:
+            import openai
+
+            client = openai.OpenAI()
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Sequence[BaseMessage]]]) -> str:
+        lines = []
+        for custom_id, messages in requests:
+            system, conversation = _split_messages(messages)
+            if system:
+                conversation.insert(0, {"role": "system", "content": system})
+            body = {"model": self.model, "messages": conversation, "max_completion_tokens": self.max_tokens}
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": self.endpoint, "body": body}))
+        data = ("\n".join(lines) + "\n").encode()
+        input_file = self.client.files.create(file=("batch.jsonl", data), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.endpoint,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> bool:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return True
+        if batch.status in ("failed", "expired", "cancelled"):
+            if batch.output_file_id or batch.error_file_id:
+                return True
+            raise LLMBatchError(batch_id, f"batch {batch.status}")
+        return False
+
+    def results(self, batch_id: str) -> Iterator[BatchResult]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                result = BatchResult(index=_index(entry["custom_id"]), custom_id=entry["custom_id"])
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    result.error = json.dumps(entry.get("error") or response.get("body"))
+                else:
+                    body = response["body"]
+                    result.content = body["choices"][0]["message"]["content"]
+                    result.input_tokens = body["usage"]["prompt_tokens"]
+                    result.output_tokens = body["usage"]["completion_tokens"]
+                yield result
+
+
+_CLIENTS = {
+    AnthropicBatchClient.provider: AnthropicBatchClient,
+    OpenAIBatchClient.provider: OpenAIBatchClient,
+}
+
+
+def create_batch_client(provider: str, model: str = None, **kwargs: Any) -> BatchClient:
+    """Create a batch client for a provider.
+
+    Args:
+        provider: The LLM provider (anthropic or openai)
+        model: The model name (optional, uses the provider default)
+        **kwargs: Additional arguments passed to the client constructor
+
+    Raises:
+        ValueError: If provider has no batch API support
+    """
+    client_class = _CLIENTS.get(provider.lower())
+    if client_class is None:
+        raise ValueError(f"Unsupported batch provider: {provider}")
+    if model is None:
+        from .factory import get_default_model
+
+        model = get_default_model(provider)
+    return client_class(model, **kwargs)
+
+
+class BatchRunner:
+    """Run many prompts through a provider batch API."""
+
+    def __init__(
+        self,
+        client: BatchClient,
+        max_batch_size: int = 1000,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+    ):
+        """Initialize the batch runner.
+
+        Args:
+            client: Provider batch client
+            max_batch_size: Maximum number of requests per provider batch
+            poll_interval: Initial delay between status checks, in seconds
+            max_poll_interval: Upper bound of the exponential polling backoff
+        """
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    def run(self, requests: Iterable[Union[BatchRequest, Sequence[BaseMessage]]]) -> Iterator[BatchResult]:
+        """Submit all requests, then stream their results in input order.
+
+        Requests given as plain message lists are linked to the span that is
+        current when they are read from ``requests``.
+        """
+        pending: List[Tuple[str, int, List[trace.SpanContext]]] = []
+        counter = itertools.count()
+        iterator = iter(requests)
+        while True:
+            chunk = list(itertools.islice(iterator, self.max_batch_size))
+            if not chunk:
+                break
+            pending.append(self._submit(chunk, counter))
+
+        for batch_id, first_index, contexts in pending:
+            yield from self._collect(batch_id, first_index, contexts)
+
+    def _submit(self, chunk: List[Any], counter: Iterator[int]) -> Tuple[str, int, List[trace.SpanContext]]:
+        entries = []
+        contexts = []
+        for request in chunk:
+            if not isinstance(request, BatchRequest):
+                request = BatchRequest(messages=request)
+            contexts.append(request.context or trace.get_current_span().get_span_context())
+            entries.append((_custom_id(next(counter)), request.messages))
+
+        with tracer.start_as_current_span("batch.submit") as span:
+            span.set_attribute("gen_ai.system", self.client.provider)
+            span.set_attribute("gen_ai.request.model", self.client.model)
+            span.set_attribute("llm.batch.size", len(entries))
+            batch_id = self.client.submit(entries)
+            span.set_attribute("llm.batch.id", batch_id)
+        return batch_id, _index(entries[0][0]), contexts
+
+    def _wait(self, batch_id: str) -> None:
+        with tracer.start_as_current_span("batch.wait") as span:
+            span.set_attribute("llm.batch.id", batch_id)
+            interval = self.poll_interval
+            polls = 1
+            while not self.client.poll(batch_id):
+                time.sleep(interval)
+                interval = min(interval * 2, self.max_poll_interval)
+                polls += 1
+            span.set_attribute("llm.batch.polls", polls)
+
+    def _collect(self, batch_id: str, first_index: int, contexts: List[trace.SpanContext]) -> Iterator[BatchResult]:
+        self._wait(batch_id)
+        buffered: Dict[int, BatchResult] = {}
+        next_index = first_index
+        for result in self.client.results(batch_id):
+            buffered[result.index] = result
+            while next_index in buffered:
+                yield self._trace_result(batch_id, buffered.pop(next_index), contexts[next_index - first_index])
+                next_index += 1
+        for index in range(next_index, first_index + len(contexts)):
+            result = buffered.pop(index, None) or BatchResult(index=index, custom_id=_custom_id(index), error="missing")
+            yield self._trace_result(batch_id, result, contexts[index - first_index])
+
+    def _trace_result(self, batch_id: str, result: BatchResult, context: trace.SpanContext) -> BatchResult:
+        links = [trace.Link(context)] if context.is_valid else []
+        with tracer.start_as_current_span("batch.result", links=links) as span:
+            span.set_attribute("gen_ai.system", self.client.provider)
+            span.set_attribute("gen_ai.request.model", self.client.model)
+            span.set_attribute("gen_ai.usage.input_tokens", result.input_tokens)
+            span.set_attribute("gen_ai.usage.output_tokens", result.output_tokens)
+            span.set_attribute("llm.batch.id", batch_id)
+            span.set_attribute("llm.batch.custom_id", result.custom_id)
+            if result.error:
+                span.set_status(trace.Status(trace.StatusCode.ERROR, result.error))
+        return result
+
+
+def _load_requests(lines: Iterable[str]) -> Iterator[List[BaseMessage]]:
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if "prompt" in entry:
+            messages = [HumanMessage(content=entry["prompt"])]
+            if entry.get("system"):
+                messages.insert(0, SystemMessage(content=entry["system"]))
+            yield messages
+        else:
+            yield messages_from_dict(
+                [
+                    {"type": _TYPES.get(m["role"], m["role"]), "data": {"content": m["content"]}}
+                    for m in entry["messages"]
+                ]
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of prompts, - for stdin")
+    parser.add_argument("--provider", default=environ.get("LLM_PROVIDER", "anthropic"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--max-batch-size", type=int, default=1000)
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    client = create_batch_client(args.provider, args.model, max_tokens=args.max_tokens)
+    runner = BatchRunner(client, max_batch_size=args.max_batch_size, poll_interval=args.poll_interval)
+    source = sys.stdin if args.input == "-" else open(args.input)
+    with source:
+        for result in runner.run(_load_requests(source)):
+            print(json.dumps(asdict(result)))
+
+
+if __name__ == "__main__":
+    main()
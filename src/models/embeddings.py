@@ -0,0 +1,216 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Embeddings factory, with batched requests and a content-hash cache.
+
+Providers are resolved through a registry like the LLM providers of
+``models.factory``; packages can add their own through the
+``llm_observability_lab.embeddings_providers`` entry point group, pointing to an
+``EmbeddingsProviderSpec``.
+
+Every provider is wrapped in ``CachedEmbeddings``: texts are looked up by the
+SHA-256 of their content, and only the missing ones are sent, deduplicated, in
+batches of ``batch_size`` texts. Each call is traced as an ``embeddings.embed``
+span with the cache hits and misses, and a child ``embeddings.batch`` span per
+request with its size.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from opentelemetry import trace
+
+from registry import Registry
+
+from .base import EmbeddingsProviderSpec
+
+ENTRY_POINT_GROUP = "llm_observability_lab.embeddings_providers"
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_CACHE_SIZE = 10_000
+
+tracer = trace.get_tracer(__name__)
+
+
+class EmbeddingsProvider(Enum):
+    """Built-in embeddings providers."""
+
+    OPENAI = "openai"
+    MOCK = "mock"
+
+
+registry = Registry(
+    ENTRY_POINT_GROUP,
+    {
+        EmbeddingsProvider.OPENAI.value: "models.openai:embeddings_provider",
+        EmbeddingsProvider.MOCK.value: "models.mock:embeddings_provider",
+    },
+)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings batching the requests and caching the vectors of another model."""
+
+    def __init__(
+        self,
+        delegate: Embeddings,
+        model: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """Initialize the embeddings.
+
+        Args:
+            delegate: Embeddings model computing the missing vectors
+            model: Model name, recorded on the spans
+            batch_size: Maximum texts per request to the model
+            cache_size: Number of vectors kept, least recently used first evicted
+        """
+        self.delegate = delegate
+        self.model = model
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the fraction of texts found in the cache since the start."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _lookup(self, keys: Sequence[bytes]) -> List[Any]:
+        with self._lock:
+            vectors = []
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                vectors.append(vector)
+            return vectors
+
+    def _store(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._cache[key] = vector
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_array(self, texts: Sequence[str], query: bool = False) -> np.ndarray:
+        """Embed texts into a matrix, one float32 row per text.
+
+        Args:
+            texts: Texts to embed
+            query: Embed search queries rather than documents (cached apart)
+
+        Returns:
+            The vectors, with as many rows as texts
+        """
+        prefix = b"q" if query else b"d"
+        keys = [hashlib.sha256(prefix + text.encode()).digest() for text in texts]
+        vectors = self._lookup(keys)
+        missing: Dict[bytes, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        hits = sum(vector is not None for vector in vectors)
+
+        with tracer.start_as_current_span("embeddings.embed") as span:
+            span.set_attribute("gen_ai.operation.name", "embeddings")
+            span.set_attribute("gen_ai.request.model", self.model)
+            span.set_attribute("embeddings.texts", len(texts))
+            span.set_attribute("embeddings.cache.hits", hits)
+            span.set_attribute("embeddings.cache.misses", len(texts) - hits)
+            span.set_attribute("embeddings.cache.hit_rate", hits / len(texts) if texts else 0.0)
+            span.set_attribute("embeddings.requested", len(missing))
+            computed: Dict[bytes, np.ndarray] = {}
+            pending = list(missing.items())
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start : start + self.batch_size]
+                with tracer.start_as_current_span("embeddings.batch") as batch_span:
+                    batch_span.set_attribute("gen_ai.operation.name", "embeddings")
+                    batch_span.set_attribute("gen_ai.request.model", self.model)
+                    batch_span.set_attribute("embeddings.batch.size", len(batch))
+                    batch_texts = [text for _, text in batch]
+                    if query:
+                        result = np.asarray([self.delegate.embed_query(text) for text in batch_texts], dtype=np.float32)
+                    else:
+                        result = np.asarray(self.delegate.embed_documents(batch_texts), dtype=np.float32)
+                batch_keys = [key for key, _ in batch]
+                self._store(batch_keys, result)
+                computed.update(zip(batch_keys, result))
+            span.set_attribute("embeddings.batches", -(-len(pending) // self.batch_size))
+
+        with self._lock:
+            self.hits += hits
+            self.misses += len(texts) - hits
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vector if vector is not None else computed[key] for key, vector in zip(keys, vectors)])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text], query=True)[0].tolist()
+
+
+def _name(provider: Union[EmbeddingsProvider, str]) -> str:
+    return provider.value if isinstance(provider, EmbeddingsProvider) else str(provider).lower()
+
+
+def _create(
+    spec: EmbeddingsProviderSpec,
+    model: str = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    **kwargs: Any,
+) -> CachedEmbeddings:
+    model = model or spec.default_model()
+    return CachedEmbeddings(spec.create(model=model, **kwargs), model, batch_size, cache_size)
+
+
+def create_embeddings(
+    provider: Union[EmbeddingsProvider, str],
+    model: str = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    **kwargs,
+) -> CachedEmbeddings:
+    """Create an embeddings instance based on the provider.
+
+    Instances are cached like LLMs: the same provider, model and arguments
+    return the same instance, so its vector cache is shared.
+
+    Args:
+        provider: The embeddings provider (openai or mock)
+        model: The specific model name (optional, uses default if not provided)
+        batch_size: Maximum texts per request to the provider
+        cache_size: Number of vectors cached
+        **kwargs: Additional arguments passed to the model constructor
+
+    Returns:
+        Batched and cached embeddings
+
+    Raises:
+        ValueError: If provider is not supported
+    """
+    try:
+        return registry.create(
+            _name(provider), _create, model=model, batch_size=batch_size, cache_size=cache_size, **kwargs
+        )
+    except LookupError:
+        raise ValueError(f"Unsupported embeddings provider: {provider}")
+
+
+def get_available_providers() -> list[str]:
+    """Get list of available embeddings providers."""
+    return registry.names()
@@ -1,34 +1,66 @@
 # SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
 # SPDX-License-Identifier: Apache-2.0
 
-"""LLM factory for creating different model instances."""
+"""LLM factory for creating different model instances.
+
+Providers are resolved through a registry: built-in providers are imported on
+first use, and packages can add their own through the
+``llm_observability_lab.llm_providers`` entry point group, pointing to an
+``LLMProviderSpec``.
+"""
 
 from enum import Enum
-from typing import Union
+from typing import TYPE_CHECKING, Any, Optional, Union
 
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
+from registry import Registry
 
-from .anthropic import (
-    create_anthropic_llm,
-)
-from .anthropic import (
-    get_available_models as get_anthropic_models,
-)
-from .openai import create_openai_llm
-from .openai import get_available_models as get_openai_models
+from .base import LLMProviderSpec
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+ENTRY_POINT_GROUP = "llm_observability_lab.llm_providers"
 
 
 class LLMProvider(Enum):
-    """Supported LLM providers."""
+    """Built-in LLM providers."""
 
     ANTHROPIC = "anthropic"
     OPENAI = "openai"
+    MOCK = "mock"
+
+
+registry = Registry(
+    ENTRY_POINT_GROUP,
+    {
+        LLMProvider.ANTHROPIC.value: "models.anthropic:provider",
+        LLMProvider.OPENAI.value: "models.openai:provider",
+        LLMProvider.MOCK.value: "models.mock:provider",
+    },
+)
+
+
+def _name(provider: Union[LLMProvider, str]) -> str:
+    return provider.value if isinstance(provider, LLMProvider) else str(provider).lower()
+
+
+def _get_spec(provider: Union[LLMProvider, str]) -> LLMProviderSpec:
+    try:
+        return registry.load(_name(provider))
+    except LookupError:
+        raise ValueError(f"Unsupported provider: {provider}")
 
 
-def create_llm(provider: Union[LLMProvider, str], model: str = None, **kwargs) -> Union[ChatAnthropic, ChatOpenAI]:
+def _create(spec: LLMProviderSpec, model: str = None, **kwargs: Any) -> "BaseChatModel":
+    return spec.create(model=model or spec.default_model(), **kwargs)
+
+
+def create_llm(provider: Union[LLMProvider, str], model: str = None, **kwargs) -> "BaseChatModel":
     """Create an LLM instance based on the provider.
 
+    Instances are cached: the same provider, model and arguments return the
+    same client, so connection pools are reused.
+
     Args:
         provider: The LLM provider (anthropic or openai)
         model: The specific model name (optional, uses default if not provided)
@@ -40,43 +72,59 @@ def create_llm(provider: Union[LLMProvider, str], model: str = None, **kwargs) -
     Raises:
         ValueError: If provider is not supported
     """
-    if isinstance(provider, str):
-        try:
-            provider = LLMProvider(provider.lower())
-        except ValueError:
-            raise ValueError(f"Unsupported provider: {provider}")
-
-    if provider == LLMProvider.ANTHROPIC:
-        if model is None:
-            from .anthropic import get_default_model
-
-            model = get_default_model()
-        return create_anthropic_llm(model=model, **kwargs)
-
-    elif provider == LLMProvider.OPENAI:
-        if model is None:
-            from .openai import get_default_model
-
-            model = get_default_model()
-        return create_openai_llm(model=model, **kwargs)
-
-    else:
+    try:
+        return registry.create(_name(provider), _create, model=model, **kwargs)
+    except LookupError:
         raise ValueError(f"Unsupported provider: {provider}")
 
 
 def get_available_providers() -> list[str]:
     """Get list of available LLM providers."""
-    return [provider.value for provider in LLMProvider]
+    return registry.names()
+
+
+def get_default_model(provider: Union[LLMProvider, str]) -> str:
+    """Get the default model for a provider."""
+    return _get_spec(provider).default_model()
 
 
 def get_available_models(provider: Union[LLMProvider, str]) -> list[str]:
     """Get list of available models for a provider."""
-    if isinstance(provider, str):
-        provider = LLMProvider(provider.lower())
-
-    if provider == LLMProvider.ANTHROPIC:
-        return get_anthropic_models()
-    elif provider == LLMProvider.OPENAI:
-        return get_openai_models()
-    else:
-        raise ValueError(f"Unsupported provider: {provider}")
+    return _get_spec(provider).available_models()
+
+
+def get_context_window(provider: Union[LLMProvider, str], model: str = None) -> Optional[int]:
+    """Get the context window of a model, in tokens (None if unknown)."""
+    spec = _get_spec(provider)
+    if spec.context_window is None:
+        return None
+    return spec.context_window(model or spec.default_model())
+
+
+def estimate_cost(
+    provider: Union[LLMProvider, str],
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> Optional[float]:
+    """Estimate the USD cost of a call (None if the model price is unknown).
+
+    The input tokens include the cache read and write tokens, as in LangChain
+    usage metadata; they are billed at the cache prices of the model (at the
+    input price when unknown).
+    """
+    spec = _get_spec(provider)
+    prices = spec.pricing(model) if spec.pricing else None
+    if prices is None:
+        return None
+    cache_prices = spec.cache_pricing(model) if spec.cache_pricing else None
+    read_price, write_price = cache_prices or (prices[0], prices[0])
+    uncached_tokens = input_tokens - cache_read_tokens - cache_write_tokens
+    return (
+        uncached_tokens * prices[0]
+        + cache_read_tokens * read_price
+        + cache_write_tokens * write_price
+        + output_tokens * prices[1]
+    ) / 1_000_000
@@ -5,10 +5,16 @@
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+# Built once and shared by every call: messages must not be mutated.
+TEST_MESSAGES = (
+    SystemMessage(content="You are a helpful assistant!"),
+    HumanMessage(content="What is the capital of France?"),
+)
+
 
 def create_test_messages():
-    """Create sample test messages."""
-    return [
-        SystemMessage(content="You are a helpful assistant!"),
-        HumanMessage(content="What is the capital of France?"),
-    ]
+    """Create sample test messages.
+
+    Returns a new list on each call, but the message objects are shared.
+    """
+    return list(TEST_MESSAGES)
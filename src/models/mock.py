@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local mock chat and embeddings models, for replays, load tests and benchmarks without API keys."""
+
+import random
+import re
+import time
+import zlib
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .base import EmbeddingsProviderSpec, LLMProviderSpec
+from .tokens import get_estimator
+
+
+class MockChatModel(BaseChatModel):
+    """Chat model echoing the last message after a simulated latency."""
+
+    model: str = "mock"
+    latency: float = 0.0
+    jitter: float = 0.0
+    tokens_per_second: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = f"mock answer to: {messages[-1].text[:200]}" if messages else "mock answer"
+        estimator = get_estimator(self.model)
+        input_tokens = estimator.count_messages(messages)
+        output_tokens = estimator.count_text(text)
+
+        delay = self.latency + random.uniform(0, self.jitter)
+        if self.tokens_per_second:
+            delay += output_tokens / self.tokens_per_second
+        if delay:
+            time.sleep(delay)
+
+        message = AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def create_mock_llm(model: str = "mock", **kwargs) -> MockChatModel:
+    """Create a mock LLM instance.
+
+    Args:
+        model: Model name reported in the responses
+        **kwargs: latency and jitter (seconds), tokens_per_second
+    """
+    return MockChatModel(model=model, **kwargs)
+
+
+def get_default_model() -> str:
+    """Get the default mock model."""
+    return "mock"
+
+
+def get_available_models() -> list[str]:
+    """Get list of available mock models."""
+    return ["mock"]
+
+
+def get_pricing(model: str) -> Tuple[float, float]:
+    """Get the USD price per million input and output tokens (free)."""
+    return 0.0, 0.0
+
+
+provider = LLMProviderSpec(
+    name="mock",
+    create=create_mock_llm,
+    default_model=get_default_model,
+    available_models=get_available_models,
+    pricing=get_pricing,
+    cache_pricing=get_pricing,
+)
+
+
+_WORD = re.compile(r"\w+")
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic embeddings hashing the words of a text (feature hashing).
+
+    Texts sharing words get similar vectors, so retrieval returns sensible
+    documents, and each call sleeps like a request to an embeddings API.
+    """
+
+    def __init__(self, model: str = "mock", size: int = 256, latency: float = 0.0, per_text_latency: float = 0.0):
+        """Initialize the embeddings.
+
+        Args:
+            model: Model name
+            size: Vector dimensions
+            latency: Seconds per request
+            per_text_latency: Extra seconds per text of a request
+        """
+        self.model = model
+        self.size = size
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size)
+        for word in _WORD.findall(text.lower()):
+            digest = zlib.crc32(word.encode())
+            vector[digest % self.size] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        delay = self.latency + self.per_text_latency * len(texts)
+        if delay:
+            time.sleep(delay)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_mock_embeddings(model: str = "mock", **kwargs) -> HashEmbeddings:
+    """Create mock embeddings.
+
+    Args:
+        model: Model name
+        **kwargs: size, latency and per_text_latency (seconds)
+    """
+    return HashEmbeddings(model=model, **kwargs)
+
+
+embeddings_provider = EmbeddingsProviderSpec(
+    name="mock",
+    create=create_mock_embeddings,
+    default_model=get_default_model,
+    available_models=get_available_models,
+)
@@ -3,14 +3,50 @@
 
 """OpenAI GPT model implementation."""
 
-from langchain_openai import ChatOpenAI
+from typing import Any, Optional, Tuple
 
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
-def create_openai_llm(model: str = "gpt-4", api_key: str = None) -> ChatOpenAI:
-    """Create and configure OpenAI GPT LLM instance."""
-    kwargs = {"model": model}
+from .base import EmbeddingsProviderSpec, LLMProviderSpec
+from .prompt_cache import CacheUsageMixin, prefix_cache_key, prompt_cache_enabled, stable_prefix_first
+
+
+class CachingChatOpenAI(CacheUsageMixin, ChatOpenAI):
+    """GPT model sending its stable prefix first, with a ``prompt_cache_key`` derived from it."""
+
+    # Serialized and named (in spans too) as the model it extends.
+    @classmethod
+    def lc_id(cls) -> list[str]:
+        return ChatOpenAI.lc_id()
+
+    def get_name(self, suffix: Optional[str] = None, *, name: Optional[str] = None) -> str:
+        return super().get_name(suffix, name=name or self.name or "ChatOpenAI")
+
+    def _get_request_payload(self, input_: Any, **kwargs: Any) -> dict:
+        messages = stable_prefix_first(self._convert_input(input_).to_messages())
+        payload = super()._get_request_payload(messages, **kwargs)
+        key = prefix_cache_key(self.model_name, payload.get("messages") or payload.get("input") or [])
+        if key:
+            payload.setdefault("prompt_cache_key", key)
+        return payload
+
+
+def create_openai_llm(
+    model: str = "gpt-4", api_key: str = None, prompt_cache: Optional[bool] = None, **kwargs
+) -> ChatOpenAI:
+    """Create and configure OpenAI GPT LLM instance.
+
+    Args:
+        model: Model name
+        api_key: OpenAI API key (defaults to ``OPENAI_API_KEY``)
+        prompt_cache: Order and key requests for prefix caching (defaults to ``LLM_PROMPT_CACHE``)
+        **kwargs: Additional arguments passed to ChatOpenAI
+    """
+    kwargs["model"] = model
     if api_key:
         kwargs["api_key"] = api_key
+    if prompt_cache_enabled(prompt_cache):
+        return CachingChatOpenAI(**kwargs)
     return ChatOpenAI(**kwargs)
 
 
@@ -28,3 +64,95 @@ def get_available_models() -> list[str]:
         "gpt-4o",
         "gpt-4o-mini",
     ]
+
+
+CONTEXT_WINDOWS = {
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+
+
+def get_context_window(model: str) -> int:
+    """Get the context window of an OpenAI model, in tokens."""
+    return CONTEXT_WINDOWS.get(model, CONTEXT_WINDOWS["gpt-4"])
+
+
+# USD per million (input, output) tokens.
+PRICING = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+
+def get_pricing(model: str) -> Optional[Tuple[float, float]]:
+    """Get the USD price per million input and output tokens of a model."""
+    return PRICING.get(model)
+
+
+# USD per million cached input tokens, for the models with prompt caching.
+CACHE_READ_PRICING = {
+    "gpt-4o": 1.25,
+    "gpt-4o-mini": 0.075,
+}
+
+
+def get_cache_pricing(model: str) -> Optional[Tuple[float, float]]:
+    """Get the USD price per million cache read and cache write tokens of a model.
+
+    Cache writes cost the regular input price.
+    """
+    if model not in CACHE_READ_PRICING:
+        return None
+    return CACHE_READ_PRICING[model], PRICING[model][0]
+
+
+provider = LLMProviderSpec(
+    name="openai",
+    create=create_openai_llm,
+    default_model=get_default_model,
+    available_models=get_available_models,
+    context_window=get_context_window,
+    pricing=get_pricing,
+    cache_pricing=get_cache_pricing,
+)
+
+
+def create_openai_embeddings(model: str = "text-embedding-3-small", api_key: str = None, **kwargs) -> OpenAIEmbeddings:
+    """Create and configure OpenAI embeddings.
+
+    Requests are split in chunks of ``chunk_size`` texts (1000 by default), more
+    than the batches of ``models.embeddings.CachedEmbeddings``, so each of its
+    batches is a single API request.
+    """
+    kwargs["model"] = model
+    if api_key:
+        kwargs["api_key"] = api_key
+    return OpenAIEmbeddings(**kwargs)
+
+
+def get_default_embeddings_model() -> str:
+    """Get the default OpenAI embeddings model."""
+    return "text-embedding-3-small"
+
+
+def get_available_embeddings_models() -> list[str]:
+    """Get list of available OpenAI embeddings models."""
+    return [
+        "text-embedding-3-small",
+        "text-embedding-3-large",
+        "text-embedding-ada-002",
+    ]
+
+
+embeddings_provider = EmbeddingsProviderSpec(
+    name="openai",
+    create=create_openai_embeddings,
+    default_model=get_default_embeddings_model,
+    available_models=get_available_embeddings_models,
+)
@@ -0,0 +1,252 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Pre-flight stage fitting a conversation to the model token budget.
+
+Before each call, the prompt tokens are estimated locally. Conversations over
+budget are compacted (repeats collapsed, then older turns summarized or trimmed);
+conversations that still do not fit fail locally instead of after a network
+round trip. Estimated and actual token counts are recorded on a span.
+"""
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+from opentelemetry import trace
+
+from exceptions import LLMContextWindowError
+
+from .tokens import TokenEstimator, get_estimator
+
+tracer = trace.get_tracer(__name__)
+
+Summarizer = Callable[[Sequence[BaseMessage]], str]
+
+STRATEGIES = ("dedupe", "summarize", "trim")
+
+# Characters kept per message by the default, extractive summary.
+SUMMARY_CHARS_PER_MESSAGE = 160
+
+# Tokens reserved for the summary message when summarizing.
+SUMMARY_RESERVE_TOKENS = 512
+
+
+def to_messages(value: LanguageModelInput) -> List[BaseMessage]:
+    """Convert a chat model input (string, prompt value or messages) to messages, as chat models do."""
+    if isinstance(value, PromptValue):
+        return value.to_messages()
+    if isinstance(value, str):
+        return [HumanMessage(content=value)]
+    return convert_to_messages(value)
+
+
+def extractive_summary(messages: Sequence[BaseMessage]) -> str:
+    """Summarize messages locally by keeping the start of each one."""
+    lines = []
+    for message in messages:
+        text = " ".join(message.text.split())
+        if len(text) > SUMMARY_CHARS_PER_MESSAGE:
+            text = text[:SUMMARY_CHARS_PER_MESSAGE].rsplit(" ", 1)[0] + "..."
+        lines.append(f"- {message.type}: {text}")
+    return "Summary of the earlier conversation:\n" + "\n".join(lines)
+
+
+def dedupe_messages(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Collapse consecutive repeats of a message, keeping the last one.
+
+    Repeats further apart are kept: they are turns of the conversation.
+
+    >>> turns = [("human", "yes"), ("ai", "Delete file A?"), ("human", "yes"), ("human", "yes")]
+    >>> [message.text for message in dedupe_messages(convert_to_messages(turns))]
+    ['yes', 'Delete file A?', 'yes']
+    """
+    kept: List[BaseMessage] = []
+    for message in messages:
+        if kept and kept[-1].type == message.type and kept[-1].content == message.content:
+            kept[-1] = message
+        else:
+            kept.append(message)
+    return kept
+
+
+def _split(messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage], BaseMessage]:
+    system = [message for message in messages if message.type == "system"]
+    history = [message for message in messages[:-1] if message.type != "system"]
+    return system, history, messages[-1]
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    estimator: TokenEstimator,
+    budget: int,
+    strategies: Sequence[str] = ("dedupe", "trim"),
+    summarizer: Summarizer = extractive_summary,
+) -> List[BaseMessage]:
+    """Fit messages to a token budget.
+
+    System messages and the last message are always kept. Strategies are
+    applied in order until the conversation fits:
+
+    - ``dedupe``: collapse consecutive repeats of a message
+    - ``summarize``: replace the oldest turns by a summary message
+    - ``trim``: drop the oldest turns
+
+    Args:
+        messages: Conversation to send
+        estimator: Token estimator of the target model
+        budget: Maximum prompt tokens
+        strategies: Strategies to apply
+        summarizer: Builds the summary text of the replaced turns
+
+    Returns:
+        The compacted conversation (possibly still over budget)
+    """
+    messages = list(messages)
+    if not messages:
+        return messages
+    for strategy in strategies:
+        if estimator.count_messages(messages) <= budget:
+            break
+        if strategy == "dedupe":
+            messages = dedupe_messages(messages)
+            continue
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unsupported compaction strategy: {strategy}")
+
+        system, history, last = _split(messages)
+        fixed = estimator.count_messages(system + [last])
+        kept: List[BaseMessage] = []
+        used = fixed
+        # Keep the most recent turns that fit, reserving room for the summary.
+        reserve = SUMMARY_RESERVE_TOKENS if strategy == "summarize" else 0
+        for message in reversed(history):
+            cost = estimator.count_message(message)
+            if used + cost + reserve > budget:
+                break
+            kept.insert(0, message)
+            used += cost
+        dropped = history[: len(history) - len(kept)]
+        if strategy == "summarize" and dropped:
+            summary = SystemMessage(content=summarizer(dropped))
+            if used + estimator.count_message(summary) <= budget:
+                kept.insert(0, summary)
+        messages = system + kept + [last]
+    return messages
+
+
+class PreflightLLM(Runnable[LanguageModelInput, BaseMessage]):
+    """Chat model wrapper running the pre-flight stage before each call.
+
+    It takes the inputs of a chat model and composes like one; attributes not
+    defined here are delegated to the wrapped model.
+
+    >>> from langchain_core.prompts import ChatPromptTemplate
+    >>> from models.mock import MockChatModel
+    >>> llm = PreflightLLM(MockChatModel())
+    >>> llm.invoke("hello").content
+    'mock answer to: hello'
+    >>> llm.invoke([("system", "Be brief."), ("human", "hi")]).content
+    'mock answer to: hi'
+    >>> prompt = ChatPromptTemplate.from_messages([("human", "{question}")])
+    >>> llm.invoke(prompt.invoke({"question": "why?"})).content
+    'mock answer to: why?'
+    >>> (prompt | llm).invoke({"question": "how?"}).content
+    'mock answer to: how?'
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        model: Optional[str] = None,
+        budget: Optional[int] = None,
+        strategies: Sequence[str] = ("dedupe", "trim"),
+        summarizer: Summarizer = extractive_summary,
+        reserve_output_tokens: Optional[int] = None,
+    ):
+        """Initialize the pre-flight wrapper.
+
+        Args:
+            llm: Chat model to wrap
+            model: Model name (defaults to the model of the wrapped LLM)
+            budget: Prompt token budget (defaults to the model context window
+                minus the output reservation)
+            strategies: Compaction strategies, see compact_messages
+            summarizer: Builds the summary text for the summarize strategy
+            reserve_output_tokens: Tokens kept for the answer (defaults to the
+                LLM max_tokens, or 1024)
+        """
+        self.llm = llm
+        self.model = model or getattr(llm, "model", None) or getattr(llm, "model_name", None) or "unknown"
+        self.estimator = get_estimator(self.model)
+        self.strategies = tuple(strategies)
+        self.summarizer = summarizer
+        if budget is None:
+            reserve = reserve_output_tokens or getattr(llm, "max_tokens", None) or 1024
+            window = _context_window(self.model)
+            budget = window - reserve if window else None
+        self.budget = budget
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.llm, name)
+
+    def prepare(self, messages: LanguageModelInput) -> Tuple[List[BaseMessage], int, int]:
+        """Compact messages to the budget.
+
+        Args:
+            messages: Chat model input: string, prompt value or messages
+
+        Returns:
+            The messages to send, and the estimated tokens before and after compaction
+
+        Raises:
+            LLMContextWindowError: If the messages cannot fit the budget
+        """
+        messages = to_messages(messages)
+        original = self.estimator.count_messages(messages)
+        if self.budget is None or original <= self.budget:
+            return messages, original, original
+        messages = compact_messages(messages, self.estimator, self.budget, self.strategies, self.summarizer)
+        estimated = self.estimator.count_messages(messages)
+        if estimated > self.budget:
+            raise LLMContextWindowError(self.model, estimated, self.budget)
+        return messages, original, estimated
+
+    def invoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        """Run the pre-flight stage, then invoke the wrapped model."""
+        messages = to_messages(input)
+        with tracer.start_as_current_span("llm.preflight") as span:
+            span.set_attribute("gen_ai.request.model", self.model)
+            if self.budget is not None:
+                span.set_attribute("llm.preflight.budget", self.budget)
+            try:
+                prepared, original, estimated = self.prepare(messages)
+            except LLMContextWindowError as error:
+                span.set_attribute("llm.preflight.estimated_input_tokens", error.tokens)
+                span.record_exception(error)
+                span.set_status(trace.Status(trace.StatusCode.ERROR, error.message))
+                raise
+            span.set_attribute("llm.preflight.original_input_tokens", original)
+            span.set_attribute("llm.preflight.estimated_input_tokens", estimated)
+            span.set_attribute("llm.preflight.dropped_messages", len(messages) - len(prepared))
+
+            response = self.llm.invoke(prepared, config, **kwargs)
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            actual = usage.get("input_tokens")
+            if actual:
+                span.set_attribute("gen_ai.usage.input_tokens", actual)
+                span.set_attribute("llm.preflight.estimate_error", (estimated - actual) / actual)
+            return response
+
+
+def _context_window(model: str) -> Optional[int]:
+    from .factory import get_context_window
+    from .tokens import model_family
+
+    family = model_family(model)
+    if family == "unknown":
+        return None
+    return get_context_window(family, model)
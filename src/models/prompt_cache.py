@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Provider-side prompt caching.
+
+Anthropic and OpenAI both bill (and prefill) a cached prompt prefix for a
+fraction of its price and latency, when a request starts with the same tokens
+as a recent one, from 1024 tokens on:
+
+- Anthropic caches the prefix up to a ``cache_control`` breakpoint: the
+  Anthropic models of the lab mark the end of the system prompt
+- OpenAI caches prefixes automatically: the OpenAI models of the lab send the
+  system messages first, as Anthropic does, and set ``prompt_cache_key`` to a
+  hash of them, so requests sharing instructions are routed to the same cache
+
+Both record the cache read and write tokens of each call on the current
+(model) span. Caching is enabled with ``prompt_cache=True`` or
+``LLM_PROMPT_CACHE=true``. Variable content belongs in the last messages: the
+cached prefix ends at the first token that differs.
+"""
+
+import hashlib
+import json
+from os import environ
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+from opentelemetry import trace
+
+PROMPT_CACHE_ENV = "LLM_PROMPT_CACHE"
+
+CACHE_READ_ATTRIBUTE = "gen_ai.usage.cache_read_input_tokens"
+CACHE_WRITE_ATTRIBUTE = "gen_ai.usage.cache_creation_input_tokens"
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+def prompt_cache_enabled(prompt_cache: Optional[bool] = None) -> bool:
+    """Get whether prompt caching is enabled, from the argument or the environment."""
+    if prompt_cache is not None:
+        return prompt_cache
+    return environ.get(PROMPT_CACHE_ENV, "false").lower() == "true"
+
+
+def stable_prefix_first(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Move the system messages before the conversation, keeping their order."""
+    return sorted(messages, key=lambda message: message.type != "system")
+
+
+def prefix_cache_key(model: str, messages: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Get a cache routing key from the leading system messages of a request, None without any."""
+    prefix = []
+    for message in messages:
+        if message.get("role") not in ("system", "developer"):
+            break
+        prefix.append(message.get("content"))
+    if not prefix:
+        return None
+    digest = hashlib.sha256(json.dumps([model, prefix], sort_keys=True, default=str).encode()).hexdigest()
+    return f"prefix-{digest[:32]}"
+
+
+def mark_breakpoint(system: Any) -> Any:
+    """Add a cache breakpoint at the end of an Anthropic system prompt (text or blocks)."""
+    if not system:
+        return system
+    if isinstance(system, str):
+        return [{"type": "text", "text": system, "cache_control": EPHEMERAL}]
+    blocks = [dict(block) for block in system]
+    if not any("cache_control" in block for block in blocks):
+        blocks[-1]["cache_control"] = EPHEMERAL
+    return blocks
+
+
+def cache_usage(usage_metadata: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """Get the cache read and write tokens of a LangChain usage."""
+    details = (usage_metadata or {}).get("input_token_details") or {}
+    return details.get("cache_read") or 0, details.get("cache_creation") or 0
+
+
+def record_cache_usage(read: int, write: int) -> None:
+    """Record the cache read and write tokens of a call on the current span."""
+    span = trace.get_current_span()
+    span.set_attribute(CACHE_READ_ATTRIBUTE, read)
+    span.set_attribute(CACHE_WRITE_ATTRIBUTE, write)
+
+
+def _record_generations(result: Any) -> None:
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None)
+        if usage:
+            record_cache_usage(*cache_usage(usage))
+
+
+class CacheUsageMixin:
+    """Chat model mixin recording the prompt cache usage of each call.
+
+    The LangChain instrumentation makes the model span current while the model
+    runs, so the attributes land on it. Streamed usage is split across chunks
+    (Anthropic sends the input usage first): it is totaled at the end.
+    """
+
+    def _generate(self, *args: Any, **kwargs: Any) -> Any:
+        result = super()._generate(*args, **kwargs)
+        _record_generations(result)
+        return result
+
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> Any:
+        result = await super()._agenerate(*args, **kwargs)
+        _record_generations(result)
+        return result
+
+    def _stream(self, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        read = write = 0
+        usage = False
+        for chunk in super()._stream(*args, **kwargs):
+            if getattr(chunk.message, "usage_metadata", None):
+                usage = True
+                chunk_read, chunk_write = cache_usage(chunk.message.usage_metadata)
+                read, write = read + chunk_read, write + chunk_write
+            yield chunk
+        if usage:
+            record_cache_usage(read, write)
+
+    async def _astream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        read = write = 0
+        usage = False
+        async for chunk in super()._astream(*args, **kwargs):
+            if getattr(chunk.message, "usage_metadata", None):
+                usage = True
+                chunk_read, chunk_write = cache_usage(chunk.message.usage_metadata)
+                read, write = read + chunk_read, write + chunk_write
+            yield chunk
+        if usage:
+            record_cache_usage(read, write)
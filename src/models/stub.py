@@ -0,0 +1,525 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local stand-in server for the Anthropic and OpenAI HTTP APIs.
+
+Implements the subset of both APIs used by the lab: chat completions (also
+streamed) and the Anthropic Message Batches / OpenAI Batch APIs. Batches
+complete after a fixed processing delay. Point the SDKs at it with
+``ANTHROPIC_BASE_URL=<url>`` and ``OPENAI_BASE_URL=<url>/v1``.
+
+Prompt caching is emulated, with words as tokens: Anthropic prompts are cached
+up to their last ``cache_control`` breakpoint, OpenAI prompts automatically,
+by prefixes of 1024 tokens plus multiples of 128. With a prefill latency,
+responses wait for it per uncached input token (a tenth of it per cached one)
+before the first byte.
+
+Usage:
+    python -m models.stub --port 8765
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+Responder = Callable[[List[Dict[str, Any]]], str]
+
+
+def echo_responder(messages: List[Dict[str, Any]]) -> str:
+    """Answer with the content of the last message."""
+    content = messages[-1]["content"] if messages else ""
+    if isinstance(content, list):
+        content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return f"echo: {content}"
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text.split()))
+
+
+def _words(content: Any) -> List[str]:
+    if isinstance(content, list):
+        texts = (block.get("text", "") if isinstance(block, dict) else block for block in content)
+        return [word for text in texts for word in _words(text)]
+    return str(content or "").split()
+
+
+# Minimum cached prefix and cache increments of OpenAI, in tokens.
+OPENAI_MIN_CACHED_TOKENS = 1024
+OPENAI_CACHE_INCREMENT = 128
+
+# Minimum prefix cached at an Anthropic breakpoint, in tokens.
+ANTHROPIC_MIN_CACHED_TOKENS = 1024
+
+# Time to live of the cached prefixes, in seconds.
+CACHE_TTL = 300
+
+# Prefill latency of a cached token, relative to an uncached one.
+CACHED_PREFILL_RATIO = 0.1
+
+
+def _prefix_hash(model: str, words: List[str]) -> str:
+    return hashlib.sha256(f"{model}\0{' '.join(words)}".encode()).hexdigest()
+
+
+def _isoformat(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class _Batch:
+    def __init__(self, kind: str, requests: List[Dict[str, Any]], ready_at: float, **extra: Any):
+        self.id = f"{'msgbatch' if kind == 'anthropic' else 'batch'}_{uuid.uuid4().hex}"
+        self.kind = kind
+        self.requests = requests
+        self.created_at = time.time()
+        self.ready_at = ready_at
+        self.extra = extra
+        self.results: Optional[bytes] = None
+
+    @property
+    def done(self) -> bool:
+        return time.time() >= self.ready_at
+
+
+class StubState:
+    """In-memory state shared by the request handlers."""
+
+    def __init__(
+        self,
+        responder: Responder,
+        processing_delay: float,
+        latency: float,
+        prefill_latency: float = 0.0,
+    ):
+        self.responder = responder
+        self.processing_delay = processing_delay
+        self.latency = latency
+        self.prefill_latency = prefill_latency
+        self.batches: Dict[str, _Batch] = {}
+        self.files: Dict[str, bytes] = {}
+        self.prompt_cache: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids):08d}"
+
+    def _cached(self, key: str) -> bool:
+        """Get whether a prefix is cached, refreshing or adding it."""
+        now = time.monotonic()
+        with self.lock:
+            hit = self.prompt_cache.get(key, 0) > now
+            self.prompt_cache[key] = now + CACHE_TTL
+        return hit
+
+    def prefill(self, uncached_tokens: int, cached_tokens: int = 0) -> None:
+        """Wait for the prefill of the input tokens."""
+        if self.prefill_latency:
+            time.sleep(self.prefill_latency * (uncached_tokens + cached_tokens * CACHED_PREFILL_RATIO))
+
+    def anthropic_usage(self, params: Dict[str, Any]) -> Dict[str, int]:
+        """Get the input usage of a request, with the prefix of its last breakpoint read or written."""
+        blocks = []
+        system = params.get("system") or []
+        blocks += [{"type": "text", "text": system}] if isinstance(system, str) else system
+        for message in params.get("messages", []):
+            content = message["content"]
+            blocks += [{"type": "text", "text": content}] if isinstance(content, str) else content
+        words: List[str] = []
+        prefix = 0
+        for block in blocks:
+            words += _words(block.get("text", "") if isinstance(block, dict) else block)
+            if isinstance(block, dict) and block.get("cache_control"):
+                prefix = len(words)
+        usage = {"input_tokens": max(1, len(words)), "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        if prefix >= ANTHROPIC_MIN_CACHED_TOKENS:
+            hit = self._cached(_prefix_hash(params.get("model", "stub"), words[:prefix]))
+            usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = prefix
+            usage["input_tokens"] = max(1, len(words) - prefix)
+        return usage
+
+    def openai_usage(self, body: Dict[str, Any]) -> Tuple[int, int]:
+        """Get the prompt tokens of a request and the longest of its prefixes cached."""
+        words = [word for message in body.get("messages", []) for word in _words(message.get("content"))]
+        model = body.get("model", "stub")
+        cached = 0
+        for length in range(OPENAI_MIN_CACHED_TOKENS, len(words) + 1, OPENAI_CACHE_INCREMENT):
+            if self._cached(_prefix_hash(model, words[:length])):
+                cached = length
+        return max(1, len(words)), cached
+
+    def anthropic_message(self, params: Dict[str, Any], usage: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        messages = params.get("messages", [])
+        text = self.responder(messages)
+        usage = dict(usage or self.anthropic_usage(params))
+        usage["output_tokens"] = _count_tokens(text)
+        return {
+            "id": self.next_id("msg"),
+            "type": "message",
+            "role": "assistant",
+            "model": params.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    def anthropic_events(self, message: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Get the server-sent events streaming a message."""
+        text = message["content"][0]["text"]
+        start = dict(message, content=[], stop_reason=None, usage=dict(message["usage"], output_tokens=1))
+        yield "message_start", {"type": "message_start", "message": start}
+        block = {"type": "text", "text": ""}
+        yield "content_block_start", {"type": "content_block_start", "index": 0, "content_block": block}
+        for word in re.findall(r"\S+\s*", text):
+            delta = {"type": "text_delta", "text": word}
+            yield "content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta}
+        yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+        delta = {"stop_reason": message["stop_reason"], "stop_sequence": None}
+        # Cumulative usage, input included, as the API reports it.
+        yield "message_delta", {"type": "message_delta", "delta": delta, "usage": message["usage"]}
+        yield "message_stop", {"type": "message_stop"}
+
+    def openai_completion(self, body: Dict[str, Any], usage: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        text = self.responder(messages)
+        prompt_tokens, cached_tokens = usage or self.openai_usage(body)
+        completion_tokens = _count_tokens(text)
+        return {
+            "id": self.next_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def openai_chunks(self, completion: Dict[str, Any], include_usage: bool) -> Iterator[Dict[str, Any]]:
+        """Get the chunks streaming a completion."""
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        base["object"] = "chat.completion.chunk"
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        yield chunk({"role": "assistant", "content": ""})
+        for word in re.findall(r"\S+\s*", completion["choices"][0]["message"]["content"]):
+            yield chunk({"content": word})
+        yield chunk({}, "stop")
+        if include_usage:
+            yield dict(base, choices=[], usage=completion["usage"])
+
+    def batch_results(self, batch: _Batch) -> bytes:
+        if batch.results is None:
+            lines = []
+            for request in batch.requests:
+                if batch.kind == "anthropic":
+                    result = {"type": "succeeded", "message": self.anthropic_message(request["params"])}
+                    lines.append({"custom_id": request["custom_id"], "result": result})
+                else:
+                    response = {"status_code": 200, "body": self.openai_completion(request["body"])}
+                    lines.append(
+                        {
+                            "id": self.next_id("batch_req"),
+                            "custom_id": request["custom_id"],
+                            "response": response,
+                            "error": None,
+                        }
+                    )
+            batch.results = "".join(json.dumps(line) + "\n" for line in lines).encode()
+        return batch.results
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler serving the stubbed API routes."""
+
+    server_version = "llm-lab-stub/1.0"
+    state: StubState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, payload: Any, content_type: str = "application/json") -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_events(self, events: Iterator[Tuple[Optional[str], Any]]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for event, data in events:
+            prefix = f"event: {event}\n" if event else ""
+            self.wfile.write(f"{prefix}data: {data if isinstance(data, str) else json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+
+    def _anthropic_messages(self, params: Dict[str, Any]) -> None:
+        usage = self.state.anthropic_usage(params)
+        cached = usage["cache_read_input_tokens"]
+        self.state.prefill(usage["input_tokens"] + usage["cache_creation_input_tokens"], cached)
+        message = self.state.anthropic_message(params, usage)
+        if params.get("stream"):
+            self._send_events(self.state.anthropic_events(message))
+        else:
+            self._send(200, message)
+
+    def _openai_completions(self, body: Dict[str, Any]) -> None:
+        prompt_tokens, cached = self.state.openai_usage(body)
+        self.state.prefill(prompt_tokens - cached, cached)
+        completion = self.state.openai_completion(body, (prompt_tokens, cached))
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            chunks = self.state.openai_chunks(completion, include_usage)
+            self._send_events(itertools.chain(((None, chunk) for chunk in chunks), [(None, "[DONE]")]))
+        else:
+            self._send(200, completion)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _not_found(self) -> None:
+        self._send(404, {"error": {"type": "not_found_error", "message": f"unknown route {self.path}"}})
+
+    def do_POST(self) -> None:
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/messages":
+            self._anthropic_messages(json.loads(self._body()))
+        elif path == "/v1/chat/completions":
+            self._openai_completions(json.loads(self._body()))
+        elif path == "/v1/messages/batches":
+            self._create_anthropic_batch(json.loads(self._body()))
+        elif path == "/v1/files":
+            self._upload_file()
+        elif path == "/v1/batches":
+            self._create_openai_batch(json.loads(self._body()))
+        else:
+            self._not_found()
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        match = re.fullmatch(r"/v1/messages/batches/([\w-]+)(/results)?", path)
+        if match:
+            return self._get_anthropic_batch(match.group(1), bool(match.group(2)))
+        match = re.fullmatch(r"/v1/batches/([\w-]+)", path)
+        if match:
+            return self._get_openai_batch(match.group(1))
+        match = re.fullmatch(r"/v1/files/([\w-]+)/content", path)
+        if match and match.group(1) in self.state.files:
+            return self._send(200, self.state.files[match.group(1)], "application/octet-stream")
+        self._not_found()
+
+    def _register(self, batch: _Batch) -> _Batch:
+        with self.state.lock:
+            self.state.batches[batch.id] = batch
+        return batch
+
+    def _create_anthropic_batch(self, payload: Dict[str, Any]) -> None:
+        batch = self._register(
+            _Batch("anthropic", payload["requests"], time.time() + self.state.processing_delay),
+        )
+        self._send(200, self._anthropic_batch(batch))
+
+    def _anthropic_batch(self, batch: _Batch) -> Dict[str, Any]:
+        done = batch.done
+        host = self.headers.get("Host")
+        return {
+            "id": batch.id,
+            "type": "message_batch",
+            "processing_status": "ended" if done else "in_progress",
+            "request_counts": {
+                "processing": 0 if done else len(batch.requests),
+                "succeeded": len(batch.requests) if done else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": _isoformat(batch.created_at),
+            "expires_at": (datetime.fromtimestamp(batch.created_at, tz=timezone.utc) + timedelta(days=1)).isoformat(),
+            "ended_at": _isoformat(batch.ready_at) if done else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"http://{host}/v1/messages/batches/{batch.id}/results" if done else None,
+        }
+
+    def _get_anthropic_batch(self, batch_id: str, results: bool) -> None:
+        batch = self.state.batches.get(batch_id)
+        if batch is None or batch.kind != "anthropic":
+            return self._not_found()
+        if results:
+            return self._send(200, self.state.batch_results(batch), "application/x-jsonl")
+        self._send(200, self._anthropic_batch(batch))
+
+    def _upload_file(self) -> None:
+        raw = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + self._body()
+        message = email.parser.BytesParser(policy=email.policy.default).parsebytes(raw)
+        content = b""
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_content()
+                if isinstance(content, str):
+                    content = content.encode()
+        file_id = self.state.next_id("file")
+        self.state.files[file_id] = content
+        self._send(
+            200,
+            {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": "batch.jsonl",
+                "purpose": "batch",
+                "status": "processed",
+            },
+        )
+
+    def _create_openai_batch(self, payload: Dict[str, Any]) -> None:
+        lines = self.state.files[payload["input_file_id"]].decode().splitlines()
+        requests = [json.loads(line) for line in lines if line.strip()]
+        batch = _Batch(
+            "openai",
+            requests,
+            time.time() + self.state.processing_delay,
+            endpoint=payload["endpoint"],
+            input_file_id=payload["input_file_id"],
+            completion_window=payload.get("completion_window", "24h"),
+        )
+        self._send(200, self._openai_batch(self._register(batch)))
+
+    def _openai_batch(self, batch: _Batch) -> Dict[str, Any]:
+        output_file_id = None
+        if batch.done:
+            output_file_id = f"file_out_{batch.id}"
+            self.state.files.setdefault(output_file_id, self.state.batch_results(batch))
+        return {
+            "id": batch.id,
+            "object": "batch",
+            "endpoint": batch.extra["endpoint"],
+            "input_file_id": batch.extra["input_file_id"],
+            "completion_window": batch.extra["completion_window"],
+            "status": "completed" if batch.done else "in_progress",
+            "output_file_id": output_file_id,
+            "error_file_id": None,
+            "created_at": int(batch.created_at),
+            "completed_at": int(batch.ready_at) if batch.done else None,
+            "request_counts": {
+                "total": len(batch.requests),
+                "completed": len(batch.requests) if batch.done else 0,
+                "failed": 0,
+            },
+        }
+
+    def _get_openai_batch(self, batch_id: str) -> None:
+        batch = self.state.batches.get(batch_id)
+        if batch is None or batch.kind != "openai":
+            return self._not_found()
+        self._send(200, self._openai_batch(batch))
+
+
+class StubServer:
+    """Threaded local server standing in for the Anthropic and OpenAI APIs."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        responder: Responder = echo_responder,
+        processing_delay: float = 0.5,
+        latency: float = 0.0,
+        prefill_latency: float = 0.0,
+    ):
+        """Initialize the stub server.
+
+        Args:
+            host: Address to bind
+            port: Port to bind (0 picks a free port)
+            responder: Function computing the assistant answer from the messages
+            processing_delay: Seconds before a submitted batch is reported as ended
+            latency: Seconds added to every POST request
+            prefill_latency: Seconds per uncached input token before a chat response
+        """
+        state = StubState(responder, processing_delay, latency, prefill_latency)
+        handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"state": state})
+        self.state = state
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Get the base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--processing-delay", type=float, default=0.5, help="Seconds before batches end")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--prefill-latency", type=float, default=0.0, help="Seconds per uncached input token")
+    args = parser.parse_args()
+
+    server = StubServer(
+        args.host,
+        args.port,
+        processing_delay=args.processing_delay,
+        latency=args.latency,
+        prefill_latency=args.prefill_latency,
+    )
+    print(f"LLM API stub listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
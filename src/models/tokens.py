@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local token estimation for chat messages.
+
+OpenAI models are counted with their tiktoken encoding. Anthropic does not
+publish a local tokenizer: Claude models are estimated with ``cl100k_base``
+plus a safety margin. When no encoding can be loaded (e.g. offline, before
+tiktoken has cached its files), a characters-per-token heuristic is used.
+"""
+
+import functools
+import logging
+from typing import Any, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# Average characters per token for English text, used without an encoding.
+CHARS_PER_TOKEN = 3.5
+
+# Tokens added per message by the chat formats (role and separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+REQUEST_OVERHEAD_TOKENS = 3
+
+# Claude tokenization yields more tokens than cl100k_base on most text.
+ANTHROPIC_MARGIN = 1.15
+
+
+def model_family(model: str) -> str:
+    """Get the tokenizer family of a model (anthropic, openai or unknown)."""
+    if model.startswith("claude"):
+        return "anthropic"
+    if model.startswith(("gpt-", "o1", "o3", "o4", "text-embedding")):
+        return "openai"
+    return "unknown"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model: str) -> Optional[Any]:
+    try:
+        import tiktoken
+
+        if model_family(model) == "openai":
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as error:
+        logger.warning("No tokenizer available for %s, using a heuristic estimate: %s", model, error)
+        return None
+
+
+class TokenEstimator:
+    """Estimate the prompt tokens of a model without calling the provider."""
+
+    def __init__(self, model: str, cache_size: int = 4096):
+        """Initialize the estimator.
+
+        Args:
+            model: Model name, selects the tokenizer
+            cache_size: Number of distinct texts whose count is memoized
+        """
+        self.model = model
+        self.family = model_family(model)
+        self.encoding = _load_encoding(model)
+        self.margin = ANTHROPIC_MARGIN if self.family == "anthropic" else 1.0
+        self.count_text = functools.lru_cache(maxsize=cache_size)(self._count_text)
+
+    def _count_text(self, text: str) -> int:
+        if self.encoding is None:
+            tokens = len(text) / CHARS_PER_TOKEN
+        else:
+            tokens = len(self.encoding.encode(text, disallowed_special=()))
+        return int(tokens * self.margin + 0.999)
+
+    def count_message(self, message: BaseMessage) -> int:
+        """Estimate the tokens of a single message."""
+        return self.count_text(message.text) + MESSAGE_OVERHEAD_TOKENS
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int:
+        """Estimate the prompt tokens of a conversation."""
+        return sum(self.count_message(message) for message in messages) + REQUEST_OVERHEAD_TOKENS
+
+
+@functools.lru_cache(maxsize=64)
+def get_estimator(model: str) -> TokenEstimator:
+    """Get the shared estimator of a model."""
+    return TokenEstimator(model)
@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local vector index and retriever.
+
+Vectors are normalized when added and kept in a single float32 matrix, so a
+search is one matrix product (cosine similarity) for all the queries, and
+``np.argpartition`` selects the top k in linear time before only those are
+sorted.
+
+Retrievals are traced as ``retrieval.search`` spans, with the query embedding
+as a child ``embeddings.embed`` span.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from opentelemetry import trace
+
+from .embeddings import CachedEmbeddings
+
+tracer = trace.get_tracer(__name__)
+
+
+@dataclass
+class Hit:
+    """A document found by a search."""
+
+    text: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorIndex:
+    """In-memory cosine similarity index."""
+
+    def __init__(self, capacity: int = 1024):
+        """Initialize the index.
+
+        Args:
+            capacity: Initial rows of the matrix, doubled when full
+        """
+        self.capacity = capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._texts: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, texts: Sequence[str], vectors: np.ndarray, metadata: Optional[Sequence[Dict[str, Any]]] = None):
+        """Add documents and their vectors.
+
+        Args:
+            texts: Document texts
+            vectors: One vector per text
+            metadata: Metadata per text, returned with the hits
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(texts) != len(vectors):
+            raise ValueError(f"{len(texts)} texts for {len(vectors)} vectors")
+        if not len(vectors):
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.empty((max(self.capacity, len(vectors)), vectors.shape[1]), dtype=np.float32)
+            elif vectors.shape[1] != self._vectors.shape[1]:
+                raise ValueError(f"Vectors of {vectors.shape[1]} dimensions, index of {self._vectors.shape[1]}")
+            end = self._size + len(vectors)
+            if end > len(self._vectors):
+                grown = np.empty((max(end, 2 * len(self._vectors)), self._vectors.shape[1]), dtype=np.float32)
+                grown[: self._size] = self._vectors[: self._size]
+                self._vectors = grown
+            self._vectors[self._size : end] = vectors
+            self._texts.extend(texts)
+            self._metadata.extend(metadata or ({} for _ in texts))
+            self._size = end
+
+    def search(self, queries: np.ndarray, k: int = 4) -> List[List[Hit]]:
+        """Find the k documents most similar to each query.
+
+        Args:
+            queries: One query vector, or a matrix of one query per row
+            k: Documents per query
+
+        Returns:
+            The hits of each query, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            size = self._size
+            vectors = self._vectors
+        if not size or k <= 0:
+            return [[] for _ in queries]
+        scores = queries @ vectors[:size].T
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        scores /= np.where(norms == 0, 1, norms)
+        k = min(k, size)
+        top = (
+            np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < size else np.tile(np.arange(size), (len(queries), 1))
+        )
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return [
+            [Hit(self._texts[index], float(row_scores[index]), self._metadata[index]) for index in row]
+            for row, row_scores in zip(top.tolist(), scores)
+        ]
+
+
+class Retriever:
+    """Embed queries and search them in a vector index."""
+
+    def __init__(self, embeddings: CachedEmbeddings, index: Optional[VectorIndex] = None, k: int = 4):
+        """Initialize the retriever.
+
+        Args:
+            embeddings: Embeddings of the documents and queries
+            index: Vector index (defaults to an empty one)
+            k: Documents per query
+        """
+        self.embeddings = embeddings
+        self.index = index if index is not None else VectorIndex()
+        self.k = k
+
+    def add_documents(self, texts: Sequence[str], metadata: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """Embed documents, in batches, and add them to the index."""
+        with tracer.start_as_current_span("retrieval.index") as span:
+            span.set_attribute("retrieval.documents", len(texts))
+            self.index.add(texts, self.embeddings.embed_array(texts), metadata)
+            span.set_attribute("retrieval.index.size", len(self.index))
+
+    def retrieve(self, query: str, k: Optional[int] = None) -> List[Hit]:
+        """Get the documents most similar to a query, best first."""
+        k = k or self.k
+        with tracer.start_as_current_span("retrieval.search") as span:
+            span.set_attribute("gen_ai.request.model", self.embeddings.model)
+            span.set_attribute("retrieval.top_k", k)
+            span.set_attribute("retrieval.index.size", len(self.index))
+            vector = self.embeddings.embed_array([query], query=True)
+            start = time.perf_counter()
+            hits = self.index.search(vector, k)[0]
+            span.set_attribute("retrieval.search.duration_ms", (time.perf_counter() - start) * 1000)
+            span.set_attribute("retrieval.documents", len(hits))
+            if hits:
+                span.set_attribute("retrieval.top_score", hits[0].score)
+            return hits
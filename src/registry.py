@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Registry of pluggable providers, loaded lazily on first use.
+
+Providers are referenced by ``"module:attribute"`` strings and only imported when
+they are requested, so unused SDKs are never loaded. Third-party packages can
+add providers through an entry point group, and callables can be registered at
+runtime (e.g. from a configuration file).
+"""
+
+import importlib
+import threading
+from importlib import metadata
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+Target = Union[str, Callable[..., Any]]
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+def _import(target: str) -> Any:
+    module_name, _, attribute = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for name in filter(None, attribute.split(".")):
+        obj = getattr(obj, name)
+    return obj
+
+
+class Registry:
+    """Name to provider mapping with lazy loading and instance caching."""
+
+    def __init__(self, group: str, builtins: Optional[Dict[str, Target]] = None):
+        """Initialize the registry.
+
+        Args:
+            group: Entry point group scanned for third-party providers
+            builtins: Providers shipped with the lab, by name
+        """
+        self.group = group
+        self._targets: Dict[str, Target] = dict(builtins or {})
+        self._loaded: Dict[str, Any] = {}
+        self._instances: Dict[Hashable, Any] = {}
+        self._entry_points_scanned = False
+        self._lock = threading.RLock()
+
+    def _scan_entry_points(self) -> None:
+        if self._entry_points_scanned:
+            return
+        with self._lock:
+            if self._entry_points_scanned:
+                return
+            for entry_point in metadata.entry_points(group=self.group):
+                self._targets.setdefault(entry_point.name, entry_point.value)
+            self._entry_points_scanned = True
+
+    def register(self, name: str, target: Target) -> None:
+        """Register or replace a provider.
+
+        Args:
+            name: Provider name
+            target: ``"module:attribute"`` reference or the provider itself
+        """
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+            self._instances = {key: value for key, value in self._instances.items() if key[0] != name}
+
+    def names(self) -> list[str]:
+        """Get the names of all known providers."""
+        self._scan_entry_points()
+        return list(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        self._scan_entry_points()
+        return name in self._targets
+
+    def load(self, name: str) -> Any:
+        """Get a provider, importing its module on first use.
+
+        Raises:
+            LookupError: If no provider is registered under this name
+        """
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        self._scan_entry_points()
+        with self._lock:
+            if name not in self._targets:
+                raise LookupError(name)
+            target = self._targets[name]
+            loaded = _import(target) if isinstance(target, str) else target
+            self._loaded[name] = loaded
+            return loaded
+
+    def create(self, name: str, factory: Optional[Callable[..., Any]] = None, **kwargs: Any) -> Any:
+        """Get a provider instance, constructing it once per configuration.
+
+        Args:
+            name: Provider name
+            factory: Builds the instance from the loaded provider and kwargs
+                (defaults to calling the provider with kwargs)
+            **kwargs: Provider configuration, also used as cache key
+
+        Raises:
+            LookupError: If no provider is registered under this name
+        """
+        try:
+            key = (name, _freeze(kwargs))
+        except TypeError:
+            key = None
+        if key is not None and key in self._instances:
+            return self._instances[key]
+
+        provider = self.load(name)
+        instance = factory(provider, **kwargs) if factory else provider(**kwargs)
+        if key is not None:
+            with self._lock:
+                instance = self._instances.setdefault(key, instance)
+        return instance
+
+    def clear(self) -> None:
+        """Drop all cached instances."""
+        with self._lock:
+            self._instances.clear()
@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Replay recorded LLM calls against a provider and compare the results.
+
+Traces are read from OTLP/JSON files (collector file exporter) or from a local
+trace store (OTEL_TRACE_STORE). Each recorded LLM call is sent again, at the
+recorded arrival times scaled by --speed, and the latency, token and cost
+deltas are reported. Replayed calls are traced with a link to their source span.
+
+Example:
+    python -m replay traces.json --provider mock --speed 1.0 --concurrency 8
+"""
+
+import argparse
+import json
+from os import environ
+
+from opentelemetry import trace
+
+from models.factory import create_llm, get_default_model
+
+from .records import load_records
+from .report import format_report, summarize
+from .runner import Replayer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="OTLP/JSON files or trace stores")
+    parser.add_argument("--provider", default=environ.get("LLM_PROVIDER", "mock"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--speed", type=float, default=1.0, help="timing scale, 0 for as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N calls")
+    parser.add_argument("--otel-provider", default=environ.get("OTEL_PROVIDER"), help="trace the replay")
+    parser.add_argument("--otel-protocol", default=None)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    if args.otel_provider:
+        from telemetry.resource import create_resource
+        from telemetry.tracing import setup_tracing_with_provider
+
+        setup_tracing_with_provider(args.otel_provider, args.otel_protocol, create_resource("ai-llm-lab-replay"))
+
+    records = load_records(args.traces, args.limit)
+    model = args.model or get_default_model(args.provider)
+    llm = create_llm(provider=args.provider, model=model)
+    outcomes = Replayer(llm, args.provider, model, args.concurrency, args.speed).run(records)
+    summary = summarize(outcomes, args.provider, model)
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+    shutdown = getattr(trace.get_tracer_provider(), "shutdown", None)
+    if shutdown:
+        shutdown()
+
+
+if __name__ == "__main__":
+    main()
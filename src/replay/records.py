@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Extraction of replayable LLM calls from recorded spans."""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from telemetry.store import SpanRecord, read_spans
+
+PROMPT_PREFIX = "gen_ai.prompt."
+
+_MESSAGE_TYPES = {
+    "system": SystemMessage,
+    "user": HumanMessage,
+    "human": HumanMessage,
+    "assistant": AIMessage,
+    "ai": AIMessage,
+}
+
+
+@dataclass
+class ReplayRecord:
+    """An LLM call recorded by the instrumentation."""
+
+    trace_id: str
+    span_id: str
+    start_ns: int
+    duration_ns: int
+    messages: List[BaseMessage]
+    model: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+
+
+def _first(attributes: Dict[str, object], *keys: str) -> Optional[object]:
+    for key in keys:
+        if attributes.get(key) is not None:
+            return attributes[key]
+    return None
+
+
+def record_from_span(span: SpanRecord) -> Optional[ReplayRecord]:
+    """Build a replay record from an LLM span, None if the span has no prompt."""
+    prompts: Dict[int, Dict[str, object]] = {}
+    for key, value in span.attributes.items():
+        if not key.startswith(PROMPT_PREFIX):
+            continue
+        index, _, field = key[len(PROMPT_PREFIX) :].partition(".")
+        if index.isdigit():
+            prompts.setdefault(int(index), {})[field] = value
+    if not prompts:
+        return None
+
+    messages = [
+        _MESSAGE_TYPES.get(str(prompt.get("role", "user")), HumanMessage)(content=str(prompt.get("content", "")))
+        for _, prompt in sorted(prompts.items())
+    ]
+    input_tokens = _first(span.attributes, "gen_ai.usage.input_tokens", "gen_ai.usage.prompt_tokens")
+    output_tokens = _first(span.attributes, "gen_ai.usage.output_tokens", "gen_ai.usage.completion_tokens")
+    return ReplayRecord(
+        trace_id=span.trace_id,
+        span_id=span.span_id,
+        start_ns=span.start_ns,
+        duration_ns=span.duration_ns,
+        messages=messages,
+        model=_first(span.attributes, "gen_ai.response.model", "gen_ai.request.model"),
+        input_tokens=int(input_tokens) if input_tokens is not None else None,
+        output_tokens=int(output_tokens) if output_tokens is not None else None,
+    )
+
+
+def load_records(paths: Iterable[str], limit: Optional[int] = None) -> List[ReplayRecord]:
+    """Load the recorded LLM calls of trace files, ordered by start time.
+
+    Args:
+        paths: OTLP/JSON files or local trace stores
+        limit: Maximum number of records (earliest first)
+    """
+    records = []
+    for path in paths:
+        for span in read_spans(path):
+            record = record_from_span(span)
+            if record is not None:
+                records.append(record)
+    records.sort(key=lambda record: record.start_ns)
+    return records[:limit] if limit else records
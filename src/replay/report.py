@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Comparison of a replay against the recorded traffic."""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from models.factory import estimate_cost, get_available_providers
+from models.tokens import model_family
+
+from .runner import ReplayOutcome
+
+
+def percentile(values: Sequence[float], ratio: float) -> Optional[float]:
+    """Get a percentile with the nearest-rank method (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(ratio * len(ordered) + 0.5) - 1))]
+
+
+def _cost(provider: str, model: Optional[str], input_tokens: int, output_tokens: int) -> Optional[float]:
+    if not model or provider not in get_available_providers():
+        return None
+    return estimate_cost(provider, model, input_tokens, output_tokens)
+
+
+def _latencies(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "mean_ms": sum(values) / len(values) if values else None,
+    }
+
+
+def summarize(outcomes: Sequence[ReplayOutcome], provider: str, model: str) -> Dict[str, Any]:
+    """Compute latency, token and cost deltas between a replay and its source.
+
+    Calls that failed are counted but left out of the deltas. Costs are None
+    when a price is unknown.
+
+    Args:
+        outcomes: Replay outcomes
+        provider: LLM provider of the replay
+        model: Model of the replay
+    """
+    succeeded = [outcome for outcome in outcomes if outcome.error is None]
+    original = [outcome.record.duration_ns / 1e6 for outcome in succeeded]
+    replayed = [outcome.latency_ns / 1e6 for outcome in succeeded]
+
+    tokens = {"original_input": 0, "original_output": 0, "replay_input": 0, "replay_output": 0}
+    original_cost: Optional[float] = 0.0
+    replay_cost: Optional[float] = 0.0
+    for outcome in succeeded:
+        record = outcome.record
+        tokens["original_input"] += record.input_tokens or 0
+        tokens["original_output"] += record.output_tokens or 0
+        tokens["replay_input"] += outcome.input_tokens or 0
+        tokens["replay_output"] += outcome.output_tokens or 0
+        if original_cost is not None:
+            cost = _cost(
+                model_family(record.model or ""), record.model, record.input_tokens or 0, record.output_tokens or 0
+            )
+            original_cost = None if cost is None else original_cost + cost
+        if replay_cost is not None:
+            cost = _cost(provider, model, outcome.input_tokens or 0, outcome.output_tokens or 0)
+            replay_cost = None if cost is None else replay_cost + cost
+
+    deltas = [after - before for before, after in zip(original, replayed)]
+    return {
+        "provider": provider,
+        "model": model,
+        "requests": len(outcomes),
+        "errors": len(outcomes) - len(succeeded),
+        "original_latency": _latencies(original),
+        "replay_latency": _latencies(replayed),
+        "latency_delta": _latencies(deltas),
+        "tokens": tokens,
+        "cost_usd": {"original": original_cost, "replay": replay_cost},
+    }
+
+
+def _format(value: Optional[float], unit: str = "", digits: int = 2) -> str:
+    return "n/a" if value is None else f"{value:,.{digits}f}{unit}"
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Render a replay summary as text."""
+    lines = [
+        f"Replay of {summary['requests']} requests on {summary['provider']}/{summary['model']}"
+        f" ({summary['errors']} errors)",
+        "",
+        f"{'latency':<10} {'p50':>12} {'p95':>12} {'mean':>12}",
+    ]
+    for label, key in (("original", "original_latency"), ("replay", "replay_latency"), ("delta", "latency_delta")):
+        latency = summary[key]
+        lines.append(
+            f"{label:<10} {_format(latency['p50_ms'], ' ms'):>12} "
+            f"{_format(latency['p95_ms'], ' ms'):>12} {_format(latency['mean_ms'], ' ms'):>12}"
+        )
+    tokens = summary["tokens"]
+    cost = summary["cost_usd"]
+    lines += [
+        "",
+        f"{'':<10} {'input tok':>12} {'output tok':>12} {'cost':>12}",
+        f"{'original':<10} {tokens['original_input']:>12,} {tokens['original_output']:>12,} "
+        f"{_format(cost['original'], ' $', 4):>12}",
+        f"{'replay':<10} {tokens['replay_input']:>12,} {tokens['replay_output']:>12,} "
+        f"{_format(cost['replay'], ' $', 4):>12}",
+    ]
+    return "\n".join(lines)
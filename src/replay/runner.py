@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Concurrent replay of recorded LLM calls, at original or scaled timing."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from opentelemetry import trace
+
+from .records import ReplayRecord
+
+tracer = trace.get_tracer(__name__)
+
+
+@dataclass
+class ReplayOutcome:
+    """The result of replaying one recorded call."""
+
+    record: ReplayRecord
+    latency_ns: int
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    error: Optional[str] = None
+
+
+def source_link(record: ReplayRecord) -> trace.Link:
+    """Link to the span a replay comes from."""
+    context = trace.SpanContext(
+        trace_id=int(record.trace_id, 16),
+        span_id=int(record.span_id, 16),
+        is_remote=True,
+        trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+    )
+    return trace.Link(context, attributes={"replay.source": True})
+
+
+class Replayer:
+    """Replay recorded calls against an LLM."""
+
+    def __init__(self, llm: Any, provider: str, model: str, concurrency: int = 8, speed: float = 1.0):
+        """Initialize the replayer.
+
+        Args:
+            llm: Chat model receiving the replayed calls
+            provider: LLM provider name, reported on spans
+            model: Model name, reported on spans
+            concurrency: Maximum number of calls in flight
+            speed: Timing scale: 1.0 keeps the recorded arrival times, 2.0 replays
+                twice as fast, 0 sends everything as fast as possible
+        """
+        self.llm = llm
+        self.provider = provider
+        self.model = model
+        self.concurrency = concurrency
+        self.speed = speed
+
+    def run(self, records: Sequence[ReplayRecord]) -> List[ReplayOutcome]:
+        """Replay records, preserving their relative arrival times.
+
+        Returns:
+            The outcomes, in record order
+        """
+        if not records:
+            return []
+        origin = records[0].start_ns
+        started = time.perf_counter_ns()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="replay") as pool:
+            futures = []
+            for record in records:
+                if self.speed > 0:
+                    delay = (record.start_ns - origin) / self.speed - (time.perf_counter_ns() - started)
+                    if delay > 0:
+                        time.sleep(delay / 1e9)
+                futures.append(pool.submit(self._replay, record))
+            return [future.result() for future in futures]
+
+    def _replay(self, record: ReplayRecord) -> ReplayOutcome:
+        attributes = {
+            "gen_ai.system": self.provider,
+            "gen_ai.request.model": self.model,
+            "replay.source.trace_id": record.trace_id,
+            "replay.source.span_id": record.span_id,
+            "replay.source.duration_ms": record.duration_ns / 1e6,
+        }
+        if record.model:
+            attributes["replay.source.model"] = record.model
+        with tracer.start_as_current_span("replay.request", links=[source_link(record)], attributes=attributes) as span:
+            start = time.perf_counter_ns()
+            try:
+                response = self.llm.invoke(record.messages)
+            except Exception as error:
+                span.record_exception(error)
+                span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+                return ReplayOutcome(record, time.perf_counter_ns() - start, error=str(error))
+            latency = time.perf_counter_ns() - start
+
+            usage = getattr(response, "usage_metadata", None) or {}
+            outcome = ReplayOutcome(record, latency, usage.get("input_tokens"), usage.get("output_tokens"))
+            span.set_attribute("replay.latency_delta_ms", (latency - record.duration_ns) / 1e6)
+            if outcome.input_tokens is not None:
+                span.set_attribute("gen_ai.usage.input_tokens", outcome.input_tokens)
+            if outcome.output_tokens is not None:
+                span.set_attribute("gen_ai.usage.output_tokens", outcome.output_tokens)
+            return outcome
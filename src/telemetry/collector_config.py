@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Generate the configuration of a local collector fanning out to providers.
+
+The collector receives the application telemetry on a unix domain socket (or
+a localhost gRPC port) and exports it to each provider, with the endpoint,
+protocol and authentication headers of the provider (``get_headers()``).
+Header values found in the environment are written as ``${env:NAME}``
+references, so the file holds no secret the collector environment does not
+already have. Authentication headers derived from them, such as the base64
+Langfuse ``Basic`` token, are written as a ``${env:<PROVIDER>_AUTH}`` reference
+to set in the collector environment, as in ``etc/otel-collector.yaml``; other
+values are written as is.
+
+Run it where the provider credentials are set, then run the application with
+``OTEL_EXPORT_VIA_COLLECTOR`` set to the receiver endpoint.
+
+Example:
+    python -m telemetry.collector_config langsmith langfuse --listen unix:///var/run/otel/otlp.sock > collector.yaml
+"""
+
+import argparse
+import logging
+import sys
+from os import environ
+from typing import Any, Dict, Sequence
+
+import yaml
+
+from .providers.factory import create_otel_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LISTEN = "unix:///var/run/otel/otlp.sock"
+
+# Shortest environment value substituted by a reference in header values.
+MIN_SECRET_LENGTH = 8
+
+# Headers whose literal values are credentials.
+AUTH_HEADERS = ("authorization", "x-api-key", "api-key")
+
+
+def env_references(value: str) -> str:
+    """Replace the environment values found in a header value by ``${env:NAME}`` references."""
+    candidates = sorted(
+        ((name, env_value) for name, env_value in environ.items() if len(env_value) >= MIN_SECRET_LENGTH),
+        key=lambda item: -len(item[1]),
+    )
+    for name, env_value in candidates:
+        if env_value in value:
+            value = value.replace(env_value, f"${{env:{name}}}")
+    return value
+
+
+def auth_reference(provider_name: str, value: str) -> str:
+    """Replace the credentials of an authentication header value by a ``${env:<PROVIDER>_AUTH}`` reference.
+
+    The scheme (``Basic``, ``Bearer``...) is kept: ``Basic ${env:LANGFUSE_AUTH}``.
+    """
+    scheme, _, credentials = value.rpartition(" ")
+    reference = f"${{env:{provider_name.upper()}_AUTH}}"
+    return f"{scheme} {reference}" if scheme else reference
+
+
+def receiver(listen: str) -> Dict[str, Any]:
+    """Get the OTLP gRPC receiver settings of a listening endpoint."""
+    if listen.startswith("unix://"):
+        return {"endpoint": listen[len("unix://") :], "transport": "unix"}
+    return {"endpoint": listen.split("://", 1)[-1]}
+
+
+def collector_config(provider_names: Sequence[str], listen: str = DEFAULT_LISTEN, signals=("traces", "logs")) -> dict:
+    """Build a collector configuration exporting to providers.
+
+    Args:
+        provider_names: Providers to fan out to
+        listen: Receiver endpoint, ``unix://<path>`` or ``host:port``
+        signals: Pipelines to configure (traces, logs)
+
+    Returns:
+        The collector configuration
+    """
+    exporters: Dict[str, Any] = {}
+    for name in provider_names:
+        provider = create_otel_provider(name, route=False)
+        protocol = provider.get_export_protocol() or "http"
+        exporter: Dict[str, Any] = {"endpoint": provider.get_endpoint()}
+        headers = {}
+        for header, value in provider.get_headers().items():
+            if value is None:
+                continue
+            headers[header] = env_references(str(value))
+            if header.lower() in AUTH_HEADERS and "${env:" not in headers[header]:
+                headers[header] = auth_reference(name, headers[header])
+                logger.warning(
+                    "%s: set %s_AUTH in the collector environment for the %s header", name, name.upper(), header
+                )
+        if headers:
+            exporter["headers"] = headers
+        if protocol == "grpc" and provider.is_insecure():
+            exporter["tls"] = {"insecure": True}
+        exporters[f"{'otlp' if protocol == 'grpc' else 'otlphttp'}/{name}"] = exporter
+
+    pipelines = {
+        signal: {"receivers": ["otlp"], "processors": ["batch"], "exporters": list(exporters)} for signal in signals
+    }
+    return {
+        "receivers": {"otlp": {"protocols": {"grpc": receiver(listen)}}},
+        "processors": {"batch": {}},
+        "exporters": exporters,
+        "service": {"pipelines": pipelines},
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("providers", nargs="+", help="OpenTelemetry providers to export to")
+    parser.add_argument("--listen", default=DEFAULT_LISTEN, help="unix://<path> or host:port")
+    parser.add_argument("--signals", default="traces,logs", help="comma separated pipelines")
+    args = parser.parse_args()
+
+    config = collector_config(args.providers, args.listen, [signal for signal in args.signals.split(",") if signal])
+    yaml.safe_dump(config, sys.stdout, sort_keys=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Pure Python histogram with HdrHistogram bucketing.
+
+Values are non-negative integers (e.g. microseconds). Buckets are log-linear:
+each power of two is split into sub-buckets, so that every recorded value is
+kept with a bounded relative error (1% with 2 significant digits), whatever
+its magnitude, in a few kilobytes.
+"""
+
+import math
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class Histogram:
+    """Histogram of integer values with a fixed number of significant digits."""
+
+    def __init__(self, significant_digits: int = 2):
+        """Initialize the histogram.
+
+        Args:
+            significant_digits: Decimal digits of precision of the recorded values (1 to 5)
+        """
+        if not 1 <= significant_digits <= 5:
+            raise ValueError(f"significant_digits must be between 1 and 5: {significant_digits}")
+        self.significant_digits = significant_digits
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._half_count = self._sub_bucket_count // 2
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        return self._sub_bucket_count + (shift - 1) * self._half_count + (value >> shift) - self._half_count
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        if index < self._sub_bucket_count:
+            return index, index
+        shift, offset = divmod(index - self._sub_bucket_count, self._half_count)
+        shift += 1
+        sub_bucket = offset + self._half_count
+        return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: float, count: int = 1) -> None:
+        """Record a value (rounded to an integer, negative values as 0)."""
+        value = max(0, int(round(value)))
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def record_corrected(self, value: float, expected_interval: float) -> None:
+        """Record a value, correcting for coordinated omission.
+
+        A closed-loop client waiting ``value`` for a response did not send the
+        requests expected every ``expected_interval`` meanwhile; their latencies
+        (``value - interval``, ``value - 2 * interval``, ...) are recorded too.
+        Not needed when latencies are measured from the intended start times.
+        """
+        self.record(value)
+        if expected_interval <= 0:
+            return
+        missing = value - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def merge(self, other: "Histogram") -> None:
+        """Add the values of another histogram with the same precision."""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms of different precisions")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Get the mean of the recorded values."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile: float) -> Optional[int]:
+        """Get the value at a percentile (0 to 100), None when empty.
+
+        The value is the highest value equivalent to its bucket, capped by the
+        maximum recorded value.
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    def buckets(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterate over the non-empty buckets as (lowest value, highest value, count)."""
+        for index in sorted(self._counts):
+            low, high = self._bounds(index)
+            yield low, high, self._counts[index]
@@ -0,0 +1,306 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Logging configuration and setup.
+
+Records are filtered and enqueued on the calling thread, and handled on a
+listener thread, so logging never blocks a request:
+
+- ``TraceContextFilter`` captures the active trace and span IDs
+- ``RateLimitFilter`` drops records of a call site logging too often
+- ``NonBlockingQueueHandler`` drops records when the queue is full
+
+The listener writes to the console and, through a ``BatchLogRecordProcessor``,
+to the OTLP endpoint of the OpenTelemetry provider (``/v1/logs`` over HTTP, the
+shared channel over gRPC). Set ``OTEL_LOGS_EXPORTER=none`` to keep logs local.
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from os import environ
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from opentelemetry import context as context_api
+from opentelemetry import trace
+from opentelemetry._logs import set_logger_provider
+from opentelemetry.exporter.otlp.proto.grpc import _log_exporter as log_exporter_grpc
+from opentelemetry.exporter.otlp.proto.http import _log_exporter as log_exporter_http
+from opentelemetry.sdk import resources
+from opentelemetry.sdk._logs import LogData, LoggerProvider, LoggingHandler
+from opentelemetry.sdk._logs.export import BatchLogRecordProcessor, LogExporter, LogExportResult
+
+import exceptions
+
+from .providers.factory import create_otel_provider
+from .transport import GrpcTransportConfig, create_grpc_exporter
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] [trace_id=%(otelTraceID)s span_id=%(otelSpanID)s] %(message)s"
+
+# Record fields set by TraceContextFilter, kept out of the exported attributes.
+_CONTEXT_FIELDS = ("otelTraceID", "otelSpanID", "otelTraceSampled", "otelContext")
+
+# Log exporters keyed by (protocol, endpoint, headers, insecure), shared by every
+# setup until one of them is shut down.
+_log_exporters: Dict[Tuple[str, str, Tuple[Tuple[str, str], ...], bool], LogExporter] = {}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_logger_provider: Optional[LoggerProvider] = None
+
+
+class TraceContextFilter(logging.Filter):
+    """Attach the active trace context to the records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.otelTraceID = format(span_context.trace_id, "032x")
+            record.otelSpanID = format(span_context.span_id, "016x")
+            record.otelTraceSampled = span_context.trace_flags.sampled
+        else:
+            record.otelTraceID = "0"
+            record.otelSpanID = "0"
+            record.otelTraceSampled = False
+        record.otelContext = context_api.get_current()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site (logger, file and line).
+
+    Records of WARNING and above are never dropped. The first record let
+    through after some were dropped carries their number in its ``suppressed``
+    attribute.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, max_sites: int = 1024):
+        """Initialize the filter.
+
+        Args:
+            rate: Records per second allowed for each call site
+            burst: Records a call site can log at once
+            max_sites: Call sites tracked before the buckets are reset
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_sites = max_sites
+        self._buckets: Dict[Tuple[str, str, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_sites:
+                    self._buckets.clear()
+                # tokens, last refill, suppressed records
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler dropping records, instead of blocking, when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, keep exc_info for the exception attributes.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ContextLoggingHandler(LoggingHandler):
+    """OTLP logging handler using the trace context captured by TraceContextFilter.
+
+    Records are handled on the listener thread, where the context of the
+    logging thread is not active.
+    """
+
+    @staticmethod
+    def _get_attributes(record: logging.LogRecord):
+        attributes = LoggingHandler._get_attributes(record)
+        for field in _CONTEXT_FIELDS:
+            attributes.pop(field, None)
+        return attributes
+
+    def emit(self, record: logging.LogRecord) -> None:
+        record_context = getattr(record, "otelContext", None)
+        if record_context is None:
+            super().emit(record)
+            return
+        token = context_api.attach(record_context)
+        try:
+            super().emit(record)
+        finally:
+            context_api.detach(token)
+
+
+def _not_from_opentelemetry(record: logging.LogRecord) -> bool:
+    # Export errors logged by the SDK must not be exported again.
+    return not record.name.startswith("opentelemetry")
+
+
+class _SharedLogExporter(LogExporter):
+    """Log exporter of the cache, evicted from it when shut down with its logger provider."""
+
+    def __init__(self, exporter: LogExporter, key: Tuple):
+        self._exporter = exporter
+        self._key = key
+
+    def export(self, batch: Sequence[LogData]) -> LogExportResult:
+        return self._exporter.export(batch)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._exporter.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        if _log_exporters.get(self._key) is self:
+            del _log_exporters[self._key]
+        self._exporter.shutdown()
+
+
+def create_log_exporter(
+    protocol: str,
+    endpoint: str,
+    headers: Dict[str, str],
+    insecure: bool = False,
+) -> LogExporter:
+    """Get the OTLP log exporter for a configuration, shared until it is shut down.
+
+    Args:
+        protocol: Protocol to use (http or grpc)
+        endpoint: OTLP endpoint of the provider
+        headers: Export headers
+        insecure: Disable TLS for gRPC
+
+    Raises:
+        OpenTelemetryProtocolError: If the protocol is not supported
+    """
+    key = (protocol, endpoint, tuple(sorted(headers.items())), insecure)
+    exporter = _log_exporters.get(key)
+    if exporter is not None:
+        return exporter
+
+    if protocol == "http":
+        exporter = log_exporter_http.OTLPLogExporter(
+            endpoint=f"{endpoint}/v1/logs",
+            headers=headers,
+            compression=log_exporter_http.Compression.Gzip,
+        )
+    elif protocol == "grpc":
+        exporter = create_grpc_exporter(
+            log_exporter_grpc.OTLPLogExporter,
+            GrpcTransportConfig.from_env(endpoint, insecure),
+            headers,
+        )
+    else:
+        raise exceptions.OpenTelemetryProtocolError(f"invalid OpenTelemetry protocol: {protocol}")
+
+    return _log_exporters.setdefault(key, _SharedLogExporter(exporter, key))
+
+
+def setup_logging_with_provider(
+    provider_name: Optional[str] = None,
+    protocol: str = None,
+    resource: resources.Resource = None,
+    level: Optional[str] = None,
+    **provider_kwargs,
+) -> Optional[LoggerProvider]:
+    """Configure logging to the console and to an OpenTelemetry provider.
+
+    Setting up an already configured process does nothing.
+
+    Args:
+        provider_name: OTel provider name, None to log to the console only
+        protocol: Protocol to use (http or grpc)
+        resource: OpenTelemetry resource
+        level: Root log level (defaults to env LOG_LEVEL, or INFO)
+        **provider_kwargs: Additional arguments for provider creation
+
+    Returns:
+        The OpenTelemetry logger provider, if logs are exported
+    """
+    global _listener, _queue_handler, _logger_provider
+
+    if _listener is not None:
+        return _logger_provider
+
+    # Records are queued from now on, including the ones of the provider setup.
+    log_queue: queue.Queue = queue.Queue(maxsize=int(environ.get("OTEL_LOGS_QUEUE_SIZE", "10000")))
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(TraceContextFilter())
+    _queue_handler.addFilter(
+        RateLimitFilter(
+            rate=float(environ.get("OTEL_LOGS_RATE_LIMIT", "10")),
+            burst=int(environ.get("OTEL_LOGS_RATE_BURST", "20")),
+        )
+    )
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level or environ.get("LOG_LEVEL", "INFO").upper())
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers: List[logging.Handler] = [console]
+
+    if provider_name and environ.get("OTEL_LOGS_EXPORTER", "otlp") != "none":
+        provider = create_otel_provider(provider_name, **provider_kwargs)
+        protocol = provider.get_export_protocol(protocol)
+        exporter = create_log_exporter(
+            protocol, provider.get_endpoint(), provider.get_headers(), provider.is_insecure()
+        )
+        _logger_provider = LoggerProvider(resource=resource)
+        _logger_provider.add_log_record_processor(BatchLogRecordProcessor(exporter))
+        set_logger_provider(_logger_provider)
+        otlp_handler = ContextLoggingHandler(logger_provider=_logger_provider)
+        otlp_handler.addFilter(_not_from_opentelemetry)
+        handlers.append(otlp_handler)
+        logger.info("OTLP logging configured for %s: %s (%s)", provider.name, provider.get_endpoint(), protocol)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _logger_provider
+
+
+def cleanup_logging():
+    """Flush the queued records and stop the logging pipeline."""
+    global _listener, _queue_handler, _logger_provider
+
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    if _logger_provider is not None:
+        _logger_provider.shutdown()
+    _listener = _queue_handler = _logger_provider = None
@@ -0,0 +1,268 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Sampled CPU, memory and GC profiling of LangChain spans.
+
+``ProfilingSpanProcessor`` wraps the exporting span processor. For a sample of
+the traces, it measures each LangChain span and exports it with these attributes:
+
+- ``profile.cpu_time_ms``: CPU time of the thread running the span, named by
+  ``thread.id`` (absent when the span ends on another thread, e.g. across ``await``)
+- ``profile.gc.pause_ms`` and ``profile.gc.collections``: garbage collections
+  while the span was open, in any thread
+- ``profile.memory.net_bytes``: net traced memory growth, only with
+  ``memory=True`` (tracemalloc slows down every allocation of the process)
+
+Enable it with ``OTEL_PROFILING_SAMPLE_RATIO`` (e.g. ``0.01``) and
+``OTEL_PROFILING_MEMORY=true``. Run as a module, it folds the profiled spans of a
+trace file into flame graph stacks, one frame per chain step::
+
+    python -m telemetry.profiling traces.jsonl --metric cpu > cpu.folded
+    flamegraph.pl cpu.folded > cpu.svg
+"""
+
+import argparse
+import gc
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from opentelemetry import context as context_api
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from .store import SpanRecord, read_spans
+
+LANGCHAIN_SCOPES = ("opentelemetry.instrumentation.langchain",)
+
+CPU_TIME = "profile.cpu_time_ms"
+GC_PAUSE = "profile.gc.pause_ms"
+GC_COLLECTIONS = "profile.gc.collections"
+NET_BYTES = "profile.memory.net_bytes"
+THREAD_ID = "thread.id"
+
+_TRACE_ID_MASK = (1 << 64) - 1
+
+
+class _GCMonitor:
+    """Cumulative garbage collection pause time, fed by ``gc.callbacks``."""
+
+    def __init__(self):
+        self.pause_ns = 0
+        self.collections = 0
+        self._started = 0
+        self._users = 0
+        self._lock = threading.Lock()
+
+    def _callback(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self._started = time.perf_counter_ns()
+        elif self._started:
+            self.pause_ns += time.perf_counter_ns() - self._started
+            self.collections += 1
+            self._started = 0
+
+    def acquire(self) -> None:
+        with self._lock:
+            if not self._users:
+                gc.callbacks.append(self._callback)
+            self._users += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if not self._users:
+                gc.callbacks.remove(self._callback)
+
+
+_gc_monitor = _GCMonitor()
+
+
+class ProfilingSpanProcessor(SpanProcessor):
+    """Span processor adding profiling attributes to a sample of the spans."""
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        sample_ratio: float = 0.01,
+        scopes: Optional[Sequence[str]] = LANGCHAIN_SCOPES,
+        memory: bool = False,
+    ):
+        """Initialize the processor.
+
+        Args:
+            delegate: Processor receiving all the spans, e.g. a BatchSpanProcessor
+            sample_ratio: Ratio of the traces to profile, decided on the trace ID
+                so that all the spans of a trace are profiled together
+            scopes: Instrumentation scopes to profile, None for all spans
+            memory: Trace memory allocations with tracemalloc
+        """
+        self.delegate = delegate
+        self.scopes = frozenset(scopes) if scopes is not None else None
+        self.memory = memory
+        self._bound = round(max(0.0, min(1.0, sample_ratio)) * (_TRACE_ID_MASK + 1))
+        self._started: Dict[int, Tuple[int, int, int, int, int]] = {}
+        self._owns_tracemalloc = memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        _gc_monitor.acquire()
+
+    def _sampled(self, span: ReadableSpan) -> bool:
+        if span.context is None or (span.context.trace_id & _TRACE_ID_MASK) >= self._bound:
+            return False
+        if self.scopes is None:
+            return True
+        return span.instrumentation_scope is not None and span.instrumentation_scope.name in self.scopes
+
+    def on_start(self, span: Span, parent_context: Optional[context_api.Context] = None) -> None:
+        if self._sampled(span):
+            self._started[span.context.span_id] = (
+                threading.get_ident(),
+                time.thread_time_ns(),
+                _gc_monitor.pause_ns,
+                _gc_monitor.collections,
+                tracemalloc.get_traced_memory()[0] if self.memory else 0,
+            )
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        started = self._started.pop(span.context.span_id, None)
+        if started is not None:
+            span = self._profiled(span, *started)
+        self.delegate.on_end(span)
+
+    def _profiled(
+        self, span: ReadableSpan, thread: int, cpu_ns: int, pause_ns: int, collections: int, memory: int
+    ) -> ReadableSpan:
+        attributes = dict(span.attributes or {})
+        if threading.get_ident() == thread:
+            attributes[CPU_TIME] = (time.thread_time_ns() - cpu_ns) / 1e6
+            attributes[THREAD_ID] = thread
+        attributes[GC_PAUSE] = (_gc_monitor.pause_ns - pause_ns) / 1e6
+        attributes[GC_COLLECTIONS] = _gc_monitor.collections - collections
+        if self.memory:
+            attributes[NET_BYTES] = max(0, tracemalloc.get_traced_memory()[0] - memory)
+        return ReadableSpan(
+            name=span.name,
+            context=span.context,
+            parent=span.parent,
+            resource=span.resource,
+            attributes=attributes,
+            events=span.events,
+            links=span.links,
+            kind=span.kind,
+            status=span.status,
+            start_time=span.start_time,
+            end_time=span.end_time,
+            instrumentation_scope=span.instrumentation_scope,
+        )
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+        _gc_monitor.release()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+# Folded stack value of each metric: microseconds, or bytes for memory.
+METRICS = {
+    "wall": lambda span: span.duration_ns // 1000,
+    "cpu": lambda span: _scaled(span.attributes.get(CPU_TIME), 1000),
+    "gc": lambda span: _scaled(span.attributes.get(GC_PAUSE), 1000),
+    "memory": lambda span: span.attributes.get(NET_BYTES),
+}
+
+
+def _scaled(value: Optional[float], factor: int) -> Optional[int]:
+    return None if value is None else int(value * factor)
+
+
+def fold_stacks(spans: Iterable[SpanRecord], metric: str = "cpu") -> Dict[str, int]:
+    """Fold spans into flame graph stacks of span names.
+
+    The value of a stack is the self value of its span: the metric of the span
+    minus the metric of its children (for CPU time, of its children run on the
+    same thread). Spans without the metric (not profiled) only name the frames
+    of their descendants.
+
+    Args:
+        spans: Finished spans, of any number of traces
+        metric: One of METRICS
+
+    Returns:
+        The value of each stack, frames separated by ``;``
+    """
+    value_of = METRICS[metric]
+    by_id: Dict[Tuple[str, str], SpanRecord] = {}
+    values: Dict[Tuple[str, str], int] = {}
+    for span in spans:
+        key = (span.trace_id, span.span_id)
+        by_id[key] = span
+        value = value_of(span)
+        if value is not None:
+            values[key] = value
+
+    self_values = dict(values)
+    for key, value in values.items():
+        span = by_id[key]
+        parent_key = (key[0], span.parent_span_id)
+        if parent_key not in self_values:
+            continue
+        if metric == "cpu" and span.attributes.get(THREAD_ID) != by_id[parent_key].attributes.get(THREAD_ID):
+            continue
+        self_values[parent_key] -= value
+
+    stacks: Dict[str, int] = defaultdict(int)
+    for key, value in self_values.items():
+        frames: List[str] = []
+        current: Optional[SpanRecord] = by_id[key]
+        while current is not None:
+            frames.append(current.name.replace(";", ":"))
+            parent = current.parent_span_id
+            current = by_id.get((key[0], parent)) if parent else None
+        stacks[";".join(reversed(frames))] += max(0, value)
+    return dict(stacks)
+
+
+def summarize_steps(spans: Iterable[SpanRecord]) -> Dict[str, Dict[str, float]]:
+    """Total the profiling attributes of the spans, by chain step (span name)."""
+    steps: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        if CPU_TIME not in span.attributes and GC_PAUSE not in span.attributes:
+            continue
+        step = steps[span.name]
+        step["count"] += 1
+        step["wall_ms"] += span.duration_ns / 1e6
+        step["cpu_ms"] += span.attributes.get(CPU_TIME, 0.0)
+        step["gc_ms"] += span.attributes.get(GC_PAUSE, 0.0)
+        step["net_bytes"] += span.attributes.get(NET_BYTES, 0)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="OTLP/JSON files or trace stores")
+    parser.add_argument("--metric", choices=sorted(METRICS), default="cpu")
+    parser.add_argument("--summary", action="store_true", help="print totals by chain step instead of stacks")
+    args = parser.parse_args()
+
+    spans = [span for path in args.traces for span in read_spans(path)]
+    if args.summary:
+        print(f"{'step':<40} {'count':>7} {'wall ms':>10} {'cpu ms':>10} {'gc ms':>8} {'net KiB':>10}")
+        for name, step in sorted(summarize_steps(spans).items(), key=lambda item: -item[1]["cpu_ms"]):
+            print(
+                f"{name[:40]:<40} {int(step['count']):>7} {step['wall_ms']:>10.1f} {step['cpu_ms']:>10.1f} "
+                f"{step['gc_ms']:>8.1f} {step['net_bytes'] / 1024:>10.1f}"
+            )
+        return
+    for stack, value in sorted(fold_stacks(spans, args.metric).items()):
+        if value:
+            print(f"{stack} {value}")
+
+
+if __name__ == "__main__":
+    main()
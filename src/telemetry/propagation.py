@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Trace context propagation across process and service boundaries.
+
+Uses the global propagator, W3C tracecontext and baggage unless overridden
+with OTEL_PROPAGATORS. HTTP requests carry the context in their headers,
+queue messages in a reserved key of their payload.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+
+PAYLOAD_KEY = "_otel"
+ENQUEUED_AT_KEY = "enqueued_at_ns"
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None, context: Any = None) -> Dict[str, str]:
+    """Add the trace context to outgoing HTTP headers.
+
+    Args:
+        headers: Headers to update (a new dict is created if None)
+        context: Context to propagate (defaults to the current one)
+
+    Returns:
+        The updated headers
+    """
+    headers = {} if headers is None else headers
+    propagate.inject(headers, context=context)
+    return headers
+
+
+def extract_context(headers: Dict[str, str]) -> otel_context.Context:
+    """Get the trace context from incoming HTTP headers."""
+    return propagate.extract({key.lower(): value for key, value in headers.items()})
+
+
+def inject_into_payload(payload: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Attach the trace context to a message payload.
+
+    Args:
+        payload: JSON-serializable message body
+        context: Context to propagate (defaults to the current one)
+
+    Returns:
+        A copy of the payload carrying the context
+    """
+    carrier: Dict[str, str] = {ENQUEUED_AT_KEY: str(time.time_ns())}
+    propagate.inject(carrier, context=context)
+    return {**payload, PAYLOAD_KEY: carrier}
+
+
+def extract_from_payload(payload: Dict[str, Any]) -> Tuple[otel_context.Context, Dict[str, Any]]:
+    """Split a message payload into its trace context and body."""
+    body = dict(payload)
+    carrier = body.pop(PAYLOAD_KEY, None) or {}
+    return propagate.extract(carrier), body
+
+
+@contextmanager
+def consume(
+    payload: Dict[str, Any],
+    name: str,
+    tracer: Optional[trace.Tracer] = None,
+    kind: trace.SpanKind = trace.SpanKind.CONSUMER,
+) -> Iterator[Tuple[trace.Span, Dict[str, Any]]]:
+    """Process a message in a span continuing the producer's trace.
+
+    The time spent in the queue is recorded as ``messaging.queue_time_ms``.
+
+    Args:
+        payload: Message payload produced by inject_into_payload
+        name: Span name
+        tracer: Tracer to use (defaults to this module's tracer)
+        kind: Span kind
+
+    Yields:
+        The span and the message body
+    """
+    parent, body = extract_from_payload(payload)
+    enqueued_at = (payload.get(PAYLOAD_KEY) or {}).get(ENQUEUED_AT_KEY)
+    tracer = tracer or trace.get_tracer(__name__)
+    with tracer.start_as_current_span(name, context=parent, kind=kind) as span:
+        if enqueued_at:
+            span.set_attribute("messaging.queue_time_ms", (time.time_ns() - int(enqueued_at)) / 1e6)
+        yield span, body
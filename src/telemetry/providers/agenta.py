@@ -3,6 +3,7 @@
 
 """AgentaAI OpenTelemetry provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -10,6 +11,8 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 AGENTA_AI_ENDPOINT = "https://cloud.agenta.ai/api/otlp"
 
 
@@ -19,24 +22,35 @@ class AgentaProvider(OTelProvider):
     def __init__(
         self,
         api_key: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
     ):
         """Initialize Agenta provider.
 
         Args:
             api_key: Agenta API key (defaults to env AGENTA_API_KEY)
+            endpoint: OTLP endpoint (defaults to env AGENTA_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env AGENTA_OTLP_PROTOCOL, then the setup protocol)
         """
         self.api_key = api_key or environ.get("AGENTA_API_KEY")
 
+        self.endpoint = (endpoint or environ.get("AGENTA_OTLP_ENDPOINT") or AGENTA_AI_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("AGENTA_OTLP_PROTOCOL")
+
         if not self.api_key:
             raise OpenTelemetryProviderError(
                 "agenta",
                 "Agenta API key is required. Set AGENTA_API_KEY environment variable.",
             )
-        print("Agenta OpenTelemetry provider setup done")
+        logger.info("Agenta OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the Agenta OpenTelemetry endpoint."""
-        return AGENTA_AI_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the Agenta protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get Agenta authentication headers."""
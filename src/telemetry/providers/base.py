@@ -45,3 +45,39 @@ class OTelProvider(ABC):
     def name(self) -> str:
         """Get the provider name."""
         pass
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the protocol preferred by the provider.
+
+        Returns:
+            http, grpc, or None to use the protocol given at setup
+        """
+        return None
+
+    def get_export_protocol(self, protocol: Optional[str] = None) -> Optional[str]:
+        """Get the protocol of the exports.
+
+        Args:
+            protocol: Protocol requested at setup, used when the provider sets none
+                (``<PROVIDER>_OTLP_PROTOCOL`` takes precedence over ``OTEL_EXPORTER_OTLP_PROTOCOL``)
+
+        Returns:
+            http, grpc, or None if neither is set
+        """
+        return self.get_protocol() or protocol
+
+    def is_insecure(self) -> bool:
+        """Check if the gRPC connection should be insecure (no TLS).
+
+        Returns:
+            True for plain ``http://`` endpoints
+        """
+        return self.get_endpoint().startswith("http://")
+
+    def get_batch_options(self) -> Dict[str, int]:
+        """Get BatchSpanProcessor tuning for the provider.
+
+        Returns:
+            Keyword arguments for the batch processor (empty for SDK defaults)
+        """
+        return {}
@@ -3,6 +3,7 @@
 
 """BrainTrust OpenTelemetry provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -10,6 +11,8 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 BRAINTRUST_CLOUD_ENDPOINT = "https://api.braintrust.dev/otel"
 
 
@@ -20,28 +23,39 @@ class BrainTrustProvider(OTelProvider):
         self,
         api_key: Optional[str] = None,
         project_name: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
     ):
         """Initialize BrainTrust provider.
 
         Args:
             api_key: BrainTrust API key (defaults to env BRAINTRUST_API_KEY)
             project_name: BrainTrust project name (defaults to env BRAINTRUST_PROJECT_NAME)
+            endpoint: OTLP endpoint (defaults to env BRAINTRUST_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env BRAINTRUST_OTLP_PROTOCOL, then the setup protocol)
         """
 
         self.api_key = api_key or environ.get("BRAINTRUST_API_KEY")
         self.project_name = project_name or environ.get("BRAINTRUST_PROJECT_NAME")
 
+        self.endpoint = (endpoint or environ.get("BRAINTRUST_OTLP_ENDPOINT") or BRAINTRUST_CLOUD_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("BRAINTRUST_OTLP_PROTOCOL")
+
         if not self.api_key:
             raise OpenTelemetryProviderError(
                 "braintrust",
                 "BrainTrust API key is required. Set BRAINTRUST_API_KEY environment variable.",
             )
 
-        print("BrainTrust OpenTelemetry provider setup done")
+        logger.info("BrainTrust OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the BrainTrust OpenTelemetry endpoint."""
-        return BRAINTRUST_CLOUD_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the BrainTrust protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get BrainTrust authentication headers."""
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Export through a local collector instead of the provider endpoint.
+
+With ``OTEL_EXPORT_VIA_COLLECTOR`` set to a unix domain socket
+(``unix:///var/run/otel/otlp.sock``) or a localhost gRPC endpoint
+(``http://localhost:4317``), every provider exports once, over plain gRPC and
+without authentication headers, to a collector next to the application. The
+collector applies the provider headers when fanning out to the backends (see
+``python -m telemetry.collector_config``), so the application export path has no WAN
+latency and holds no provider secrets.
+"""
+
+import logging
+from os import environ
+from typing import Dict, Optional
+
+from .base import OTelProvider
+
+logger = logging.getLogger(__name__)
+
+VIA_COLLECTOR_ENV = "OTEL_EXPORT_VIA_COLLECTOR"
+
+
+def get_collector_endpoint() -> Optional[str]:
+    """Get the local collector endpoint to export through, None to export directly."""
+    return environ.get(VIA_COLLECTOR_ENV) or None
+
+
+class ViaCollectorProvider(OTelProvider):
+    """Provider routed through a local collector."""
+
+    def __init__(self, provider_name: str, endpoint: str):
+        """Initialize the route.
+
+        Args:
+            provider_name: Name of the provider the collector exports to
+            endpoint: Local collector endpoint (unix socket or localhost gRPC)
+        """
+        self.provider_name = provider_name
+        self.endpoint = endpoint
+        logger.info("Exporting %s telemetry through the collector at %s", provider_name, endpoint)
+
+    def get_endpoint(self) -> str:
+        """Get the local collector endpoint."""
+        return self.endpoint
+
+    def get_headers(self) -> Dict[str, str]:
+        """Get no headers: the collector authenticates to the provider."""
+        return {}
+
+    def get_project_name(self) -> Optional[str]:
+        """Get the project name from the service name."""
+        return environ.get("OTEL_SERVICE_NAME", "ai-llm-lab")
+
+    @property
+    def name(self) -> str:
+        """Get the provider name."""
+        return self.provider_name
+
+    def get_protocol(self) -> str:
+        """Get the protocol of the local collector."""
+        return "grpc"
+
+    def get_export_protocol(self, protocol: Optional[str] = None) -> str:
+        """Get gRPC, the only protocol over unix sockets, whatever the setup protocol."""
+        return "grpc"
+
+    def is_insecure(self) -> bool:
+        """Check if the connection should be insecure (always: local traffic)."""
+        return True
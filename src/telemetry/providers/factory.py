@@ -1,25 +1,30 @@
 # SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
 # SPDX-License-Identifier: Apache-2.0
 
-"""Factory for creating OpenTelemetry providers."""
+"""Factory for creating OpenTelemetry providers.
 
+Providers are resolved through a registry: built-in providers are imported on
+first use, packages can add their own through the
+``llm_observability_lab.otel_providers`` entry point group, and plain OTLP
+backends can be declared in the ``OTEL_PROVIDERS_FILE`` configuration file.
+"""
+
+import functools
 from enum import Enum
 from typing import Any
 
 from exceptions import OpenTelemetryProviderError
+from registry import Registry
 
-from .agenta import AgentaProvider
 from .base import OTelProvider
-from .braintrust import BrainTrustProvider
-from .laminar import LaminarProvider
-from .langfuse import LangfuseProvider
-from .langsmith import LangsmithProvider
-from .otelcollector import OTelCollectorProvider
-from .traceloop import TraceloopProvider
+from .collector import ViaCollectorProvider, get_collector_endpoint
+from .otlp import OTLPProvider, load_provider_definitions
+
+ENTRY_POINT_GROUP = "llm_observability_lab.otel_providers"
 
 
 class OTelProviderType(Enum):
-    """Supported OpenTelemetry provider types."""
+    """Built-in OpenTelemetry provider types."""
 
     LANGSMITH = "langsmith"
     AGENTA = "agenta"
@@ -30,11 +35,60 @@ class OTelProviderType(Enum):
     OTELCOLLECTOR = "otelcollector"
 
 
-def create_otel_provider(provider_name: str, **kwargs: Any) -> OTelProvider:
+registry = Registry(
+    ENTRY_POINT_GROUP,
+    {
+        OTelProviderType.LANGSMITH.value: "telemetry.providers.langsmith:LangsmithProvider",
+        OTelProviderType.AGENTA.value: "telemetry.providers.agenta:AgentaProvider",
+        OTelProviderType.LANGFUSE.value: "telemetry.providers.langfuse:LangfuseProvider",
+        OTelProviderType.TRACELOOP.value: "telemetry.providers.traceloop:TraceloopProvider",
+        OTelProviderType.BRAINTRUST.value: "telemetry.providers.braintrust:BrainTrustProvider",
+        OTelProviderType.LAMINAR.value: "telemetry.providers.laminar:LaminarProvider",
+        OTelProviderType.OTELCOLLECTOR.value: "telemetry.providers.otelcollector:OTelCollectorProvider",
+    },
+)
+
+_definitions_loaded = False
+
+
+def load_provider_config(path: str = None) -> list[str]:
+    """Register the OTLP providers declared in a configuration file.
+
+    Args:
+        path: Definitions file (defaults to env OTEL_PROVIDERS_FILE)
+
+    Returns:
+        Names of the registered providers
+    """
+    definitions = load_provider_definitions(path)
+    for name, definition in definitions.items():
+        registry.register(name, functools.partial(OTLPProvider, name, **definition))
+    return list(definitions)
+
+
+def _ensure_provider_config() -> None:
+    global _definitions_loaded
+    if not _definitions_loaded:
+        _definitions_loaded = True
+        load_provider_config()
+
+
+@functools.lru_cache(maxsize=None)
+def _create_route(provider_name: str, endpoint: str) -> ViaCollectorProvider:
+    return ViaCollectorProvider(provider_name, endpoint)
+
+
+def create_otel_provider(provider_name: str, route: bool = True, **kwargs: Any) -> OTelProvider:
     """Create an OpenTelemetry provider instance.
 
+    Instances are cached per provider name and arguments: providers read their
+    environment once, on first creation. With ``OTEL_EXPORT_VIA_COLLECTOR`` set,
+    the provider is not created: a route to the local collector is returned.
+
     Args:
-        provider: The provider type (langsmith or agenta)
+        provider_name: The provider name (langsmith, langfuse, ...)
+        route: Honour ``OTEL_EXPORT_VIA_COLLECTOR`` (False to create the provider
+            itself, e.g. to configure the collector)
         **kwargs: Provider-specific configuration arguments
 
     Returns:
@@ -43,47 +97,21 @@ def create_otel_provider(provider_name: str, **kwargs: Any) -> OTelProvider:
     Raises:
         OpenTelemetryProviderError: If provider is not supported
     """
-
     if not provider_name:
         raise OpenTelemetryProviderError(provider_name, "Unsupported provider")
-    elif provider_name == OTelProviderType.LANGSMITH.value:
-        return LangsmithProvider(**kwargs)
-    elif provider_name == OTelProviderType.AGENTA.value:
-        return AgentaProvider(**kwargs)
-    elif provider_name == OTelProviderType.LANGFUSE.value:
-        return LangfuseProvider(**kwargs)
-    elif provider_name == OTelProviderType.TRACELOOP.value:
-        return TraceloopProvider(**kwargs)
-    elif provider_name == OTelProviderType.BRAINTRUST.value:
-        return BrainTrustProvider(**kwargs)
-    elif provider_name == OTelProviderType.LAMINAR.value:
-        return LaminarProvider(**kwargs)
-    elif provider_name == OTelProviderType.OTELCOLLECTOR.value:
-        return OTelCollectorProvider(**kwargs)
-    else:
+    _ensure_provider_config()
+    collector_endpoint = get_collector_endpoint() if route else None
+    if collector_endpoint:
+        if provider_name not in registry:
+            raise OpenTelemetryProviderError(provider_name, "Unsupported provider")
+        return _create_route(provider_name, collector_endpoint)
+    try:
+        return registry.create(provider_name, **kwargs)
+    except LookupError:
         raise OpenTelemetryProviderError(provider_name, "Unsupported provider")
 
 
 def get_available_providers() -> list[str]:
     """Get list of available OpenTelemetry providers."""
-    return [provider.value for provider in OTelProviderType]
-
-
-# def create_provider_from_config(config: Dict[str, Any]) -> OTelProvider:
-#     """Create a provider from configuration dictionary.
-
-#     Args:
-#         config: Configuration dictionary with 'type' key and provider-specific options
-
-#     Returns:
-#         Configured OTel provider instance
-
-#     Example:
-#         config = {
-#             "type": "langsmith",
-#             "project_name": "my-project",
-#             "api_key": "sk-..."
-#         }
-#     """
-#     provider_type = config.pop("type")
-#     return create_otel_provider(provider_type, **config)
+    _ensure_provider_config()
+    return registry.names()
@@ -3,6 +3,7 @@
 
 """Laminar OpenTelemetry provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -10,6 +11,8 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 LAMINAR_CLOUD_ENDPOINT = "https://api.lmnr.ai:8443"
 
 
@@ -22,27 +25,38 @@ class LaminarProvider(OTelProvider):
         team_id: Optional[str] = None,
         base_url: Optional[str] = None,
         environment: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
     ):
         """Initialize Laminar provider.
 
         Args:
             api_key: Laminar API key (defaults to env LAMINAR_API_KEY)
             team_id: Laminar team ID (defaults to env LAMINAR_TEAM_ID)
+            endpoint: OTLP endpoint (defaults to env LAMINAR_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env LAMINAR_OTLP_PROTOCOL, then the setup protocol)
         """
         self.api_key = api_key or environ.get("LAMINAR_API_KEY")
         self.project_id = team_id or environ.get("LAMINAR_TEAM_ID")
 
+        self.endpoint = (endpoint or environ.get("LAMINAR_OTLP_ENDPOINT") or LAMINAR_CLOUD_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("LAMINAR_OTLP_PROTOCOL")
+
         if not self.api_key:
             raise OpenTelemetryProviderError(
                 "laminar",
                 "Laminar API key is required. Set LAMINAR_API_KEY environment variable.",
             )
 
-        print("Laminar OpenTelemetry provider setup done")
+        logger.info("Laminar OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the Laminar OpenTelemetry endpoint."""
-        return LAMINAR_CLOUD_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the Laminar protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get Laminar authentication headers."""
@@ -4,6 +4,7 @@
 """Langfuse OpenTelemetry provider."""
 
 import base64
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -11,6 +12,8 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 LANGFUSE_CLOUD_ENDPOINT = "https://cloud.langfuse.com/api/public/otel"
 
 
@@ -21,16 +24,23 @@ class LangfuseProvider(OTelProvider):
         self,
         secret_key: Optional[str] = None,
         public_key: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
     ):
         """Initialize Langfuse provider.
 
         Args:
             api_key: Langfuse API key (defaults to env LANGFUSE_API_KEY)
             secret_key: Langfuse secret key (defaults to env LANGFUSE_SECRET_KEY)
+            endpoint: OTLP endpoint (defaults to env LANGFUSE_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env LANGFUSE_OTLP_PROTOCOL, then the setup protocol)
         """
         self.secret_key = secret_key or environ.get("LANGFUSE_SECRET_KEY")
         self.public_key = public_key or environ.get("LANGFUSE_PUBLIC_KEY")
 
+        self.endpoint = (endpoint or environ.get("LANGFUSE_OTLP_ENDPOINT") or LANGFUSE_CLOUD_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("LANGFUSE_OTLP_PROTOCOL")
+
         if not self.public_key:
             raise OpenTelemetryProviderError(
                 "langfuse",
@@ -42,11 +52,15 @@ class LangfuseProvider(OTelProvider):
                 "Langfuse secret key is required. Set LANGFUSE_SECRET_KEY environment variable.",
             )
 
-        print("Langfuse OpenTelemetry provider setup done")
+        logger.info("Langfuse OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the Langfuse OpenTelemetry endpoint."""
-        return LANGFUSE_CLOUD_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the Langfuse protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get Langfuse authentication headers."""
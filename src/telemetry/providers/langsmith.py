@@ -3,6 +3,7 @@
 
 """Langsmith OpenTelemetry provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -10,32 +11,49 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 LANGSMITH_ENDPOINT = "https://api.smith.langchain.com/otel"
 
 
 class LangsmithProvider(OTelProvider):
     """Langsmith OpenTelemetry provider implementation."""
 
-    def __init__(self, project_name: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        project_name: Optional[str] = None,
+        api_key: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
+    ):
         """Initialize Langsmith provider.
 
         Args:
             project_name: Langsmith project name (defaults to env LANGSMITH_PROJECT)
             api_key: Langsmith API key (defaults to env LANGSMITH_API_KEY)
+            endpoint: OTLP endpoint (defaults to env LANGSMITH_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env LANGSMITH_OTLP_PROTOCOL, then the setup protocol)
         """
         self.project_name = project_name or environ.get("LANGSMITH_PROJECT")
         self.api_key = api_key or environ.get("LANGSMITH_API_KEY")
 
+        self.endpoint = (endpoint or environ.get("LANGSMITH_OTLP_ENDPOINT") or LANGSMITH_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("LANGSMITH_OTLP_PROTOCOL")
+
         if not self.api_key:
             raise OpenTelemetryProviderError(
                 "langsmith",
                 "Langsmith API key is required. Set LANGSMITH_API_KEY environment variable.",
             )
-        print("Langsmith OpenTelemetry provider setup done")
+        logger.info("Langsmith OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the Langsmith OpenTelemetry endpoint."""
-        return LANGSMITH_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the Langsmith protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get Langsmith authentication headers."""
@@ -3,11 +3,14 @@
 
 """OpenTelemetry Collector provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 OTEL_COLLECTOR_GRPC_ENDPOINT = "http://localhost:4317"
 OTEL_COLLECTOR_HTTP_ENDPOINT = "http://localhost:4318"
 
@@ -18,20 +21,29 @@ class OTelCollectorProvider(OTelProvider):
     def __init__(
         self,
         protocol: Optional[str] = None,
+        insecure: Optional[bool] = None,
+        endpoint: Optional[str] = None,
     ):
         """Initialize OpenTelemetry Collector provider.
 
         Args:
             protocol: Protocol to use - http or grpc (defaults to env OTEL_EXPORTER_OTLP_PROTOCOL)
+            insecure: Disable TLS for gRPC (defaults to env OTEL_EXPORTER_OTLP_INSECURE,
+                then to True for http:// endpoints)
+            endpoint: Collector endpoint (defaults to env OTEL_EXPORTER_OTLP_ENDPOINT, then to
+                the local collector port of the protocol)
         """
         self.protocol = protocol or environ.get("OTEL_EXPORTER_OTLP_PROTOCOL", "grpc")
-        if self.protocol == "http":
-            endpoint = OTEL_COLLECTOR_HTTP_ENDPOINT
-        else:
-            endpoint = OTEL_COLLECTOR_GRPC_ENDPOINT
-        self.endpoint = endpoint
+        endpoint = endpoint or environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+        if not endpoint:
+            endpoint = OTEL_COLLECTOR_HTTP_ENDPOINT if self.protocol == "http" else OTEL_COLLECTOR_GRPC_ENDPOINT
+        self.endpoint = endpoint.rstrip("/")
+        if insecure is None:
+            insecure_env = environ.get("OTEL_EXPORTER_OTLP_INSECURE")
+            insecure = insecure_env.lower() == "true" if insecure_env else endpoint.startswith("http://")
+        self.insecure = insecure
         self.headers = {}
-        print(f"OpenTelemetry Collector provider setup done - {self.protocol}://{self.endpoint}")
+        logger.info("OpenTelemetry Collector provider setup done - %s (%s)", self.endpoint, self.protocol)
 
     def get_endpoint(self) -> str:
         """Get the OpenTelemetry Collector endpoint."""
@@ -57,3 +69,7 @@ class OTelCollectorProvider(OTelProvider):
     def get_protocol(self) -> str:
         """Get the protocol being used."""
         return self.protocol
+
+    def get_export_protocol(self, protocol: Optional[str] = None) -> str:
+        """Get the setup protocol, then the collector one: both default to OTEL_EXPORTER_OTLP_PROTOCOL."""
+        return protocol or self.protocol
@@ -0,0 +1,120 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Generic OTLP provider defined from configuration.
+
+Definitions are read from a TOML file (``OTEL_PROVIDERS_FILE``), so an OTLP
+backend can be added without code:
+
+    [providers.honeycomb]
+    endpoint = "https://api.honeycomb.io"
+    protocol = "http"
+    headers = { "x-honeycomb-team" = "${env:HONEYCOMB_API_KEY}" }
+
+    [providers.honeycomb.batch]
+    max_export_batch_size = 1024
+    schedule_delay_millis = 2000
+"""
+
+import re
+import tomllib
+from os import environ
+from typing import Any, Dict, Optional
+
+from exceptions import OpenTelemetryProviderError
+
+from .base import OTelProvider
+
+PROVIDERS_FILE_ENV = "OTEL_PROVIDERS_FILE"
+
+BATCH_OPTIONS = (
+    "max_queue_size",
+    "schedule_delay_millis",
+    "max_export_batch_size",
+    "export_timeout_millis",
+)
+
+_ENV_REFERENCE = re.compile(r"\$\{env:(\w+)\}")
+
+
+def expand_env(value: str) -> str:
+    """Replace ``${env:VAR}`` references, as in the collector configuration."""
+    return _ENV_REFERENCE.sub(lambda match: environ.get(match.group(1), ""), value)
+
+
+class OTLPProvider(OTelProvider):
+    """OpenTelemetry provider for any OTLP endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        endpoint: str,
+        protocol: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        project_name: Optional[str] = None,
+        batch: Optional[Dict[str, int]] = None,
+    ):
+        """Initialize a generic OTLP provider.
+
+        Args:
+            name: Provider name
+            endpoint: OTLP endpoint, ``${env:VAR}`` references are expanded
+            protocol: Protocol to use (http or grpc), defaults to the setup protocol
+            headers: Export headers, ``${env:VAR}`` references are expanded
+            project_name: Project name reported by the provider
+            batch: BatchSpanProcessor tuning
+        """
+        unknown = set(batch or {}) - set(BATCH_OPTIONS)
+        if unknown:
+            raise OpenTelemetryProviderError(name, f"Unknown batch options: {', '.join(sorted(unknown))}")
+        if protocol not in (None, "http", "grpc"):
+            raise OpenTelemetryProviderError(name, f"Unsupported protocol: {protocol}")
+
+        self._name = name
+        self.endpoint = expand_env(endpoint).rstrip("/")
+        self.protocol = protocol
+        self.headers = {key: expand_env(str(value)) for key, value in (headers or {}).items()}
+        self.project_name = project_name
+        self.batch = dict(batch or {})
+
+    def get_endpoint(self) -> str:
+        """Get the configured OTLP endpoint."""
+        return self.endpoint
+
+    def get_headers(self) -> Dict[str, str]:
+        """Get the configured headers."""
+        return self.headers
+
+    def get_project_name(self) -> Optional[str]:
+        """Get the configured project name."""
+        return self.project_name
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the configured protocol."""
+        return self.protocol
+
+    def get_batch_options(self) -> Dict[str, int]:
+        """Get the configured batch tuning."""
+        return self.batch
+
+    @property
+    def name(self) -> str:
+        """Get the provider name."""
+        return self._name
+
+
+def load_provider_definitions(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Load OTLP provider definitions from a TOML file.
+
+    Args:
+        path: Definitions file (defaults to env OTEL_PROVIDERS_FILE)
+
+    Returns:
+        Provider definitions by name, empty if no file is configured
+    """
+    path = path or environ.get(PROVIDERS_FILE_ENV)
+    if not path:
+        return {}
+    with open(path, "rb") as config_file:
+        config = tomllib.load(config_file)
+    return config.get("providers", {})
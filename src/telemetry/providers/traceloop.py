@@ -3,6 +3,7 @@
 
 """Traceloop OpenTelemetry provider."""
 
+import logging
 from os import environ
 from typing import Dict, Optional
 
@@ -10,6 +11,8 @@ from exceptions import OpenTelemetryProviderError
 
 from .base import OTelProvider
 
+logger = logging.getLogger(__name__)
+
 TRACELOOP_CLOUD_ENDPOINT = "https://api.traceloop.com"
 
 
@@ -20,27 +23,38 @@ class TraceloopProvider(OTelProvider):
         self,
         api_key: Optional[str] = None,
         destination_id: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        protocol: Optional[str] = None,
     ):
         """Initialize Traceloop provider.
 
         Args:
             api_key: Traceloop API key (defaults to env TRACELOOP_API_KEY)
             destination_id: Traceloop destination (defaults to env TRACELOOP_DESTINATION or "production")
+            endpoint: OTLP endpoint (defaults to env TRACELOOP_OTLP_ENDPOINT, then the cloud endpoint)
+            protocol: Protocol to use - http or grpc (defaults to env TRACELOOP_OTLP_PROTOCOL, then the setup protocol)
         """
         self.api_key = api_key or environ.get("TRACELOOP_API_KEY")
         self.environment = destination_id or environ.get("TRACELOOP_DESTINATION", "production")
 
+        self.endpoint = (endpoint or environ.get("TRACELOOP_OTLP_ENDPOINT") or TRACELOOP_CLOUD_ENDPOINT).rstrip("/")
+        self.protocol = protocol or environ.get("TRACELOOP_OTLP_PROTOCOL")
+
         if not self.api_key:
             raise OpenTelemetryProviderError(
                 "traceloop",
                 "Traceloop API key is required. Set TRACELOOP_API_KEY environment variable.",
             )
 
-        print("Traceloop OpenTelemetry provider setup done")
+        logger.info("Traceloop OpenTelemetry provider setup done")
 
     def get_endpoint(self) -> str:
         """Get the Traceloop OpenTelemetry endpoint."""
-        return TRACELOOP_CLOUD_ENDPOINT
+        return self.endpoint
+
+    def get_protocol(self) -> Optional[str]:
+        """Get the Traceloop protocol, None to use the setup protocol."""
+        return self.protocol
 
     def get_headers(self) -> Dict[str, str]:
         """Get Traceloop authentication headers."""
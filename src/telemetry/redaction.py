@@ -0,0 +1,193 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""PII redaction of exported spans.
+
+``RedactingSpanExporter`` wraps the span exporter, so redaction runs in the
+batch processor worker thread rather than on the request threads. Values are
+first checked with string methods for the literals or digits each pattern
+needs; the patterns that may match are combined into a single precompiled
+regular expression, so each value is scanned once whatever the number of
+patterns. Redacted values are memoized, so repeated values such as system
+prompts are only scanned once.
+
+Enabled by default in ``setup_tracing_with_provider``; set
+``OTEL_REDACTION=false`` to export attributes unchanged.
+"""
+
+import functools
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from opentelemetry.sdk.trace import Event, ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+@dataclass(frozen=True)
+class Pattern:
+    """A PII pattern, with cheap necessary conditions checked before the regex.
+
+    Attributes:
+        regex: Regular expression of the PII
+        literals: Substrings of which a match contains at least one
+        min_digits: Digits a match contains at least
+    """
+
+    regex: str
+    literals: Tuple[str, ...] = ()
+    min_digits: int = 0
+
+    def may_match(self, text: str) -> bool:
+        """Check the conditions, with string methods much faster than the regex."""
+        if self.literals and not any(literal in text for literal in self.literals):
+            return False
+        return not self.min_digits or sum(map(text.count, "0123456789")) >= self.min_digits
+
+
+# Digits of an international phone number (E.164: at most 15).
+PHONE_DIGITS = (9, 15)
+
+# Patterns by kind, matched in this order at a given position.
+PATTERNS: Dict[str, Pattern] = {
+    "email": Pattern(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}", literals=("@",)),
+    "api_key": Pattern(
+        r"\b(?:sk-(?:ant-|proj-)?[A-Za-z0-9_-]{20,}|pk-lf-[A-Za-z0-9-]{20,}|AKIA[0-9A-Z]{16}"
+        r"|gh[pousr]_[A-Za-z0-9]{36,}|xox[abpr]-[A-Za-z0-9-]{10,})\b"
+        r"|\bBearer\s+[A-Za-z0-9._~+/-]{16,}=*",
+        literals=("sk-", "pk-lf-", "AKIA", "ghp_", "gho_", "ghu_", "ghs_", "ghr_", "xox", "Bearer"),
+    ),
+    "phone": Pattern(
+        # Not within a word, a time or a dashed or dotted identifier (e.g. a UUID), nor an ISO date or an IPv4
+        # address. Digits are grouped by a leading country code (which may be followed by a one digit group,
+        # "+33 6"), an area code in parentheses or separators, so bare numbers (timestamps, counts, IDs) are kept.
+        r"(?<![\w+:])(?<!\w[.-])"
+        r"(?!\d{4}-\d{2}-\d{2}(?!\d))(?!\d{1,3}(?:\.\d{1,3}){3}(?!\.?\d))"
+        r"(?:\+\d{1,3}[\s.-]?(?:\(\d{1,4}\)|\d{1,4})(?:[\s.-]?(?:\(\d{1,4}\)|\d{2,4})){2,5}"
+        r"|\(\d{1,4}\)(?:[\s.-]?\d{2,4}){2,5}"
+        r"|\d{1,4}(?:[\s.-](?:\(\d{1,4}\)|\d{2,4})){2,5})"
+        r"(?![\w:]|[.-]\w)",
+        min_digits=PHONE_DIGITS[0],
+    ),
+}
+
+
+class Redactor:
+    """Replace the PII of text values by ``[REDACTED:<kind>]``.
+
+    Examples (``python -m doctest telemetry/redaction.py``):
+        >>> redactor = Redactor()
+        >>> redactor.redact("call +33 6 12 34 56 78 or (415) 555-0100, mail jane.doe@example.com")
+        'call [REDACTED:phone] or [REDACTED:phone], mail [REDACTED:email]'
+        >>> redactor.redact("date 2026-10-19 12:40:53, ip 192.168.100.200")
+        'date 2026-10-19 12:40:53, ip 192.168.100.200'
+        >>> redactor.redact("request 123e4567-e89b-12d3-a456-426614174000")
+        'request 123e4567-e89b-12d3-a456-426614174000'
+        >>> redactor.redact("timestamp 1729340000123, tokens: 123456789, id=987654321")
+        'timestamp 1729340000123, tokens: 123456789, id=987654321'
+        >>> redactor.redact("call +14155550100 or 06.12.34.56.78")
+        'call [REDACTED:phone] or [REDACTED:phone]'
+    """
+
+    def __init__(self, patterns: Mapping[str, Pattern] = PATTERNS, cache_size: int = 4096):
+        """Initialize the redactor.
+
+        Args:
+            patterns: Patterns by kind (valid group names)
+            cache_size: Number of distinct values whose redaction is memoized
+        """
+        self.patterns = dict(patterns)
+        self.redact = functools.lru_cache(maxsize=cache_size)(self._redact)
+        self._combined = functools.lru_cache(maxsize=None)(self._compile)
+
+    def _compile(self, kinds: Tuple[str, ...]) -> re.Pattern:
+        # A single regex for the kinds a value may contain, compiled once per combination.
+        return re.compile("|".join(f"(?P<{kind}>{self.patterns[kind].regex})" for kind in kinds))
+
+    def _replace(self, match: re.Match) -> str:
+        kind = match.lastgroup
+        if kind == "phone":
+            digits = sum(character.isdigit() for character in match.group())
+            if not PHONE_DIGITS[0] <= digits <= PHONE_DIGITS[1]:
+                return match.group()
+        return f"[REDACTED:{kind}]"
+
+    def _redact(self, text: str) -> str:
+        kinds = tuple(kind for kind, pattern in self.patterns.items() if pattern.may_match(text))
+        if not kinds:
+            return text
+        redacted = self._combined(kinds).sub(self._replace, text)
+        # Keep the original object when nothing matched, to detect changes by identity.
+        return text if redacted == text else redacted
+
+    def redact_value(self, value: Any) -> Any:
+        """Redact a string attribute value, or the strings of a sequence."""
+        if isinstance(value, str):
+            return self.redact(value)
+        if isinstance(value, (tuple, list)) and value and isinstance(value[0], str):
+            redacted = tuple(self.redact(item) for item in value)
+            return value if all(new is old for new, old in zip(redacted, value)) else redacted
+        return value
+
+    def redact_attributes(self, attributes: Optional[Mapping[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Redact attributes, None when nothing changed."""
+        if not attributes:
+            return None
+        redacted = {}
+        changed = False
+        for key, value in attributes.items():
+            redacted[key] = self.redact_value(value)
+            changed = changed or redacted[key] is not value
+        return redacted if changed else None
+
+
+class RedactingSpanExporter(SpanExporter):
+    """Span exporter redacting span and event attributes before delegating."""
+
+    def __init__(self, delegate: SpanExporter, redactor: Optional[Redactor] = None):
+        """Initialize the exporter.
+
+        Args:
+            delegate: Span exporter receiving the redacted spans
+            redactor: Redactor (defaults to the built-in patterns)
+        """
+        self.delegate = delegate
+        self.redactor = redactor or Redactor()
+
+    def redact_span(self, span: ReadableSpan) -> ReadableSpan:
+        """Get a span with redacted attributes (the span itself if nothing changed)."""
+        attributes = self.redactor.redact_attributes(span.attributes)
+        events = []
+        events_changed = False
+        for event in span.events:
+            event_attributes = self.redactor.redact_attributes(event.attributes)
+            if event_attributes is None:
+                events.append(event)
+            else:
+                events.append(Event(event.name, event_attributes, event.timestamp))
+                events_changed = True
+        if attributes is None and not events_changed:
+            return span
+        return ReadableSpan(
+            name=span.name,
+            context=span.context,
+            parent=span.parent,
+            resource=span.resource,
+            attributes=attributes if attributes is not None else span.attributes,
+            events=events,
+            links=span.links,
+            kind=span.kind,
+            status=span.status,
+            start_time=span.start_time,
+            end_time=span.end_time,
+            instrumentation_scope=span.instrumentation_scope,
+        )
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        return self.delegate.export([self.redact_span(span) for span in spans])
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Span volume reduction: collapsed chain steps and deduplicated attribute values.
+
+``CollapsingSpanProcessor`` drops the spans of low-value chain steps (by
+default the ``TransformChain``, prompt template and output parser steps of
+``core.chain``, nearly identical for every request) and records them on their
+parent span instead, as a count and a duration histogram per step name::
+
+    collapsed.ChatPromptTemplate.task.count = 2
+    collapsed.ChatPromptTemplate.task.duration_us.sum = 412
+    collapsed.ChatPromptTemplate.task.duration_us.bucket_bounds = [198, 214]
+    collapsed.ChatPromptTemplate.task.duration_us.bucket_counts = [1, 1]
+
+Only leaf spans that ended without error, while their parent was still open,
+are collapsed; spans carrying ``gen_ai.*`` model attributes never are.
+
+``DeduplicatingSpanExporter`` replaces long attribute values repeated within an
+export batch, such as system prompts, by a reference to their first occurrence
+in the batch: ``[dedup:<span id>:<attribute>]``.
+
+Both are disabled by default in ``setup_tracing_with_provider``: collapsing is
+enabled by ``OTEL_COLLAPSED_SPANS``, a comma separated list of span name
+patterns (e.g. ``COLLAPSED_SPANS``), and deduplication by
+``OTEL_DEDUP_MIN_LENGTH``.
+"""
+
+import fnmatch
+import functools
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from opentelemetry import context as context_api
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import StatusCode
+
+from .histogram import Histogram
+
+# Steps of core.chain with the same inputs, outputs and timings on every request.
+COLLAPSED_SPANS = ("TransformChain.task", "ChatPromptTemplate.task", "StrOutputParser.task")
+
+COLLAPSED_PREFIX = "collapsed."
+
+
+def _replace_attributes(span: ReadableSpan, attributes: Dict[str, Any]) -> ReadableSpan:
+    return ReadableSpan(
+        name=span.name,
+        context=span.context,
+        parent=span.parent,
+        resource=span.resource,
+        attributes=attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class CollapsingSpanProcessor(SpanProcessor):
+    """Span processor folding low-value leaf spans into attributes of their parent."""
+
+    def __init__(self, delegate: SpanProcessor, patterns: Sequence[str] = COLLAPSED_SPANS):
+        """Initialize the processor.
+
+        Args:
+            delegate: Span processor receiving the remaining spans
+            patterns: Names of the spans to collapse (``fnmatch`` patterns)
+        """
+        self.delegate = delegate
+        self.patterns = tuple(patterns)
+        self.collapsed = 0
+        self._matches = functools.lru_cache(maxsize=1024)(self._match)
+        # Open spans by ID: whether a child started, and the histograms of the collapsed children.
+        self._open: Dict[int, Tuple[bool, Optional[Dict[str, Histogram]]]] = {}
+        self._lock = threading.Lock()
+
+    def _match(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def on_start(self, span: Span, parent_context: Optional[context_api.Context] = None) -> None:
+        with self._lock:
+            self._open[span.context.span_id] = (False, None)
+            if span.parent is not None and span.parent.span_id in self._open:
+                self._open[span.parent.span_id] = (True, self._open[span.parent.span_id][1])
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def _collapsible(self, span: ReadableSpan, has_children: bool) -> bool:
+        return (
+            not has_children
+            and span.parent is not None
+            and self._matches(span.name)
+            and span.status.status_code is not StatusCode.ERROR
+            and not span.events
+            and "gen_ai.system" not in span.attributes
+        )
+
+    def on_end(self, span: ReadableSpan) -> None:
+        with self._lock:
+            has_children, children = self._open.pop(span.context.span_id, (False, None))
+            parent = self._open.get(span.parent.span_id) if span.parent is not None else None
+            if parent is not None and self._collapsible(span, has_children):
+                histograms = parent[1] if parent[1] is not None else {}
+                histogram = histograms.setdefault(span.name, Histogram())
+                histogram.record((span.end_time - span.start_time) / 1000)
+                self._open[span.parent.span_id] = (parent[0], histograms)
+                self.collapsed += 1
+                return
+        if children:
+            attributes = dict(span.attributes)
+            for name, histogram in children.items():
+                prefix = f"{COLLAPSED_PREFIX}{name}."
+                buckets = list(histogram.buckets())
+                attributes[prefix + "count"] = histogram.count
+                attributes[prefix + "duration_us.sum"] = histogram.total
+                attributes[prefix + "duration_us.min"] = histogram.min
+                attributes[prefix + "duration_us.max"] = histogram.max
+                attributes[prefix + "duration_us.bucket_bounds"] = [high for _, high, _ in buckets]
+                attributes[prefix + "duration_us.bucket_counts"] = [count for _, _, count in buckets]
+            span = _replace_attributes(span, attributes)
+        self.delegate.on_end(span)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+class DeduplicatingSpanExporter(SpanExporter):
+    """Span exporter replacing long values repeated within a batch by references."""
+
+    def __init__(self, delegate: SpanExporter, min_length: int = 256):
+        """Initialize the exporter.
+
+        Args:
+            delegate: Span exporter receiving the deduplicated spans
+            min_length: Shortest string value replaced when repeated
+        """
+        self.delegate = delegate
+        self.min_length = min_length
+
+    def deduplicate(self, spans: Sequence[ReadableSpan]) -> list:
+        """Get the spans of a batch with their repeated long values replaced."""
+        first: Dict[str, str] = {}
+        deduplicated = []
+        for span in spans:
+            attributes = None
+            for key, value in span.attributes.items():
+                if not isinstance(value, str) or len(value) < self.min_length:
+                    continue
+                own = f"[dedup:{span.context.span_id:016x}:{key}]"
+                reference = first.setdefault(value, own)
+                if reference != own:
+                    if attributes is None:
+                        attributes = dict(span.attributes)
+                    attributes[key] = reference
+            deduplicated.append(span if attributes is None else _replace_attributes(span, attributes))
+        return deduplicated
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        return self.delegate.export(self.deduplicate(spans))
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
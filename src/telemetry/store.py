@@ -0,0 +1,220 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Local trace store and readers for exported spans.
+
+Spans are read from three formats:
+
+- OTLP/JSON, as written by the collector ``file`` exporter: one
+  ``ExportTraceServiceRequest`` per line, or a single JSON document
+- OTLP protobuf, as written by the collector ``file`` exporter with
+  ``format: proto``: ``ExportTraceServiceRequest`` messages, each prefixed
+  with its length (4 bytes, big-endian), or a single message (``.pb`` files)
+- the local trace store: one flattened span per line, written by
+  ``TraceStoreSpanExporter`` (enabled with ``OTEL_TRACE_STORE=<path>``)
+"""
+
+import itertools
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.proto.common.v1.common_pb2 import AnyValue
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+@dataclass
+class SpanRecord:
+    """A finished span, independent of the export format."""
+
+    trace_id: str
+    span_id: str
+    name: str
+    start_ns: int
+    end_ns: int
+    parent_span_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    resource: Dict[str, Any] = field(default_factory=dict)
+    scope: Optional[str] = None
+    status: str = "UNSET"
+
+    @property
+    def duration_ns(self) -> int:
+        """Get the span duration in nanoseconds."""
+        return self.end_ns - self.start_ns
+
+    @classmethod
+    def from_span(cls, span: ReadableSpan) -> "SpanRecord":
+        """Flatten an SDK span."""
+        return cls(
+            trace_id=format(span.context.trace_id, "032x"),
+            span_id=format(span.context.span_id, "016x"),
+            name=span.name,
+            start_ns=span.start_time,
+            end_ns=span.end_time,
+            parent_span_id=format(span.parent.span_id, "016x") if span.parent else None,
+            attributes=dict(span.attributes or {}),
+            resource=dict(span.resource.attributes) if span.resource else {},
+            scope=span.instrumentation_scope.name if span.instrumentation_scope else None,
+            status=span.status.status_code.name,
+        )
+
+
+def _any_value(value: Dict[str, Any]) -> Any:
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "boolValue" in value:
+        return value["boolValue"]
+    if "arrayValue" in value:
+        return [_any_value(item) for item in value["arrayValue"].get("values", [])]
+    if "kvlistValue" in value:
+        return _attributes(value["kvlistValue"].get("values", []))
+    if "bytesValue" in value:
+        return value["bytesValue"]
+    return None
+
+
+def _attributes(key_values: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    return {item["key"]: _any_value(item.get("value", {})) for item in key_values}
+
+
+_STATUS_CODES = {0: "UNSET", 1: "OK", 2: "ERROR", "STATUS_CODE_OK": "OK", "STATUS_CODE_ERROR": "ERROR"}
+
+
+def parse_otlp_json(document: Dict[str, Any]) -> Iterator[SpanRecord]:
+    """Flatten the spans of an OTLP/JSON ``ExportTraceServiceRequest``."""
+    for resource_spans in document.get("resourceSpans", []):
+        resource = _attributes(resource_spans.get("resource", {}).get("attributes", []))
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            scope = scope_spans.get("scope", {}).get("name")
+            for span in scope_spans.get("spans", []):
+                yield SpanRecord(
+                    trace_id=span["traceId"],
+                    span_id=span["spanId"],
+                    name=span["name"],
+                    start_ns=int(span["startTimeUnixNano"]),
+                    end_ns=int(span["endTimeUnixNano"]),
+                    parent_span_id=span.get("parentSpanId") or None,
+                    attributes=_attributes(span.get("attributes", [])),
+                    resource=resource,
+                    scope=scope,
+                    status=_STATUS_CODES.get(span.get("status", {}).get("code", 0), "UNSET"),
+                )
+
+
+def _proto_value(value: AnyValue) -> Any:
+    kind = value.WhichOneof("value")
+    if kind == "array_value":
+        return [_proto_value(item) for item in value.array_value.values]
+    if kind == "kvlist_value":
+        return {item.key: _proto_value(item.value) for item in value.kvlist_value.values}
+    return getattr(value, kind) if kind else None
+
+
+_PROTO_STATUS_CODES = {0: "UNSET", 1: "OK", 2: "ERROR"}
+
+
+def parse_otlp_proto(request: ExportTraceServiceRequest) -> Iterator[SpanRecord]:
+    """Flatten the spans of an OTLP protobuf ``ExportTraceServiceRequest``."""
+    for resource_spans in request.resource_spans:
+        resource = {item.key: _proto_value(item.value) for item in resource_spans.resource.attributes}
+        for scope_spans in resource_spans.scope_spans:
+            scope = scope_spans.scope.name or None
+            for span in scope_spans.spans:
+                yield SpanRecord(
+                    trace_id=span.trace_id.hex(),
+                    span_id=span.span_id.hex(),
+                    name=span.name,
+                    start_ns=span.start_time_unix_nano,
+                    end_ns=span.end_time_unix_nano,
+                    parent_span_id=span.parent_span_id.hex() or None,
+                    attributes={item.key: _proto_value(item.value) for item in span.attributes},
+                    resource=resource,
+                    scope=scope,
+                    status=_PROTO_STATUS_CODES.get(span.status.code, "UNSET"),
+                )
+
+
+PROTO_SUFFIXES = (".pb", ".binpb")
+
+
+def _is_protobuf(path: str) -> bool:
+    if path.endswith(PROTO_SUFFIXES):
+        return True
+    with open(path, "rb") as spans_file:
+        # Length prefixes of messages under 16 MiB start with a zero byte, never found in JSON.
+        return spans_file.read(1) == b"\x00"
+
+
+def read_otlp_proto(path: str) -> Iterator[SpanRecord]:
+    """Stream the spans of an OTLP protobuf file, one message in memory at a time."""
+    with open(path, "rb") as spans_file:
+        prefix = spans_file.read(4)
+        if prefix[:1] == b"\n":
+            # A single, unframed message (its first field, resource_spans, has tag 0x0a).
+            yield from parse_otlp_proto(ExportTraceServiceRequest.FromString(prefix + spans_file.read()))
+            return
+        while len(prefix) == 4:
+            message = spans_file.read(int.from_bytes(prefix, "big"))
+            yield from parse_otlp_proto(ExportTraceServiceRequest.FromString(message))
+            prefix = spans_file.read(4)
+
+
+def read_spans(path: str) -> Iterator[SpanRecord]:
+    """Stream the spans of an OTLP/JSON or protobuf file, or of a local trace store."""
+    if os.path.getsize(path) and _is_protobuf(path):
+        yield from read_otlp_proto(path)
+        return
+    with open(path) as spans_file:
+        first_line = spans_file.readline()
+        if not first_line.strip():
+            return
+        try:
+            json.loads(first_line)
+            documents: Iterable[Dict[str, Any]] = (
+                json.loads(line) for line in itertools.chain([first_line], spans_file) if line.strip()
+            )
+        except json.JSONDecodeError:
+            # A single, pretty-printed document.
+            spans_file.seek(0)
+            documents = [json.load(spans_file)]
+        for document in documents:
+            if "resourceSpans" in document:
+                yield from parse_otlp_json(document)
+            else:
+                yield SpanRecord(**document)
+
+
+class TraceStoreSpanExporter(SpanExporter):
+    """Span exporter appending flattened spans to a local JSON lines file."""
+
+    def __init__(self, path: str):
+        """Initialize the exporter.
+
+        Args:
+            path: Trace store file, created if needed
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(asdict(SpanRecord.from_span(span)), default=str) + "\n" for span in spans)
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -4,6 +4,8 @@
 """Tracing configuration and setup."""
 
 import logging
+from os import environ
+from typing import Dict, Optional, Sequence, Tuple
 
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc import trace_exporter as trace_exporter_grpc
@@ -15,10 +17,110 @@ from opentelemetry.sdk.trace import export as trace_export
 
 import exceptions
 
+from .profiling import ProfilingSpanProcessor
 from .providers.factory import create_otel_provider
+from .redaction import RedactingSpanExporter, Redactor
+from .reduction import CollapsingSpanProcessor, DeduplicatingSpanExporter
+from .store import TraceStoreSpanExporter
+from .transport import GrpcTransportConfig, create_grpc_exporter
 
 logger = logging.getLogger(__name__)
 
+# Span exporters keyed by (protocol, endpoint, headers), shared by every setup
+# until one of them is shut down.
+_span_exporters: Dict[Tuple[str, str, Tuple[Tuple[str, str], ...], bool], trace_export.SpanExporter] = {}
+
+
+class _SharedSpanExporter(trace_export.SpanExporter):
+    """Span exporter of the cache, evicted from it when shut down.
+
+    A tracer provider shuts its exporter down with it: the next setup must not
+    get the same, dead, exporter back.
+    """
+
+    def __init__(self, exporter: trace_export.SpanExporter, key: Tuple):
+        self._exporter = exporter
+        self._key = key
+
+    def export(self, spans: Sequence[sdk_trace.ReadableSpan]) -> trace_export.SpanExportResult:
+        return self._exporter.export(spans)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._exporter.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        if _span_exporters.get(self._key) is self:
+            del _span_exporters[self._key]
+        self._exporter.shutdown()
+
+
+def create_span_exporter(
+    protocol: str,
+    endpoint: str,
+    headers: Dict[str, str],
+    insecure: bool = False,
+) -> trace_export.SpanExporter:
+    """Get the OTLP span exporter for a configuration, shared until it is shut down.
+
+    Args:
+        protocol: Protocol to use (http or grpc)
+        endpoint: OTLP endpoint of the provider
+        headers: Export headers
+        insecure: Disable TLS for gRPC
+
+    Raises:
+        OpenTelemetryProtocolError: If the protocol is not supported
+    """
+    key = (protocol, endpoint, tuple(sorted(headers.items())), insecure)
+    exporter = _span_exporters.get(key)
+    if exporter is not None:
+        return exporter
+
+    # Create span exporter based on protocol
+    if protocol == "http":
+        # For HTTP, append /v1/traces to the endpoint
+        traces_endpoint = f"{endpoint}/v1/traces"
+        exporter = trace_exporter_http.OTLPSpanExporter(
+            endpoint=traces_endpoint,
+            headers=headers,
+            compression=trace_exporter_http.Compression.Gzip,
+        )
+    elif protocol == "grpc":
+        exporter = create_grpc_exporter(
+            trace_exporter_grpc.OTLPSpanExporter,
+            GrpcTransportConfig.from_env(endpoint, insecure),
+            headers,
+        )
+    else:
+        raise exceptions.OpenTelemetryProtocolError(f"invalid OpenTelemetry protocol: {protocol}")
+
+    return _span_exporters.setdefault(key, _SharedSpanExporter(exporter, key))
+
+
+def create_redactor() -> Optional[Redactor]:
+    """Get the PII redactor of exported spans, None with ``OTEL_REDACTION=false``."""
+    return Redactor() if environ.get("OTEL_REDACTION", "true").lower() != "false" else None
+
+
+def wrap_span_exporter(exporter: trace_export.SpanExporter, redactor: Optional[Redactor]) -> trace_export.SpanExporter:
+    """Add the processing of the exported spans to an OTLP span exporter.
+
+    Deduplication and redaction run in the batch processor worker, off the
+    request threads: the load test builds its exporter with this function too,
+    so that its queue measurements include that work.
+
+    Args:
+        exporter: OTLP span exporter
+        redactor: PII redactor, None to export attributes unchanged
+    """
+    # Optionally replace long attribute values repeated within a batch by references.
+    dedup_min_length = int(environ.get("OTEL_DEDUP_MIN_LENGTH", "0"))
+    if dedup_min_length > 0:
+        exporter = DeduplicatingSpanExporter(exporter, dedup_min_length)
+    if redactor:
+        exporter = RedactingSpanExporter(exporter, redactor)
+    return exporter
+
 
 def setup_tracing_with_provider(
     provider_name: str,
@@ -42,36 +144,49 @@ def setup_tracing_with_provider(
 
     endpoint = provider.get_endpoint()
     headers = provider.get_headers()
+    protocol = provider.get_export_protocol(protocol)
 
-    logger.info(f"Setup OpenTelemetry Tracer with {provider.name}: {endpoint} ({protocol})")
+    logger.info("Setup OpenTelemetry Tracer with %s: %s (%s)", provider.name, endpoint, protocol)
 
-    # Create span exporter based on protocol
-    if protocol == "http":
-        # For HTTP, append /v1/traces to the endpoint
-        traces_endpoint = f"{endpoint}/v1/traces"
-        otlp_span_exporter = trace_exporter_http.OTLPSpanExporter(
-            endpoint=traces_endpoint,
-            headers=headers,
-            compression=trace_exporter_http.Compression.Gzip,
-        )
-    elif protocol == "grpc":
-        otlp_span_exporter = trace_exporter_grpc.OTLPSpanExporter(
-            endpoint=endpoint,
-            headers=headers,
-            insecure=False,  # Use secure connection by default
-        )
-    else:
-        raise exceptions.OpenTelemetryProtocolError(f"invalid OpenTelemetry protocol: {protocol}")
+    redactor = create_redactor()
+    otlp_span_exporter = wrap_span_exporter(
+        create_span_exporter(protocol, endpoint, headers, provider.is_insecure()), redactor
+    )
 
-    logger.info(f"OTLP tracing configured for {provider.name}: {endpoint}")
+    logger.info("OTLP tracing configured for %s: %s", provider.name, endpoint)
 
     tracer_provider = sdk_trace.TracerProvider(
         resource=resource,
         span_limits=sdk_trace.SpanLimits(max_attributes=100_000),
     )
 
-    otlp_span_processor = trace_export.BatchSpanProcessor(otlp_span_exporter)
-    tracer_provider.add_span_processor(otlp_span_processor)
+    span_processor = trace_export.BatchSpanProcessor(otlp_span_exporter, **provider.get_batch_options())
+
+    # Optionally keep a local copy of the spans, e.g. for trace replay.
+    trace_store = environ.get("OTEL_TRACE_STORE")
+    if trace_store:
+        store_exporter = TraceStoreSpanExporter(trace_store)
+        if redactor:
+            store_exporter = RedactingSpanExporter(store_exporter, redactor)
+        store_processor = trace_export.BatchSpanProcessor(store_exporter)
+        span_processor = _combine_processors(span_processor, store_processor)
+        logger.info("Spans also stored in %s", trace_store)
+
+    # Optionally fold the spans of low-value chain steps into attributes of their parent.
+    collapsed = environ.get("OTEL_COLLAPSED_SPANS", "")
+    patterns = [pattern.strip() for pattern in collapsed.split(",") if pattern.strip()]
+    if patterns:
+        span_processor = CollapsingSpanProcessor(span_processor, patterns)
+        logger.info("Collapsing spans: %s", ", ".join(patterns))
+
+    # Optionally profile a sample of the LangChain spans.
+    profiling_ratio = float(environ.get("OTEL_PROFILING_SAMPLE_RATIO", "0"))
+    if profiling_ratio > 0:
+        memory = environ.get("OTEL_PROFILING_MEMORY", "false").lower() == "true"
+        span_processor = ProfilingSpanProcessor(span_processor, profiling_ratio, memory=memory)
+        logger.info("Profiling %.2f%% of the traces", profiling_ratio * 100)
+
+    tracer_provider.add_span_processor(span_processor)
 
     trace.set_tracer_provider(tracer_provider)
     logger.info("OpenTelemetry tracing initialized")
@@ -79,6 +194,13 @@ def setup_tracing_with_provider(
     return trace.get_tracer(resource.attributes.get(resources.SERVICE_NAME, "unknown") if resource else "unknown")
 
 
+def _combine_processors(*processors: sdk_trace.SpanProcessor) -> sdk_trace.SpanProcessor:
+    combined = sdk_trace.SynchronousMultiSpanProcessor()
+    for processor in processors:
+        combined.add_span_processor(processor)
+    return combined
+
+
 # Backward compatibility function
 def setup_tracing(
     otlp_endpoint: str,
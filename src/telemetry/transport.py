@@ -0,0 +1,159 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""gRPC transport configuration for the OTLP exporters.
+
+Exporters built with the same transport configuration share one gRPC channel,
+so traces, metrics and logs sent to a backend reuse a single HTTP/2 connection.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from os import environ
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+
+import grpc
+
+import exceptions
+
+logger = logging.getLogger(__name__)
+
+ExporterT = TypeVar("ExporterT")
+
+_COMPRESSIONS = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+@dataclass(frozen=True)
+class GrpcTransportConfig:
+    """Channel settings of an OTLP gRPC exporter."""
+
+    endpoint: str
+    insecure: bool = False
+    compression: str = "gzip"
+    keepalive_time_ms: int = 30_000
+    keepalive_timeout_ms: int = 10_000
+    keepalive_permit_without_calls: bool = True
+    max_message_bytes: int = 32 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls, endpoint: str, insecure: bool = False) -> "GrpcTransportConfig":
+        """Build a configuration, with tuning read from the environment.
+
+        Uses OTEL_EXPORTER_OTLP_COMPRESSION, OTEL_GRPC_KEEPALIVE_TIME_MS,
+        OTEL_GRPC_KEEPALIVE_TIMEOUT_MS and OTEL_GRPC_MAX_MESSAGE_BYTES.
+        """
+        compression = environ.get("OTEL_EXPORTER_OTLP_COMPRESSION", cls.compression).lower()
+        if compression == "zstd":
+            # grpcio only implements gzip and deflate channel compression.
+            logger.warning("zstd compression is not supported by grpcio, using gzip")
+            compression = "gzip"
+        if compression not in _COMPRESSIONS:
+            raise exceptions.OpenTelemetryProtocolError(compression, "Unsupported gRPC compression")
+        return cls(
+            endpoint=endpoint,
+            insecure=insecure,
+            compression=compression,
+            keepalive_time_ms=int(environ.get("OTEL_GRPC_KEEPALIVE_TIME_MS", cls.keepalive_time_ms)),
+            keepalive_timeout_ms=int(environ.get("OTEL_GRPC_KEEPALIVE_TIMEOUT_MS", cls.keepalive_timeout_ms)),
+            max_message_bytes=int(environ.get("OTEL_GRPC_MAX_MESSAGE_BYTES", cls.max_message_bytes)),
+        )
+
+    def grpc_compression(self) -> grpc.Compression:
+        """Get the gRPC compression algorithm."""
+        return _COMPRESSIONS[self.compression]
+
+    def channel_options(self) -> Tuple[Tuple[str, Any], ...]:
+        """Get the gRPC channel arguments."""
+        return (
+            ("grpc.keepalive_time_ms", self.keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", self.keepalive_timeout_ms),
+            ("grpc.keepalive_permit_without_calls", int(self.keepalive_permit_without_calls)),
+            ("grpc.http2.max_pings_without_data", 0),
+            ("grpc.max_send_message_length", self.max_message_bytes),
+            ("grpc.max_receive_message_length", self.max_message_bytes),
+        )
+
+
+class _SharedChannel:
+    def __init__(self, config: GrpcTransportConfig, channel: grpc.Channel):
+        self.config = config
+        self.channel = channel
+        self.references = 0
+
+
+class _ChannelLease:
+    """Channel handed to an exporter: closing it releases one reference."""
+
+    def __init__(self, shared: _SharedChannel):
+        self._shared = shared
+        self._released = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._shared.channel, name)
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            _release(self._shared)
+
+
+_channels: Dict[GrpcTransportConfig, _SharedChannel] = {}
+_channels_lock = threading.Lock()
+
+
+def _release(shared: _SharedChannel) -> None:
+    with _channels_lock:
+        shared.references -= 1
+        if shared.references > 0:
+            return
+        if _channels.get(shared.config) is shared:
+            del _channels[shared.config]
+    shared.channel.close()
+
+
+def create_grpc_exporter(
+    exporter_class: Type[ExporterT],
+    config: GrpcTransportConfig,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> ExporterT:
+    """Create an OTLP gRPC exporter bound to the shared channel of its configuration.
+
+    Works for the span, metric and log exporters of
+    ``opentelemetry.exporter.otlp.proto.grpc``.
+
+    Args:
+        exporter_class: OTLP gRPC exporter class
+        config: Transport configuration
+        headers: Export headers, sent as call metadata
+        **kwargs: Additional exporter arguments (e.g. timeout)
+    """
+    exporter = exporter_class(
+        endpoint=config.endpoint,
+        headers=headers,
+        insecure=config.insecure,
+        compression=config.grpc_compression(),
+        channel_options=config.channel_options(),
+        **kwargs,
+    )
+
+    # The exporter builds its own channel (honouring the credential settings);
+    # the first one for a configuration becomes the shared channel.
+    own_channel = exporter._channel
+    with _channels_lock:
+        shared = _channels.get(config)
+        if shared is None:
+            shared = _channels[config] = _SharedChannel(config, own_channel)
+        shared.references += 1
+    if shared.channel is not own_channel:
+        own_channel.close()
+
+    lease = _ChannelLease(shared)
+    exporter._channel = lease
+    exporter._client = exporter._stub(lease)
+    return exporter
@@ -0,0 +1,4 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Long-lived worker serving LLM requests with preloaded clients and telemetry."""
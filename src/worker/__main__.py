@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""Serve LLM requests from a long-lived, preloaded worker.
+
+The server listens at once and answers GET /healthz with 503 until telemetry,
+the LLM client and the workflows are initialized, then serves POST /invoke
+until SIGTERM or SIGINT, and flushes the telemetry before exiting.
+
+Example:
+    python -m worker --port 8080
+    curl -s localhost:8080/invoke -d '{"messages": [{"role": "user", "content": "Hello"}]}'
+"""
+
+import argparse
+import logging
+import signal
+import threading
+from os import environ
+
+from .server import Worker, WorkerServer
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=environ.get("WORKER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(environ.get("WORKER_PORT", "8080")))
+    parser.add_argument("--provider", default=environ.get("LLM_PROVIDER", "anthropic"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--otel-provider", default=environ.get("OTEL_PROVIDER"))
+    parser.add_argument("--otel-protocol", default=environ.get("OTEL_EXPORTER_OTLP_PROTOCOL"))
+    args = parser.parse_args()
+
+    worker = Worker(args.provider, args.model, args.otel_provider, args.otel_protocol)
+    server = WorkerServer(worker, args.host, args.port)
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return: call it from another thread.
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    failed = threading.Event()
+
+    def start():
+        # Serve while starting up, so /healthz answers 503 and requests fail fast meanwhile.
+        try:
+            worker.start()
+        except Exception:
+            logger.exception("Worker startup failed")
+            failed.set()
+            server.shutdown()
+
+    logger.info("Worker listening on %s:%s", args.host, server.server_address[1])
+    try:
+        threading.Thread(target=start, name="worker-startup", daemon=True).start()
+        server.serve_forever()
+    finally:
+        server.server_close()
+        worker.close()
+    if failed.is_set():
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# SPDX-FileCopyrightText: Copyright (C) Nicolas Lamirault <nicolas.lamirault@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+
+"""HTTP worker initializing telemetry and model clients once.
+
+A one-shot run of ``src/app.py`` pays interpreter startup, the LangChain and
+OpenTelemetry imports, resource detection and the exporter and client setup
+before its only request. The worker pays them once, then serves requests on
+the same LLM client (and its connection pool) and the same span pipeline:
+
+- ``POST /invoke``: ``{"messages": [{"role": ..., "content": ...}]}``,
+  ``{"workflow": "chain", "subject": ...}`` or ``{"workflow": "rag", "question": ...}``
+- ``GET /healthz``: 200 once started, 503 before, with the startup phase durations
+
+Requests are traced as server spans, continuing the trace context of their
+headers.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from langchain_core.messages import convert_to_messages
+from opentelemetry import trace
+
+from core.chain import build_retriever, build_workflow, rag_app
+from models.factory import create_llm
+from models.llm import create_test_messages
+from models.preflight import PreflightLLM
+from telemetry.logs import cleanup_logging, setup_logging_with_provider
+from telemetry.propagation import extract_context
+from telemetry.resource import create_resource
+from telemetry.tracing import cleanup_tracing, setup_tracing_with_provider
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer(__name__)
+
+
+class Worker:
+    """LLM client, workflows and telemetry, initialized once and shared by requests."""
+
+    def __init__(
+        self,
+        llm_provider: str,
+        model: Optional[str] = None,
+        otel_provider: Optional[str] = None,
+        otel_protocol: Optional[str] = None,
+    ):
+        """Initialize the worker, without starting it.
+
+        Args:
+            llm_provider: LLM provider to use
+            model: Specific model name (optional, uses provider default)
+            otel_provider: OpenTelemetry provider to use, None for console logs only
+            otel_protocol: Protocol to use for tracing (http or grpc)
+        """
+        self.llm_provider = llm_provider
+        self.model = model
+        self.otel_provider = otel_provider
+        self.otel_protocol = otel_protocol
+        self.startup_ms: Dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self.requests = 0
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        self.startup_ms[name] = (time.perf_counter() - start) * 1000
+
+    def start(self) -> None:
+        """Set up telemetry, then create the LLM client and build the workflows."""
+        with self._phase("telemetry"):
+            resource = create_resource("ai-llm-lab-worker")
+            setup_logging_with_provider(self.otel_provider, self.otel_protocol, resource)
+            if self.otel_provider:
+                setup_tracing_with_provider(self.otel_provider, self.otel_protocol, resource)
+        with self._phase("llm"):
+            self.llm = create_llm(provider=self.llm_provider, model=self.model)
+            self.preflight = PreflightLLM(self.llm)
+        with self._phase("workflows"):
+            build_workflow(self.llm)
+            self.retriever = build_retriever()
+        self.started_at = time.monotonic()
+        self.ready.set()
+        phases = ", ".join(f"{phase} {duration:.0f} ms" for phase, duration in self.startup_ms.items())
+        logger.info("Worker ready with %s LLM: %s", self.llm_provider, phases)
+
+    def invoke(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve one request.
+
+        Raises:
+            ValueError: If the workflow is unknown or the messages are invalid
+        """
+        with self._lock:
+            self.requests += 1
+        workflow = body.get("workflow", "messages")
+        if workflow == "chain":
+            output = build_workflow(self.llm).invoke({"subject": body.get("subject", "OpenTelemetry")})["text"]
+        elif workflow == "rag":
+            output = rag_app(self.llm, body.get("question", "How are spans exported?"), self.retriever)["answer"]
+        elif workflow == "messages":
+            messages = body.get("messages")
+            if messages is not None and not isinstance(messages, list):
+                raise ValueError("messages must be a list of messages")
+            messages = convert_to_messages(messages) if messages else create_test_messages()
+            output = self.preflight.invoke(messages).content
+        else:
+            raise ValueError(f"Unknown workflow: {workflow}")
+        return {"workflow": workflow, "output": output}
+
+    def health(self) -> Dict[str, Any]:
+        """Get the worker status."""
+        return {
+            "status": "ok" if self.ready.is_set() else "starting",
+            "uptime_s": time.monotonic() - self.started_at if self.started_at else 0.0,
+            "requests": self.requests,
+            "startup_ms": self.startup_ms,
+        }
+
+    def close(self) -> None:
+        """Flush and shut down the telemetry pipelines."""
+        if self.otel_provider:
+            cleanup_tracing()
+            shutdown = getattr(trace.get_tracer_provider(), "shutdown", None)
+            if shutdown:
+                shutdown()
+        cleanup_logging()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients reuse their connection across requests, without
+    # Nagle's algorithm delaying the body sent after the headers.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "WorkerServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+    def _send(self, status: HTTPStatus, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}, None
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as exc:
+            return None, f"invalid JSON: {exc}"
+        return (body, None) if isinstance(body, dict) else (None, "body must be a JSON object")
+
+    def do_GET(self) -> None:
+        if self.path != "/healthz":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"not found: {self.path}"})
+            return
+        worker = self.server.worker
+        self._send(HTTPStatus.OK if worker.ready.is_set() else HTTPStatus.SERVICE_UNAVAILABLE, worker.health())
+
+    def do_POST(self) -> None:
+        if self.path != "/invoke":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"not found: {self.path}"})
+            return
+        body, error = self._read_json()
+        context = extract_context(dict(self.headers))
+        with tracer.start_as_current_span("POST /invoke", context=context, kind=trace.SpanKind.SERVER) as span:
+            span.set_attribute("http.request.method", "POST")
+            span.set_attribute("url.path", self.path)
+            if error:
+                status, response = HTTPStatus.BAD_REQUEST, {"error": error}
+            elif not self.server.worker.ready.is_set():
+                status, response = HTTPStatus.SERVICE_UNAVAILABLE, {"error": "worker starting"}
+            else:
+                start = time.perf_counter()
+                try:
+                    response = self.server.worker.invoke(body)
+                    status = HTTPStatus.OK
+                except (KeyError, TypeError, ValueError) as exc:
+                    status, response = HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+                except Exception as exc:
+                    logger.exception("Request failed")
+                    span.record_exception(exc)
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(exc)}
+                response["duration_ms"] = (time.perf_counter() - start) * 1000
+            span.set_attribute("http.response.status_code", status.value)
+            if status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                span.set_status(trace.StatusCode.ERROR)
+            self._send(status, response)
+
+
+class WorkerServer(ThreadingHTTPServer):
+    """Threaded HTTP server of a worker."""
+
+    daemon_threads = True
+
+    def __init__(self, worker: Worker, host: str = "0.0.0.0", port: int = 8080):
+        """Initialize the server, listening at once (the worker may start after).
+
+        Args:
+            worker: Worker serving the requests
+            host: Listening address
+            port: Listening port, 0 for any free port
+        """
+        super().__init__((host, port), _Handler)
+        self.worker = worker